@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import optparse
+import os
+import re
+import sys
+
+_closure_linter_dir = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "trace-viewer", "third_party",
+    "closure_linter"))
+if _closure_linter_dir not in sys.path:
+  sys.path.append(_closure_linter_dir)
+
+from closure_linter import javascripttokenizer
+from closure_linter import javascripttokens
+
+"""
+Offline minification of the flattened javascript and css.
+
+minify_js() runs the javascript through closure_linter's JavaScriptTokenizer,
+drops comments and whitespace, and joins the remaining tokens back together
+with a space only where two tokens would otherwise fuse. Line breaks are
+removed only where doing so can not change the result of automatic semicolon
+insertion, so code that omits semicolons keeps working.
+
+minify_css() is a regex based pass that strips comments and redundant
+whitespace outside of strings.
+"""
+
+Type = javascripttokens.JavaScriptTokenType
+
+_DROPPED_TYPES = Type.COMMENT_TYPES | frozenset([Type.WHITESPACE,
+                                                 Type.BLANK_LINE])
+
+_STRING_START_TYPES = frozenset([Type.SINGLE_QUOTE_STRING_START,
+                                 Type.DOUBLE_QUOTE_STRING_START])
+_STRING_END_TYPES = frozenset([Type.SINGLE_QUOTE_STRING_END,
+                               Type.DOUBLE_QUOTE_STRING_END])
+
+# A line break after one of these can never end a statement.
+_JOINS_AFTER = frozenset([';', '{', ',', '(', '['])
+
+# A line break before one of these never ends a statement either. Operators
+# that can start a new statement (e.g. '!', '++') are excluded.
+_JOINS_BEFORE = frozenset(['}', ')', ']', '.', ',', ';', '?', ':'])
+_NON_JOINING_OPERATORS = frozenset(['!', '++', '--', 'new', 'delete', 'typeof',
+                                    'void'])
+
+_WORD_CHAR = re.compile(r'[A-Za-z0-9_$\\]')
+
+_PARAMETER_COMMENT = re.compile(r'/\*.*?\*/|//.*$')
+_WHITESPACE = re.compile(r'\s+')
+
+def _is_word_char(c):
+  return bool(c) and _WORD_CHAR.match(c) is not None
+
+def _needs_space(prev, prev_type, next):
+  """Whether prev and next would fuse into different tokens if adjacent."""
+  a = prev[-1:]
+  b = next[:1]
+  if _is_word_char(a) and _is_word_char(b):
+    return True
+  if a in '+-' and b == a:
+    return True
+  if a == '/' and b in '/*':
+    return True
+  if prev_type == Type.NUMBER and b == '.':
+    return True
+  return False
+
+# Keywords whose parenthesized header is always followed by a statement. 'while'
+# is left out since it also ends do-while loops.
+_HEADER_KEYWORDS = frozenset(['if', 'for', 'with', 'catch'])
+_PARAMETER_TYPES = frozenset([Type.START_PARAMETERS, Type.PARAMETERS,
+                              Type.END_PARAMETERS])
+
+def _can_join_lines(prev, prev_type, next, next_type, prev_ends_header):
+  if prev_ends_header or prev_type in _PARAMETER_TYPES:
+    return True
+  if prev_type == Type.OPERATOR:
+    return prev not in ('++', '--')
+  if prev in _JOINS_AFTER:
+    return True
+  if next_type == Type.OPERATOR:
+    return next not in _NON_JOINING_OPERATORS
+  return next in _JOINS_BEFORE
+
+def _code_tokens(js_code):
+  """Yields (string, type, line_number, column, starts_line, separated) for each
+  token that survives minification, where separated says whether anything was
+  dropped between it and the previous token. Contents of strings are passed
+  through as-is, including any line continuations."""
+  tokenizer = javascripttokenizer.JavaScriptTokenizer()
+  first_token = tokenizer.TokenizeFile(js_code.splitlines(True))
+
+  in_string = False
+  last_line_number = None
+  separated = False
+  for token in first_token or []:
+    if in_string:
+      starts_line = token.line_number != last_line_number
+      last_line_number = token.line_number
+      if token.type == Type.BLANK_LINE:
+        yield '', Type.STRING_TEXT, token.line_number, 0, starts_line, False
+        continue
+      if token.type in _STRING_END_TYPES:
+        in_string = False
+      yield (token.string, token.type, token.line_number, token.start_index,
+             starts_line, False)
+      continue
+
+    if token.type in _DROPPED_TYPES:
+      separated = True
+      continue
+
+    string = token.string
+    column = token.start_index
+    if token.type == Type.PARAMETERS:
+      column += len(string) - len(string.lstrip())
+      string = _WHITESPACE.sub('', _PARAMETER_COMMENT.sub('', string))
+      if not string:
+        separated = True
+        continue
+    elif token.type == Type.END_PARAMETERS:
+      string = string.rstrip()
+    elif token.type in _STRING_START_TYPES:
+      in_string = True
+
+    starts_line = token.line_number != last_line_number
+    last_line_number = token.line_number
+    yield (string, token.type, token.line_number, column, starts_line,
+           separated or starts_line)
+    separated = False
+
+def minify_js(js_code, source_map=None, input_source_map=None,
+              input_filename=None):
+  """Returns js_code with comments and unneeded whitespace removed.
+
+  If source_map is given, the position of every token in the output is mapped
+  in it, either to input_filename or, when the input was itself generated, to
+  wherever input_source_map says the token came from.
+  """
+  chunks = []
+  out_line = 0
+  out_column = 0
+  prev = ''
+  prev_type = None
+  in_string = False
+  # For each open paren, whether it starts an if/for/while/... header.
+  paren_stack = []
+  prev_ends_header = False
+  for (string, token_type, line_number, column, starts_line,
+       separated) in _code_tokens(js_code):
+    separator = ''
+    if in_string:
+      if starts_line:
+        separator = '\n'
+      if token_type in _STRING_END_TYPES:
+        in_string = False
+    elif prev:
+      if starts_line and not _can_join_lines(prev, prev_type,
+                                             string, token_type,
+                                             prev_ends_header):
+        separator = '\n'
+      elif separated and _needs_space(prev, prev_type, string):
+        separator = ' '
+    if token_type in _STRING_START_TYPES:
+      in_string = True
+
+    if separator == '\n':
+      out_line += 1
+      out_column = 0
+    elif separator:
+      out_column += 1
+    if separator:
+      chunks.append(separator)
+
+    if not string:
+      continue
+    if source_map is not None:
+      source_position = (input_filename, line_number - 1, column)
+      if input_source_map is not None:
+        source_position = input_source_map.find(*source_position[1:])
+      if source_position:
+        source_map.add_mapping(out_line, out_column, *source_position)
+    chunks.append(string)
+    out_column += len(string)
+
+    ends_header = False
+    if token_type == Type.START_PAREN:
+      paren_stack.append(prev_type == Type.KEYWORD and
+                         prev in _HEADER_KEYWORDS)
+    elif token_type == Type.END_PAREN and paren_stack:
+      ends_header = paren_stack.pop()
+    prev = string
+    prev_type = token_type
+    prev_ends_header = ends_header
+
+  if chunks:
+    chunks.append('\n')
+  return ''.join(chunks)
+
+_CSS_STRING_OR_COMMENT = re.compile(
+    r'("(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')|/\*.*?\*/', re.DOTALL)
+_CSS_SPACE_AROUND_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_CSS_SPACE_AFTER_COLON = re.compile(r':\s+')
+_CSS_TRAILING_SEMICOLON = re.compile(r';+}')
+
+def _minify_css_outside_strings(css):
+  css = _WHITESPACE.sub(' ', css)
+  css = _CSS_SPACE_AROUND_PUNCTUATION.sub(r'\1', css)
+  css = _CSS_SPACE_AFTER_COLON.sub(':', css)
+  css = _CSS_TRAILING_SEMICOLON.sub('}', css)
+  return css
+
+def minify_css(css_code):
+  """Returns css_code with comments and unneeded whitespace removed."""
+  chunks = []
+  code = []
+  pos = 0
+  for m in _CSS_STRING_OR_COMMENT.finditer(css_code):
+    code.append(css_code[pos:m.start()])
+    pos = m.end()
+    if m.group(1):
+      chunks.append(_minify_css_outside_strings(''.join(code)))
+      chunks.append(m.group(1))
+      code = []
+    else:
+      # Comments separate tokens just like whitespace does.
+      code.append(' ')
+  code.append(css_code[pos:])
+  chunks.append(_minify_css_outside_strings(''.join(code)))
+  result = ''.join(chunks).strip()
+  if result:
+    result += '\n'
+  return result
+
+def main(args):
+  parser = optparse.OptionParser(
+    usage="%prog [--css] < input > output",
+    epilog="""
+Minifies javascript (or, with --css, a stylesheet) read from stdin and writes
+the result to stdout.
+""")
+  parser.add_option("--css", dest="css", action="store_true", default=False,
+                    help="Treat the input as css instead of javascript")
+  options, args = parser.parse_args(args)
+
+  if options.css:
+    sys.stdout.write(minify_css(sys.stdin.read()))
+  else:
+    sys.stdout.write(minify_js(sys.stdin.read()))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
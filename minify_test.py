@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import unittest
+
+import minify
+
+class MinifyJSTest(unittest.TestCase):
+  def test_strips_comments_and_whitespace(self):
+    text = """// Copyright
+/**
+ * @fileoverview Something.
+ */
+base.exportTo('tracing', function() {
+  /* inline */ var x = 1;  // trailing
+  return x + 2;
+});
+"""
+    self.assertEquals(
+        "base.exportTo('tracing',function(){var x=1;return x+2;});\n",
+        minify.minify_js(text))
+
+  def test_keeps_space_between_words(self):
+    self.assertEquals("var a=typeof b;\n",
+                      minify.minify_js("var   a = typeof  b;"))
+    self.assertEquals("x=a+ +b;y=c- --d;\n",
+                      minify.minify_js("x = a + +b; y = c - --d;"))
+
+  def test_strings_are_untouched(self):
+    self.assertEquals("var s='a  //  b /* c */';\n",
+                      minify.minify_js("var s = 'a  //  b /* c */';"))
+    self.assertEquals('var s="x\\\n  y";\n',
+                      minify.minify_js('var s = "x\\\n  y";'))
+
+  def test_keeps_newlines_needed_for_asi(self):
+    text = """base.require('a')
+base.require('b')
+var x = {}
+x.y = 1
+return
+x
+"""
+    self.assertEquals("base.require('a')\nbase.require('b')\nvar x={}\n"
+                      "x.y=1\nreturn\nx\n",
+                      minify.minify_js(text))
+
+  def test_joins_lines_that_cannot_end_a_statement(self):
+    text = """if (a)
+  b();
+var c = d +
+    e;
+foo(1,
+    2)
+    .bar();
+"""
+    self.assertEquals("if(a)b();var c=d+e;foo(1,2).bar();\n",
+                      minify.minify_js(text))
+
+  def test_function_parameters(self):
+    self.assertEquals("function f(a,b){}\n",
+                      minify.minify_js("function f(a, // first\n b) {\n}"))
+
+
+class MinifyCSSTest(unittest.TestCase):
+  def test_basic(self):
+    text = """/* comment */
+.a, .b > .c {
+  color: red;
+  margin: 0 auto;
+}
+
+.d:hover .e {
+  content: "  x  ;  ";
+}
+"""
+    self.assertEquals(
+        '.a,.b>.c{color:red;margin:0 auto}.d:hover .e{content:"  x  ;  "}\n',
+        minify.minify_css(text))
+
+if __name__ == "__main__":
+  unittest.main()
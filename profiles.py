@@ -0,0 +1,53 @@
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import json
+import os
+
+"""
+Build profiles for update.py --profile.
+
+A profile says which modules of trace-viewer a bundle is built from: a dict
+with lists of entry_modules, excluded_modules and stubbed_modules, as taken by
+generate_standalone_timeline_view.generate_js().
+
+Building fails if any module in the bundle requires an excluded module, so
+excluded_modules only guard against a dependency creeping in. Stubbed modules
+are left out along with anything only they need, even though other modules
+require them, and are marked as flattened so that base.require() of them is a
+no-op. Only stub modules that nothing else refers to directly, such as
+importers and linux_perf parsers, which just register themselves.
+"""
+
+PROFILES = {
+  'full': {
+    'entry_modules': ['base', 'timeline_view'],
+    'excluded_modules': [],
+    'stubbed_modules': []
+  },
+  'systrace': {
+    'entry_modules': ['base', 'timeline_view'],
+    'excluded_modules': [],
+    'stubbed_modules': [
+      'importer.trace_event_importer',
+      'importer.v8_log_importer',
+      'importer.linux_perf.i915_parser'
+    ]
+  }
+}
+
+def load_profile(name_or_filename):
+  """Returns the profile with the given name, or reads one from a json file
+  with the same keys as the entries of PROFILES. Raises ValueError if there
+  is neither."""
+  if name_or_filename in PROFILES:
+    return PROFILES[name_or_filename]
+  if not os.path.exists(name_or_filename):
+    raise ValueError(
+        "%s is neither a known profile (%s) nor a file" % (
+            name_or_filename, ', '.join(sorted(PROFILES.keys()))))
+  with open(name_or_filename, 'r') as f:
+    profile = json.load(f)
+  profile.setdefault('excluded_modules', [])
+  profile.setdefault('stubbed_modules', [])
+  return profile
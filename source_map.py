@@ -0,0 +1,105 @@
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import bisect
+import json
+import os
+
+"""
+A minimal writer for version 3 source maps, as understood by the browsers'
+developer tools.
+
+Lines and columns are zero based everywhere in this file, as in the source map
+format itself.
+"""
+
+_BASE64_DIGITS = ('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+                  '0123456789+/')
+
+def _encode_vlq(value):
+  if value < 0:
+    value = ((-value) << 1) | 1
+  else:
+    value <<= 1
+  chunks = []
+  while True:
+    digit = value & 31
+    value >>= 5
+    if value:
+      digit |= 32
+    chunks.append(_BASE64_DIGITS[digit])
+    if not value:
+      return ''.join(chunks)
+
+class SourceMap(object):
+  """Maps positions in a generated file back to positions in its sources."""
+  def __init__(self):
+    self._sources = []
+    self._source_indices = {}
+    # generated line -> sorted list of (generated column, source, line, column)
+    self._lines = {}
+    # generated line -> sorted list of the generated columns in self._lines
+    self._columns = {}
+
+  def add_mapping(self, generated_line, generated_column,
+                  source, source_line, source_column):
+    if source not in self._source_indices:
+      self._source_indices[source] = len(self._sources)
+      self._sources.append(source)
+    segments = self._lines.setdefault(generated_line, [])
+    columns = self._columns.setdefault(generated_line, [])
+    segment = (generated_column, source, source_line, source_column)
+    i = bisect.bisect_right(columns, generated_column)
+    columns.insert(i, generated_column)
+    segments.insert(i, segment)
+
+  def add_lines(self, generated_line, source, source_line, num_lines):
+    """Maps num_lines whole lines, starting at generated_line, one to one."""
+    for i in xrange(num_lines):
+      self.add_mapping(generated_line + i, 0, source, source_line + i, 0)
+
+  def find(self, generated_line, generated_column):
+    """Returns the (source, line, column) generated_column on generated_line
+    came from, or None if nothing is mapped there."""
+    columns = self._columns.get(generated_line)
+    if not columns:
+      return None
+    i = bisect.bisect_right(columns, generated_column) - 1
+    if i < 0:
+      return None
+    column, source, source_line, source_column = self._lines[generated_line][i]
+    return (source, source_line, source_column + generated_column - column)
+
+  def to_json(self, map_filename, generated_filename):
+    """Serializes the map, with sources relative to map_filename."""
+    map_dir = os.path.dirname(os.path.abspath(map_filename))
+    sources = [os.path.relpath(source, map_dir) for source in self._sources]
+
+    lines = []
+    last_source_index = 0
+    last_source_line = 0
+    last_source_column = 0
+    num_lines = max(self._lines.keys()) + 1 if self._lines else 0
+    for generated_line in xrange(num_lines):
+      encoded_segments = []
+      last_generated_column = 0
+      for column, source, source_line, source_column in self._lines.get(
+          generated_line, []):
+        source_index = self._source_indices[source]
+        encoded_segments.append(''.join([
+            _encode_vlq(column - last_generated_column),
+            _encode_vlq(source_index - last_source_index),
+            _encode_vlq(source_line - last_source_line),
+            _encode_vlq(source_column - last_source_column)]))
+        last_generated_column = column
+        last_source_index = source_index
+        last_source_line = source_line
+        last_source_column = source_column
+      lines.append(','.join(encoded_segments))
+
+    return json.dumps({
+        'version': 3,
+        'file': os.path.basename(generated_filename),
+        'sources': sources,
+        'names': [],
+        'mappings': ';'.join(lines)})
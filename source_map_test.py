@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import json
+import os
+import sys
+import unittest
+
+import minify
+import source_map
+
+_trace_viewer_dir = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "trace-viewer"))
+sys.path.append(os.path.join(_trace_viewer_dir, "build"))
+
+import generate_standalone_timeline_view
+import parse_deps
+
+srcdir = os.path.join(_trace_viewer_dir, "src")
+
+def _decode_vlq_segment(segment):
+  values = []
+  value = 0
+  shift = 0
+  for c in segment:
+    digit = source_map._BASE64_DIGITS.index(c)
+    value += (digit & 31) << shift
+    shift += 5
+    if not digit & 32:
+      if value & 1:
+        values.append(-(value >> 1))
+      else:
+        values.append(value >> 1)
+      value = 0
+      shift = 0
+  return values
+
+def _decode_mappings(mappings):
+  """Returns a list of (line, column, source index, source line, column)."""
+  result = []
+  source_index = source_line = source_column = 0
+  for line, encoded_line in enumerate(mappings.split(';')):
+    column = 0
+    for segment in encoded_line.split(','):
+      if not segment:
+        continue
+      values = _decode_vlq_segment(segment)
+      column += values[0]
+      source_index += values[1]
+      source_line += values[2]
+      source_column += values[3]
+      result.append((line, column, source_index, source_line, source_column))
+  return result
+
+class SourceMapTest(unittest.TestCase):
+  def test_vlq(self):
+    for value in [0, 1, -1, 15, 16, -16, 1000, -123456]:
+      self.assertEquals([value],
+                        _decode_vlq_segment(source_map._encode_vlq(value)))
+
+  def test_find(self):
+    m = source_map.SourceMap()
+    m.add_mapping(3, 10, '/a.js', 7, 2)
+    m.add_mapping(3, 0, '/b.js', 1, 0)
+    self.assertEquals(('/b.js', 1, 5), m.find(3, 5))
+    self.assertEquals(('/a.js', 7, 4), m.find(3, 12))
+    self.assertEquals(None, m.find(2, 0))
+
+  def test_to_json(self):
+    m = source_map.SourceMap()
+    m.add_lines(1, '/src/a.js', 0, 2)
+    m.add_mapping(2, 4, '/src/b.js', 5, 6)
+    result = json.loads(m.to_json('/src/out/x.js.map', '/src/out/x.js'))
+    self.assertEquals(3, result['version'])
+    self.assertEquals('x.js', result['file'])
+    self.assertEquals(['../a.js', '../b.js'], result['sources'])
+    self.assertEquals([(1, 0, 0, 0, 0), (2, 0, 0, 1, 0), (2, 4, 1, 5, 6)],
+                      _decode_mappings(result['mappings']))
+
+  def test_minified_flattened_js(self):
+    filenames = [os.path.join(srcdir, 'unittest.js')]
+    load_sequence = parse_deps.calc_load_sequence(filenames, srcdir)
+
+    flat_map = source_map.SourceMap()
+    flat_js = generate_standalone_timeline_view.generate_js(
+        load_sequence, source_map=flat_map)
+    min_map = source_map.SourceMap()
+    min_js = minify.minify_js(flat_js, source_map=min_map,
+                              input_source_map=flat_map)
+
+    # Every token in the minified output must start at the same text in the
+    # original module that it is mapped to.
+    result = json.loads(min_map.to_json(os.path.join(srcdir, 'x.js.map'),
+                                        'x.js'))
+    min_lines = min_js.splitlines()
+    module_lines = {}
+    for module in load_sequence:
+      filename = os.path.relpath(module.filename, srcdir)
+      module_lines[filename] = module.contents.splitlines()
+    mappings = _decode_mappings(result['mappings'])
+    for line, column, source_index, source_line, source_column in mappings:
+      filename = result['sources'][source_index]
+      self.assertEquals(
+          min_lines[line][column],
+          module_lines[filename][source_line][source_column])
+    self.assertTrue(len(mappings) > 100)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -10,7 +10,7 @@ This is a tool for capturing a trace that includes data from both userland and
 the kernel.  It creates an HTML file for visualizing the trace.
 """
 
-import errno, optparse, os, select, subprocess, sys, time, zlib
+import errno, hashlib, optparse, os, select, subprocess, sys, time, zlib
 
 flattened_css_file = 'style.css'
 flattened_js_file = 'script.js'
@@ -86,6 +86,10 @@ def main():
                     help='read the trace from a file (compressed) rather than running a live trace')
   parser.add_option('--asset-dir', dest='asset_dir', default='trace-viewer',
                     type='string', help='')
+  parser.add_option('--bundle-dir', dest='bundle_dir', default=None,
+                    type='string', metavar='DIR', help='write the CSS and JS '
+                    'to content-hashed files in DIR, shared by every trace '
+                    'written there, and link to them instead of embedding them')
   parser.add_option('-e', '--serial', dest='device_serial', type='string',
                     help='adb device serial number')
 
@@ -126,7 +130,20 @@ def main():
 
   script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
 
-  if options.link_assets:
+  if options.bundle_dir is not None:
+    if options.link_assets:
+      build_dir = os.path.join(script_dir, options.asset_dir, 'build')
+      js_code, css_code = get_flattened_assets(build_dir)
+    else:
+      css_code = read_asset(script_dir, flattened_css_file)
+      js_code = read_asset(script_dir, flattened_js_file)
+
+    html_dir = os.path.dirname(os.path.abspath(options.output_file))
+    css_bundle = write_bundle(options.bundle_dir, 'style', '.css', css_code)
+    js_bundle = write_bundle(options.bundle_dir, 'script', '.js', js_code)
+    css = linked_css_tag % os.path.relpath(css_bundle, html_dir)
+    js = linked_js_tag % os.path.relpath(js_bundle, html_dir)
+  elif options.link_assets:
     src_dir = os.path.join(script_dir, options.asset_dir, 'src')
     build_dir = os.path.join(script_dir, options.asset_dir, 'build')
 
@@ -264,6 +281,49 @@ def get_assets(src_dir, build_dir):
 
   return (js_files, js_flattenizer, css_files)
 
+def get_flattened_assets(build_dir):
+  sys.path.append(build_dir)
+  gen = __import__('generate_standalone_timeline_view', {}, {})
+  js_code = gen.generate_js()
+  css_code = gen.generate_css()
+  sys.path.pop()
+
+  return (js_code, css_code)
+
+def write_bundle(bundle_dir, prefix, extension, contents):
+  """Writes contents to bundle_dir/<prefix>.<hash><extension> unless a bundle
+  with the same contents is already there, and returns its path."""
+  digest = hashlib.sha1(contents).hexdigest()[:16]
+  filename = os.path.join(bundle_dir, '%s.%s%s' % (prefix, digest, extension))
+  if os.path.exists(filename):
+    return filename
+
+  if not os.path.isdir(bundle_dir):
+    try:
+      os.makedirs(bundle_dir)
+    except OSError, e:
+      # A concurrent run may have created it first.
+      if e.errno != errno.EEXIST:
+        raise
+  write_atomically(filename, contents)
+  return filename
+
+def write_atomically(filename, contents):
+  """Writes contents under a per-process temporary name and renames it into
+  place, so another systrace run never links to a half-written file."""
+  tmp_filename = '%s.%d.tmp' % (filename, os.getpid())
+  try:
+    tmp_file = open(tmp_filename, 'w')
+    try:
+      tmp_file.write(contents)
+    finally:
+      tmp_file.close()
+    os.rename(tmp_filename, filename)
+  except:
+    if os.path.exists(tmp_filename):
+      os.remove(tmp_filename)
+    raise
+
 compiled_css_tag = """<style type="text/css">%s</style>"""
 compiled_js_tag = """<script language="javascript">%s</script>"""
 
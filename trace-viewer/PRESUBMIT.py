@@ -37,7 +37,7 @@ def _CommonChecks(input_api, output_api):
       input_api, output_api, excluded_paths=_EXCLUDED_PATHS))
   results.extend(_CheckIfAboutTracingIsOutOfdate(input_api, output_api))
 
-  from web_dev_style import css_checker, js_checker
+  from web_dev_style import css_checker, js_checker, lint_runner
 
   src_dir = os.path.join(input_api.change.RepositoryRoot(), "src")
   FILES_TO_NOT_LINT = [
@@ -56,10 +56,15 @@ def _CommonChecks(input_api, output_api):
     return True
 
 
+  # Both checkers lint files in parallel and skip files whose contents they
+  # have already seen.
+  cache = lint_runner.LintCache()
   results.extend(css_checker.CSSChecker(input_api, output_api,
-                                        file_filter=IsResource).RunChecks())
+                                        file_filter=IsResource,
+                                        cache=cache).RunChecks())
   results.extend(js_checker.JSChecker(input_api, output_api,
-                                      file_filter=IsResource).RunChecks())
+                                      file_filter=IsResource,
+                                      cache=cache).RunChecks())
 
   black_list = input_api.DEFAULT_BLACK_LIST
   sources = lambda x: input_api.FilterSourceFile(x, black_list=black_list)
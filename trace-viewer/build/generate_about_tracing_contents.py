@@ -7,8 +7,21 @@ import parse_deps
 import sys
 import os
 
+import input_manifest
+
 srcdir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
 
+manifest_filename = os.path.join(srcdir, "about_tracing.manifest")
+
+# The code that generates about_tracing.* is an input too. Resolved now, since
+# the module filenames may be relative to the current directory.
+generator_filenames = [os.path.splitext(os.path.abspath(x))[0] + ".py"
+                       for x in [__file__, parse_deps.__file__]]
+
+template_filenames = ["about_tracing.html.template",
+                      "about_tracing.js.template"]
+output_filenames = ["about_tracing.html", "about_tracing.js"]
+
 html_warning_message = """
 
 
@@ -34,7 +47,22 @@ js_warning_message = """/**
 */
 """
 
-def generate_html():
+def _calc_load_sequence():
+  filenames = [os.path.join(srcdir, x) for x in ["base.js", "profiling_view.js"]]
+  filenames = [os.path.relpath(x) for x in filenames]
+  return parse_deps.calc_load_sequence(filenames, srcdir)
+
+def _input_filenames(load_sequence):
+  filenames = generator_filenames + template_filenames
+  for module in load_sequence:
+    filenames.append(module.filename)
+    for style_sheet in module.style_sheets:
+      filenames.append(style_sheet.filename)
+    for raw_script in module.dependent_raw_scripts:
+      filenames.append(raw_script.filename)
+  return filenames
+
+def generate_html(load_sequence=None):
   f = open(os.path.join(srcdir, "about_tracing.html.template"), 'r')
   template = f.read()
   f.close()
@@ -42,10 +70,8 @@ def generate_html():
   assert template.find("<WARNING_MESSAGE></WARNING_MESSAGE>") != -1
   assert template.find("<STYLE_SHEET_CONTENTS></STYLE_SHEET_CONTENTS>") != -1
 
-  filenames = [os.path.join(srcdir, x) for x in ["base.js", "profiling_view.js"]]
-  filenames = [os.path.relpath(x) for x in filenames]
-
-  load_sequence = parse_deps.calc_load_sequence(filenames, srcdir)
+  if load_sequence is None:
+    load_sequence = _calc_load_sequence()
 
   style_sheet_contents = ""
   for module in load_sequence:
@@ -60,7 +86,7 @@ def generate_html():
 
   return result
 
-def generate_js():
+def generate_js(load_sequence=None):
   f = open(os.path.join(srcdir, "about_tracing.js.template"), 'r')
   template = f.read()
   f.close()
@@ -68,11 +94,8 @@ def generate_js():
   assert template.find("<WARNING_MESSAGE></WARNING_MESSAGE>") != -1
   assert template.find("<SCRIPT_CONTENTS></SCRIPT_CONTENTS>") != -1
 
-  filenames = [os.path.join(srcdir, x) for x in ["base.js", "profiling_view.js"]]
-  filenames = [os.path.relpath(x) for x in filenames]
-
-  import parse_deps
-  load_sequence = parse_deps.calc_load_sequence(filenames, srcdir)
+  if load_sequence is None:
+    load_sequence = _calc_load_sequence()
   script_contents = ""
   script_contents += "window.FLATTENED = {};\n"
   for module in load_sequence:
@@ -94,6 +117,9 @@ def is_out_of_date():
   try:
     os.chdir(srcdir)
 
+    if input_manifest.is_up_to_date(manifest_filename, srcdir):
+      return False
+
     o = open(os.path.join(srcdir, "about_tracing.html"), 'r')
     existing_result_html = o.read()
     o.close()
@@ -126,7 +152,8 @@ def main(args):
     os.chdir(srcdir)
 
     try:
-      result_html = generate_html()
+      load_sequence = _calc_load_sequence()
+      result_html = generate_html(load_sequence)
     except parse_deps.DepsException, ex:
       sys.stderr.write("Error: %s\n\n" % str(ex))
       return 255
@@ -135,11 +162,15 @@ def main(args):
     o.write(result_html)
     o.close()
 
-    result_js = generate_js()
+    result_js = generate_js(load_sequence)
     o = open(os.path.join(srcdir, "about_tracing.js"), 'w')
     o.write(result_js)
     o.close()
 
+    input_manifest.write_manifest(manifest_filename, srcdir,
+                                  _input_filenames(load_sequence),
+                                  output_filenames)
+
   finally:
     os.chdir(olddir)
 
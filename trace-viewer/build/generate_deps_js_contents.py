@@ -7,8 +7,17 @@ import parse_deps
 import sys
 import os
 
+import input_manifest
+
 srcdir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
 
+manifest_filename = os.path.join(srcdir, "deps.js.manifest")
+
+# The code that generates deps.js is an input too. Resolved now, since the
+# module filenames may be relative to the current directory.
+generator_filenames = [os.path.splitext(os.path.abspath(x))[0] + ".py"
+                       for x in [__file__, parse_deps.__file__]]
+
 FILES_TO_IGNORE = ["about_tracing.js"]
 
 js_warning_message = (
@@ -23,7 +32,7 @@ js_warning_message = (
  */
 """)
 
-def generate_deps_js():
+def _find_module_filenames():
   all_filenames = []
   for dirpath, dirnames, filenames in os.walk(srcdir):
     for f in filenames:
@@ -42,8 +51,24 @@ def generate_deps_js():
 
   if "deps.js" in filenames:
     filenames.remove("deps.js")
+  return filenames
 
-  load_sequence = parse_deps.calc_load_sequence(filenames, srcdir)
+def _calc_load_sequence():
+  return parse_deps.calc_load_sequence(_find_module_filenames(), srcdir)
+
+def _input_filenames(load_sequence):
+  filenames = list(generator_filenames)
+  for module in load_sequence:
+    filenames.append(module.filename)
+    for style_sheet in module.style_sheets:
+      filenames.append(style_sheet.filename)
+    for raw_script in module.dependent_raw_scripts:
+      filenames.append(raw_script.filename)
+  return filenames
+
+def generate_deps_js(load_sequence=None):
+  if load_sequence is None:
+    load_sequence = _calc_load_sequence()
 
   chunks = [js_warning_message]
   for module in load_sequence:
@@ -63,6 +88,10 @@ def is_out_of_date():
   try:
     os.chdir(srcdir)
 
+    if input_manifest.is_up_to_date(manifest_filename, srcdir,
+                                    _find_module_filenames()):
+      return False
+
     o = open(os.path.join(srcdir, "deps.js"), 'r')
     existing_deps_js = o.read()
     o.close()
@@ -86,7 +115,8 @@ def main(args):
     os.chdir(srcdir)
 
     try:
-      deps_js = generate_deps_js()
+      load_sequence = _calc_load_sequence()
+      deps_js = generate_deps_js(load_sequence)
     except parse_deps.DepsException, ex:
       sys.stderr.write("Error: %s\n\n" % str(ex))
       return 255
@@ -95,6 +125,10 @@ def main(args):
     o.write(deps_js)
     o.close()
 
+    input_manifest.write_manifest(manifest_filename, srcdir,
+                                  _input_filenames(load_sequence),
+                                  ["deps.js"])
+
   finally:
     os.chdir(olddir)
 
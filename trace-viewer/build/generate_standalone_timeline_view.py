@@ -2,10 +2,12 @@
 # Copyright (c) 2012 The Chromium Authors. All rights reserved.
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
+import json
 import optparse
 import parse_deps
 import sys
 import os
+import watch
 
 srcdir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
 
@@ -48,13 +50,36 @@ def _sopen(filename, mode):
     return open(filename, mode)
   return os.fdopen(os.dup(sys.stdout.fileno()), 'w')
 
-def _get_input_filenames():
-  return [os.path.join(srcdir, f)
-          for f in ['base.js', 'timeline_view.js']]
-
-def generate_css():
-  filenames = _get_input_filenames()
-  load_sequence = parse_deps.calc_load_sequence(filenames, srcdir)
+# A profile lists the entry_modules of a bundle, the excluded_modules none
+# of them may require and the stubbed_modules to leave out anyway.
+DEFAULT_PROFILE = {
+  'entry_modules': ['base', 'timeline_view'],
+  'excluded_modules': [],
+  'stubbed_modules': []
+}
+
+def _read_profile(filename):
+  with open(filename, 'r') as f:
+    profile = json.load(f)
+  profile.setdefault('excluded_modules', [])
+  profile.setdefault('stubbed_modules', [])
+  return profile
+
+def _get_input_filenames(profile=None):
+  profile = profile or DEFAULT_PROFILE
+  return [os.path.join(srcdir, name.replace('.', os.sep) + '.js')
+          for name in profile['entry_modules']]
+
+def _calc_load_sequence(profile=None):
+  profile = profile or DEFAULT_PROFILE
+  filenames = _get_input_filenames(profile)
+  return parse_deps.calc_load_sequence(filenames, srcdir,
+                                       profile['excluded_modules'],
+                                       profile['stubbed_modules'])
+
+def generate_css(load_sequence=None, profile=None):
+  if load_sequence is None:
+    load_sequence = _calc_load_sequence(profile)
 
   style_sheet_chunks = [css_warning_message, '\n']
   for module in load_sequence:
@@ -63,19 +88,30 @@ def generate_css():
 
   return ''.join(style_sheet_chunks)
 
-def generate_js():
-  filenames = _get_input_filenames()
-  load_sequence = parse_deps.calc_load_sequence(filenames, srcdir)
+def generate_js(load_sequence=None, source_map=None, profile=None):
+  """Returns the flattened javascript. If source_map is given, every line that
+  came from a module is mapped back to that module's file in it, through
+  source_map.add_lines(generated_line, filename, source_line, num_lines)."""
+  profile = profile or DEFAULT_PROFILE
+  if load_sequence is None:
+    load_sequence = _calc_load_sequence(profile)
 
   js_chunks = [js_warning_message, '\n']
   js_chunks.append("window.FLATTENED = {};\n")
 
   for module in load_sequence:
     js_chunks.append( "window.FLATTENED['%s'] = true;\n" % module.name)
+  for name in profile['stubbed_modules']:
+    js_chunks.append( "window.FLATTENED['%s'] = true;\n" % name)
 
+  line = sum(chunk.count('\n') for chunk in js_chunks)
   for module in load_sequence:
     js_chunks.append(module.contents)
     js_chunks.append("\n")
+    if source_map is not None:
+      num_lines = len(module.contents.splitlines())
+      source_map.add_lines(line, module.filename, 0, num_lines)
+      line += module.contents.count('\n') + 1
 
   return ''.join(js_chunks)
 
@@ -91,6 +127,18 @@ ordering restrictions between them.
                     help="Where to place generated javascript file")
   parser.add_option("--css", dest="css_file",
                     help="Where to place generated css file")
+  parser.add_option("--profile", dest="profile_file",
+                    help="A json file listing the entry_modules, "
+                         "excluded_modules and stubbed_modules to bundle, "
+                         "instead of all of them")
+  parser.add_option("--watch", dest="watch", action="store_true",
+                    default=False,
+                    help="Keep running and regenerate the outputs whenever "
+                         "a file under src/ changes")
+  parser.add_option("--poll-interval", dest="poll_interval", type="float",
+                    default=watch.DEFAULT_POLL_INTERVAL,
+                    help="Seconds between checks for changes in --watch mode "
+                         "when inotify is unavailable")
   options, args = parser.parse_args(args)
 
   if not options.js_file and not options.css_file:
@@ -98,13 +146,36 @@ ordering restrictions between them.
     parser.print_help()
     return 1
 
+  profile = DEFAULT_PROFILE
+  if options.profile_file:
+    try:
+      profile = _read_profile(options.profile_file)
+    except (IOError, ValueError), ex:
+      sys.stderr.write("ERROR: Can not read profile %s: %s\n\n" % (
+          options.profile_file, str(ex)))
+      return 1
+
+  if options.watch:
+    outputs = []
+    if options.js_file:
+      outputs.append((options.js_file,
+                      lambda s: generate_js(s, profile=profile)))
+    if options.css_file:
+      outputs.append((options.css_file,
+                      lambda s: generate_css(s, profile=profile)))
+    watch.watch(_get_input_filenames(profile), srcdir, outputs,
+                poll_interval=options.poll_interval,
+                excluded_module_names=profile['excluded_modules'],
+                stubbed_module_names=profile['stubbed_modules'])
+    return 0
+
   if options.js_file:
     with _sopen(options.js_file, 'w') as f:
-      f.write(generate_js())
+      f.write(generate_js(profile=profile))
 
   if options.css_file:
     with _sopen(options.css_file, 'w') as f:
-      f.write(generate_css())
+      f.write(generate_css(profile=profile))
 
   return 0
 
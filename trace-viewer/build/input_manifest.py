@@ -0,0 +1,92 @@
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import hashlib
+import json
+import os
+
+"""
+Manifests of the files a generated file was made from.
+
+The generators write a manifest next to their outputs listing every input and
+output, relative to the source directory, along with a hash of its contents.
+If all of those hashes still match, the outputs are known to be up to date
+without regenerating them. A mismatch only means they might not be, since
+e.g. editing a comment in a module doesn't change deps.js.
+"""
+
+def hash_file(filename):
+  f = open(filename, 'rb')
+  try:
+    return hashlib.sha1(f.read()).hexdigest()
+  finally:
+    f.close()
+
+def _hash_files(filenames, base_dir):
+  hashes = {}
+  for filename in filenames:
+    rel_filename = os.path.relpath(os.path.join(base_dir, filename), base_dir)
+    hashes[rel_filename] = hash_file(os.path.join(base_dir, filename))
+  return hashes
+
+def write_manifest(manifest_filename, base_dir, input_filenames,
+                   output_filenames):
+  """Records the current contents of the inputs and outputs. Relative
+  filenames are taken to be relative to base_dir."""
+  manifest = {
+      'inputs': _hash_files(input_filenames, base_dir),
+      'outputs': _hash_files(output_filenames, base_dir)}
+  f = open(manifest_filename, 'w')
+  try:
+    f.write(json.dumps(manifest, indent=2, separators=(',', ': '),
+                       sort_keys=True))
+    f.write('\n')
+  finally:
+    f.close()
+
+def _read_manifest(manifest_filename):
+  try:
+    f = open(manifest_filename, 'r')
+  except IOError:
+    return None
+  try:
+    manifest = json.loads(f.read())
+  except ValueError:
+    return None
+  finally:
+    f.close()
+  if not isinstance(manifest, dict):
+    return None
+  if not isinstance(manifest.get('inputs'), dict):
+    return None
+  if not isinstance(manifest.get('outputs'), dict):
+    return None
+  return manifest
+
+def _hashes_match(hashes, base_dir):
+  for rel_filename, digest in hashes.iteritems():
+    try:
+      if hash_file(os.path.join(base_dir, rel_filename)) != digest:
+        return False
+    except IOError:
+      return False
+  return True
+
+def is_up_to_date(manifest_filename, base_dir, required_input_filenames=()):
+  """Returns True if none of the files in the manifest changed since it was
+  written, and every one of required_input_filenames is listed in it.
+
+  Inputs that would be found by scanning a directory, rather than by
+  following dependencies from files that are already listed, need to be
+  passed as required_input_filenames so that adding one is noticed.
+  """
+  manifest = _read_manifest(manifest_filename)
+  if manifest is None:
+    return False
+  inputs = manifest['inputs']
+  for filename in required_input_filenames:
+    rel_filename = os.path.relpath(os.path.join(base_dir, filename), base_dir)
+    if rel_filename not in inputs:
+      return False
+  return (_hashes_match(manifest['outputs'], base_dir) and
+          _hashes_match(inputs, base_dir))
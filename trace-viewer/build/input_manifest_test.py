@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import os
+import shutil
+import tempfile
+import unittest
+
+import input_manifest
+
+class InputManifestTest(unittest.TestCase):
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.manifest_filename = os.path.join(self.dir, 'out.manifest')
+    self.write('a.js', 'a')
+    self.write('b/c.js', 'c')
+    self.write('out.js', 'ac')
+
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+
+  def write(self, filename, contents):
+    filename = os.path.join(self.dir, filename)
+    if not os.path.exists(os.path.dirname(filename)):
+      os.makedirs(os.path.dirname(filename))
+    f = open(filename, 'w')
+    f.write(contents)
+    f.close()
+
+  def write_manifest(self):
+    input_manifest.write_manifest(self.manifest_filename, self.dir,
+                                  ['a.js', os.path.join(self.dir, 'b/c.js')],
+                                  ['out.js'])
+
+  def is_up_to_date(self, required_input_filenames=()):
+    return input_manifest.is_up_to_date(self.manifest_filename, self.dir,
+                                        required_input_filenames)
+
+  def test_missing_manifest(self):
+    self.assertFalse(self.is_up_to_date())
+    self.write('out.manifest', 'not json')
+    self.assertFalse(self.is_up_to_date())
+
+  def test_up_to_date(self):
+    self.write_manifest()
+    self.assertTrue(self.is_up_to_date(['a.js', 'b/c.js']))
+
+  def test_changed_input(self):
+    self.write_manifest()
+    self.write('b/c.js', 'd')
+    self.assertFalse(self.is_up_to_date())
+
+  def test_removed_input(self):
+    self.write_manifest()
+    os.remove(os.path.join(self.dir, 'a.js'))
+    self.assertFalse(self.is_up_to_date())
+
+  def test_changed_output(self):
+    self.write_manifest()
+    self.write('out.js', 'edited by hand')
+    self.assertFalse(self.is_up_to_date())
+
+  def test_new_required_input(self):
+    self.write_manifest()
+    self.write('d.js', 'd')
+    self.assertTrue(self.is_up_to_date())
+    self.assertFalse(self.is_up_to_date(['a.js', 'd.js']))
+
+if __name__ == "__main__":
+  unittest.main()
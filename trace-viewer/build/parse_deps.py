@@ -202,10 +202,20 @@ class Module(object):
       all_resources["style_sheets"] = {}
     if "raw_scripts" not in all_resources:
       all_resources["raw_scripts"] = {}
+    if "excluded_script_names" not in all_resources:
+      all_resources["excluded_script_names"] = set()
+    if "stubbed_script_names" not in all_resources:
+      all_resources["stubbed_script_names"] = set()
 
     assert self.filename
 
     for name in self.dependent_module_names:
+      if name in all_resources["stubbed_script_names"]:
+        continue
+      if name in all_resources["excluded_script_names"]:
+        raise DepsException("%s requires %s, which is excluded" %
+                            (self.name, name))
+
       if name in all_resources["scripts"]:
         assert all_resources["scripts"][name].contents
         self.dependent_modules.append(all_resources["scripts"][name])
@@ -307,7 +317,8 @@ class Module(object):
       rest = rest[m.end():]
 
 
-def calc_load_sequence(filenames, toplevel_dir):
+def calc_load_sequence(filenames, toplevel_dir, excluded_module_names=(),
+                       stubbed_module_names=()):
   """Given a list of starting javascript files, figure out all the Module
   objects that need to be loaded to satisfiy their dependencies.
 
@@ -318,11 +329,18 @@ def calc_load_sequence(filenames, toplevel_dir):
      base.require(module2);
      base.requireStylesheet(stylesheet);
 
+  Modules named in excluded_module_names must not be required by any of the
+  modules that are loaded; a DepsException is raised if one is. Modules named
+  in stubbed_module_names, and anything only they depend on, are left out even
+  though other modules require them.
+
   The output of this function is an array of Module objects ordered by
   dependency.
   """
   all_resources = {}
   all_resources["scripts"] = {}
+  all_resources["excluded_script_names"] = set(excluded_module_names)
+  all_resources["stubbed_script_names"] = set(stubbed_module_names)
   toplevel_modules = []
   root_dir = ''
   if filenames:
@@ -330,16 +348,9 @@ def calc_load_sequence(filenames, toplevel_dir):
   resource_finder = ResourceFinder(root_dir)
   for filename in filenames:
     if not os.path.exists(filename):
-      raise Exception("Could not find %s" % filename)
-
-    rel_filename = os.path.relpath(filename, toplevel_dir)
-    dirname = os.path.dirname(rel_filename)
-    modname  = os.path.splitext(os.path.basename(rel_filename))[0]
-    if len(dirname):
-      name = dirname.replace('/', '.') + '.' + modname
-    else:
-      name = modname
+      raise DepsException("Could not find %s" % filename)
 
+    name = calc_module_name(filename, toplevel_dir)
     if name in all_resources["scripts"]:
       continue
 
@@ -348,18 +359,34 @@ def calc_load_sequence(filenames, toplevel_dir):
     all_resources["scripts"][module.name] = module
     module.resolve(all_resources, resource_finder)
 
+  return sort_modules_into_load_sequence(all_resources["scripts"].values())
+
+def calc_module_name(filename, toplevel_dir):
+  """Returns the dotted module name for a javascript file under
+  toplevel_dir, e.g. tracks/track.js becomes tracks.track."""
+  rel_filename = os.path.relpath(filename, toplevel_dir)
+  dirname = os.path.dirname(rel_filename)
+  modname  = os.path.splitext(os.path.basename(rel_filename))[0]
+  if len(dirname):
+    return dirname.replace('/', '.') + '.' + modname
+  return modname
+
+def sort_modules_into_load_sequence(modules):
+  """Given a closed set of resolved Module objects, returns them ordered by
+  dependency, starting from the root modules in name order."""
   # Find the root modules: ones who have no dependencies.
   module_ref_counts = {}
-  for module in all_resources["scripts"].values():
+  for module in modules:
     module_ref_counts[module.name] = 0
 
   def inc_ref_count(name):
     module_ref_counts[name] = module_ref_counts[name] + 1
-  for module in all_resources["scripts"].values():
+  for module in modules:
     for dependent_module in module.dependent_modules:
       inc_ref_count(dependent_module.name)
 
-  root_modules = [all_resources["scripts"][name]
+  modules_by_name = dict((module.name, module) for module in modules)
+  root_modules = [modules_by_name[name]
                   for name, ref_count in module_ref_counts.items()
                   if ref_count == 0]
 
@@ -257,6 +257,33 @@ class CalcLoadSequenceTest(unittest.TestCase):
     name_sequence = [x.name for x in load_sequence]
     self.assertEquals(["unittest"], name_sequence)
 
+  def test_excluded_modules(self):
+    load_sequence = parse_deps.calc_load_sequence(
+      [os.path.join(srcdir, "unittest.js")], srcdir,
+      ["importer.v8_log_importer"])
+    self.assertEquals(["unittest"], [x.name for x in load_sequence])
+
+    # timeline_view still requires the excluded module.
+    self.assertRaises(parse_deps.DepsException,
+                      parse_deps.calc_load_sequence,
+                      [os.path.join(srcdir, "timeline_view.js")], srcdir,
+                      ["importer.v8_log_importer"])
+
+  def test_stubbed_modules(self):
+    load_sequence = parse_deps.calc_load_sequence(
+      [os.path.join(srcdir, "timeline_view.js")], srcdir,
+      stubbed_module_names=["importer.v8_log_importer"])
+    name_sequence = [x.name for x in load_sequence]
+    self.assertTrue("model" in name_sequence)
+    self.assertTrue("importer.trace_event_importer" in name_sequence)
+    self.assertFalse("importer.v8_log_importer" in name_sequence)
+    self.assertFalse("importer.v8.log_reader" in name_sequence)
+
+  def test_missing_toplevel(self):
+    self.assertRaises(parse_deps.DepsException,
+                      parse_deps.calc_load_sequence,
+                      [os.path.join(srcdir, "nonexistent.js")], srcdir)
+
   # Tests that we resolve deps between toplevels.
   def test_calc_load_sequence_two_toplevels(self):
     pass
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import gzip
+import httplib
+import json
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import run_dev_server
+
+from build import trace_filter
+
+class ParseByteRangeTest(unittest.TestCase):
+  def test_ranges(self):
+    parse = run_dev_server.parse_byte_range
+    self.assertEquals((0, 9), parse('bytes=0-9', 100))
+    self.assertEquals((10, 10), parse('bytes=10-10', 100))
+    self.assertEquals((10, 99), parse('bytes=10-', 100))
+    self.assertEquals((90, 99), parse('bytes=-10', 100))
+    self.assertEquals((0, 99), parse(' bytes = 0 - 99 ', 100))
+
+  def test_clamped_to_size(self):
+    parse = run_dev_server.parse_byte_range
+    self.assertEquals((50, 99), parse('bytes=50-1000', 100))
+    self.assertEquals((0, 99), parse('bytes=-1000', 100))
+
+  def test_ignored(self):
+    # Multiple ranges and malformed headers get the whole resource.
+    parse = run_dev_server.parse_byte_range
+    for header in ('bytes=0-1,5-6', 'bytes=-1,-2', 'items=0-9', 'bytes=5',
+                   'bytes=-', 'bytes=a-b', 'bytes=1-a', 'bytes=9-5', ''):
+      self.assertEquals(None, parse(header, 100), header)
+
+  def test_unsatisfiable(self):
+    parse = run_dev_server.parse_byte_range
+    for header, size in (('bytes=100-', 100), ('bytes=100-200', 100),
+                         ('bytes=-0', 100), ('bytes=0-', 0),
+                         ('bytes=-5', 0)):
+      self.assertRaises(run_dev_server.RangeNotSatisfiable,
+                        parse, header, size)
+
+class TempDirTestCase(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.stamp = 1000
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def write(self, name, contents):
+    filename = os.path.join(self.tmpdir, name)
+    with open(filename, 'w') as f:
+      f.write(contents)
+    # Force a distinct mtime so that fast consecutive writes are noticed.
+    self.stamp += 1
+    os.utime(filename, (self.stamp, self.stamp))
+    return filename
+
+class RecordingDepsWatcher(run_dev_server.DepsWatcher):
+  def __init__(self, src_dir):
+    run_dev_server.DepsWatcher.__init__(self, src_dir, 1)
+    self.num_regenerated = 0
+
+  def _regenerate(self):
+    self.num_regenerated += 1
+
+class DepsWatcherTest(TempDirTestCase):
+  def test_regenerates_only_when_directives_change(self):
+    self.write('a.js', "base.require('b');\nvar a = 1;\n")
+    self.write('b.js', "var b = 1;\n")
+    watcher = RecordingDepsWatcher(self.tmpdir)
+    watcher.check()
+    self.assertEquals(1, watcher.num_regenerated)
+    watcher.check()
+    self.assertEquals(1, watcher.num_regenerated)
+
+    # Editing the body of a module leaves deps.js as it is.
+    self.write('a.js', "base.require('b');\nvar a = 2;\n")
+    watcher.check()
+    self.assertEquals(1, watcher.num_regenerated)
+
+    self.write('a.js', "base.require('b');\nbase.require('c');\nvar a = 2;\n")
+    watcher.check()
+    self.assertEquals(2, watcher.num_regenerated)
+    self.write('a.js', "base.require('b');\nvar a = 2;\n")
+    watcher.check()
+    self.assertEquals(3, watcher.num_regenerated)
+
+    # Files that deps.js is generated from are ignored.
+    self.write('deps.js', "// Generated.\n")
+    watcher.check()
+    self.assertEquals(3, watcher.num_regenerated)
+
+    # Adding or removing a module changes deps.js.
+    self.write('c.js', "var c = 1;\n")
+    watcher.check()
+    self.assertEquals(4, watcher.num_regenerated)
+    os.remove(os.path.join(self.tmpdir, 'c.js'))
+    watcher.check()
+    self.assertEquals(5, watcher.num_regenerated)
+
+class QuietHandler(run_dev_server.Handler):
+  def log_message(self, format, *args):
+    pass
+
+class DevServerTest(TempDirTestCase):
+  def setUp(self):
+    TempDirTestCase.setUp(self)
+    old_cwd = os.getcwd()
+    os.chdir(self.tmpdir)
+    try:
+      self.server = run_dev_server.Server(('localhost', 0),
+                                          QuietHandler)
+    finally:
+      os.chdir(old_cwd)
+    self.thread = threading.Thread(target=self.server.serve_forever)
+    self.thread.start()
+
+  def tearDown(self):
+    self.server.shutdown()
+    self.thread.join()
+    self.server.server_close()
+    TempDirTestCase.tearDown(self)
+
+  def get(self, path, headers=None):
+    """Returns (status, headers, body) of a GET request."""
+    conn = httplib.HTTPConnection('localhost', self.server.server_address[1])
+    try:
+      conn.request('GET', path, headers=headers or {})
+      response = conn.getresponse()
+      return response.status, dict(response.getheaders()), response.read()
+    finally:
+      conn.close()
+
+  def test_gzip(self):
+    self.write('a.js', 'var a = 1;\n' * 100)
+    status, headers, body = self.get('/a.js')
+    self.assertEquals(200, status)
+    self.assertEquals('var a = 1;\n' * 100, body)
+    self.assertFalse('content-encoding' in headers)
+    self.assertEquals('Accept-Encoding', headers['vary'])
+    identity_etag = headers['etag']
+
+    status, headers, body = self.get('/a.js', {'Accept-Encoding': 'gzip'})
+    self.assertEquals(200, status)
+    self.assertEquals('gzip', headers['content-encoding'])
+    self.assertEquals('var a = 1;\n' * 100,
+                      gzip.GzipFile(fileobj=StringIO.StringIO(body)).read())
+    self.assertNotEquals(identity_etag, headers['etag'])
+
+    for accept_encoding in ('gzip;q=0', 'deflate', 'gzip; q=0.0, br'):
+      status, headers, _ = self.get('/a.js',
+                                    {'Accept-Encoding': accept_encoding})
+      self.assertEquals(200, status)
+      self.assertFalse('content-encoding' in headers, accept_encoding)
+      self.assertEquals(identity_etag, headers['etag'])
+
+    # Images and such are never gzipped.
+    self.write('a.png', 'PNG')
+    _, headers, _ = self.get('/a.png', {'Accept-Encoding': 'gzip'})
+    self.assertFalse('content-encoding' in headers)
+    self.assertFalse('vary' in headers)
+
+  def test_if_none_match(self):
+    self.write('a.js', 'var a = 1;\n')
+    _, headers, _ = self.get('/a.js')
+    identity_etag = headers['etag']
+    _, headers, _ = self.get('/a.js', {'Accept-Encoding': 'gzip'})
+    gzip_etag = headers['etag']
+    self.assertTrue(gzip_etag.endswith('-gzip"'))
+
+    # Either representation's etag means the client is up to date.
+    for etag in (identity_etag, gzip_etag, '"other", ' + gzip_etag, '*'):
+      status, headers, body = self.get('/a.js', {'If-None-Match': etag})
+      self.assertEquals(304, status, etag)
+      self.assertEquals('', body)
+    status, headers, _ = self.get('/a.js', {'If-None-Match': gzip_etag,
+                                            'Accept-Encoding': 'gzip'})
+    self.assertEquals(304, status)
+    self.assertEquals(gzip_etag, headers['etag'])
+
+    status, _, _ = self.get('/a.js', {'If-None-Match': '"other"'})
+    self.assertEquals(200, status)
+
+    # The etags change with the contents.
+    self.write('a.js', 'var a = 2;\n')
+    for etag in (identity_etag, gzip_etag):
+      status, _, body = self.get('/a.js', {'If-None-Match': etag})
+      self.assertEquals(200, status)
+      self.assertEquals('var a = 2;\n', body)
+
+  def test_if_modified_since(self):
+    self.write('a.js', 'var a = 1;\n')
+    status, headers, _ = self.get('/a.js')
+    last_modified = headers['last-modified']
+    status, _, _ = self.get('/a.js', {'If-Modified-Since': last_modified})
+    self.assertEquals(304, status)
+    status, _, _ = self.get('/a.js', {
+        'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+    self.assertEquals(200, status)
+    status, _, _ = self.get('/a.js', {'If-Modified-Since': 'garbage'})
+    self.assertEquals(200, status)
+
+    # If-None-Match takes precedence.
+    status, _, _ = self.get('/a.js', {'If-Modified-Since': last_modified,
+                                      'If-None-Match': '"other"'})
+    self.assertEquals(200, status)
+
+  def test_file_cache_invalidated_on_mtime_change(self):
+    cache = run_dev_server.FileCache()
+    filename = self.write('a.js', 'var a = 1;\n')
+    cached = cache.get(filename, os.stat(filename))
+    self.assertEquals('var a = 1;\n', cached.contents)
+    self.assertTrue(cached is cache.get(filename, os.stat(filename)))
+
+    # Same size, new mtime.
+    self.write('a.js', 'var a = 2;\n')
+    cached = cache.get(filename, os.stat(filename))
+    self.assertEquals('var a = 2;\n', cached.contents)
+
+    status, _, body = self.get('/a.js')
+    self.assertEquals('var a = 2;\n', body)
+    self.write('a.js', 'var a = 3;\n')
+    status, _, body = self.get('/a.js')
+    self.assertEquals('var a = 3;\n', body)
+
+  def test_filtered_trace_cache(self):
+    events = [{'ph': 'B', 'cat': 'c', 'name': 'a', 'pid': 1, 'tid': 1,
+               'ts': 0},
+              {'ph': 'E', 'pid': 1, 'tid': 1, 'ts': 1000}]
+    filename = self.write('t.json', trace_filter.to_json(events))
+    cache = run_dev_server.FilteredTraceCache()
+    query = trace_filter.TraceQuery()
+    cached = cache.get(filename, os.stat(filename), query)
+    self.assertEquals('application/json', cached.content_type)
+    self.assertEquals(events, json.loads(cached.contents))
+    self.assertTrue(cached is cache.get(filename, os.stat(filename), query))
+
+    self.write('t.json', trace_filter.to_json(events[:1]))
+    cached = cache.get(filename, os.stat(filename), query)
+    self.assertEquals(events[:1], json.loads(cached.contents))
+
+    status, headers, body = self.get('/filter_trace?trace=t.json')
+    self.assertEquals(200, status)
+    self.assertEquals('application/json', headers['content-type'])
+    status, _, _ = self.get('/filter_trace?trace=t.json',
+                            {'If-None-Match': headers['etag']})
+    self.assertEquals(304, status)
+    status, _, _ = self.get('/filter_trace?trace=t.json&pids=x')
+    self.assertEquals(400, status)
+
+if __name__ == "__main__":
+  unittest.main()
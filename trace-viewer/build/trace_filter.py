@@ -0,0 +1,540 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import bisect
+import csv
+import json
+import optparse
+import re
+import sys
+import urlparse
+
+"""
+Server side parsing and filtering of traces.
+
+load_trace() parses any of the formats the viewer imports as text, and the
+result's filter() method keeps only what matches a TraceQuery, so that the
+browser only has to parse what it is actually going to show. filter_trace()
+does both.
+
+Trace event JSON and v8.log files are turned into a list of trace events by
+load_events(), filtered by filter_events() and returned as compact trace event
+JSON. Linux perf/systrace output has no trace event equivalent for most kernel
+events, so its lines are filtered as they are and returned as linux perf text.
+
+Times in queries are in milliseconds from the start of the trace, as displayed
+by the viewer, which shifts the first event of a trace to time zero.
+"""
+
+class TraceFilterException(Exception):
+  pass
+
+def _parse_list(value, convert=str):
+  if not value:
+    return None
+  try:
+    return frozenset(convert(x.strip()) for x in value.split(',')
+                     if x.strip())
+  except ValueError:
+    raise TraceFilterException("Invalid list: %s" % value)
+
+def _parse_time(value):
+  if value is None or value == '':
+    return None
+  try:
+    return float(value)
+  except ValueError:
+    raise TraceFilterException("Invalid time: %s" % value)
+
+class TraceQuery(object):
+  """Which events of a trace to keep.
+
+  start and end bound the time window in milliseconds from the start of the
+  trace, categories and pids are sets of the categories and process ids to
+  keep. None means no limit.
+  The categories of a linux perf line are its event name, e.g. sched_switch
+  or tracing_mark_write.
+  """
+  def __init__(self, start=None, end=None, categories=None, pids=None):
+    self.start = start
+    self.end = end
+    self.categories = categories
+    self.pids = pids
+
+  @staticmethod
+  def from_query_string(query_string):
+    """Parses start=, end=, categories=a,b and pids=1,2 parameters."""
+    params = urlparse.parse_qs(query_string)
+    def get(name):
+      values = params.get(name)
+      return values[-1] if values else None
+    return TraceQuery(start=_parse_time(get('start')),
+                      end=_parse_time(get('end')),
+                      categories=_parse_list(get('categories')),
+                      pids=_parse_list(get('pids'), int))
+
+  def shifted(self, time_base):
+    """Returns this query with its window moved to a trace whose first
+    timestamp is time_base, in microseconds."""
+    def shift(value):
+      return None if value is None else value + time_base / 1000.0
+    return TraceQuery(start=shift(self.start), end=shift(self.end),
+                      categories=self.categories, pids=self.pids)
+
+  def key(self):
+    def sorted_or_none(values):
+      if values is None:
+        return None
+      return tuple(sorted(values))
+    return (self.start, self.end, sorted_or_none(self.categories),
+            sorted_or_none(self.pids))
+
+  def _start_us(self):
+    return None if self.start is None else self.start * 1000
+
+  def _end_us(self):
+    return None if self.end is None else self.end * 1000
+
+  def matches_pid(self, event):
+    return self.pids is None or event.get('pid') in self.pids
+
+  def matches_category(self, category):
+    return self.categories is None or category in self.categories
+
+  def matches_categories(self, event):
+    if self.categories is None:
+      return True
+    return bool(self.categories.intersection(event.get('cat', '').split(',')))
+
+  def overlaps(self, begin_ts, end_ts):
+    """Whether [begin_ts, end_ts], in microseconds, overlaps the window."""
+    start = self._start_us()
+    end = self._end_us()
+    if start is not None and end_ts < start:
+      return False
+    if end is not None and begin_ts > end:
+      return False
+    return True
+
+def filter_events(events, query):
+  """Returns the events that match query, in their original order.
+
+  Slices are kept or dropped as a whole: a B event is kept along with its
+  matching E event if the slice overlaps the window at all, and likewise for
+  an X event's duration and for all the events of an async slice or of a
+  flow, so the result imports without errors.
+  """
+  timestamps = [e['ts'] for e in events if e.get('ph') != 'M' and 'ts' in e]
+  if timestamps:
+    query = query.shifted(min(timestamps))
+  events = [e for e in events if query.matches_pid(e)]
+  keep = [False] * len(events)
+
+  # Open B events per thread, as indices into events. E events are matched up
+  # before looking at categories since they often don't repeat them.
+  open_slices = {}
+  # (cat, name, id) -> indices of the events of an async slice.
+  async_slices = {}
+  for i, event in enumerate(events):
+    ph = event.get('ph')
+    ts = event.get('ts', 0)
+    if ph == 'M':
+      keep[i] = True
+    elif ph == 'B':
+      open_slices.setdefault((event.get('pid'), event.get('tid')),
+                             []).append(i)
+    elif ph == 'E':
+      stack = open_slices.get((event.get('pid'), event.get('tid')))
+      if not stack:
+        continue
+      begin = stack.pop()
+      if (query.matches_categories(events[begin]) and
+          query.overlaps(events[begin].get('ts', 0), ts)):
+        keep[begin] = True
+        keep[i] = True
+    elif not query.matches_categories(event):
+      continue
+    elif ph in ('S', 'T', 'F'):
+      async_slices.setdefault(
+          ('async', event.get('cat'), event.get('name'), event.get('id')),
+          []).append(i)
+    elif ph in ('s', 't', 'f'):
+      async_slices.setdefault(
+          ('flow', event.get('cat'), event.get('name'), event.get('id')),
+          []).append(i)
+    elif ph == 'X':
+      keep[i] = query.overlaps(ts, ts + event.get('dur', 0))
+    else:
+      keep[i] = query.overlaps(ts, ts)
+
+  # Slices that never end run until the end of the trace.
+  for stack in open_slices.itervalues():
+    for begin in stack:
+      keep[begin] = (query.matches_categories(events[begin]) and
+                     query.overlaps(events[begin].get('ts', 0), float('inf')))
+
+  for indices in async_slices.itervalues():
+    timestamps = [events[i].get('ts', 0) for i in indices]
+    if query.overlaps(min(timestamps), max(timestamps)):
+      for i in indices:
+        keep[i] = True
+
+  # Only name the threads that still have events.
+  threads = set((e.get('pid'), e.get('tid'))
+                for e, kept in zip(events, keep) if kept and e.get('ph') != 'M')
+  return [event for event, kept in zip(events, keep)
+          if kept and (event.get('ph') != 'M' or
+                       (event.get('pid'), event.get('tid')) in threads)]
+
+def _load_trace_event_json(contents):
+  """Returns (events, container) where container holds any fields that were
+  next to a traceEvents array."""
+  try:
+    data = json.loads(contents)
+  except ValueError, ex:
+    raise TraceFilterException("Invalid trace event JSON: %s" % ex)
+  if isinstance(data, list):
+    return data, None
+  if isinstance(data, dict) and isinstance(data.get('traceEvents'), list):
+    container = dict(data)
+    del container['traceEvents']
+    return data['traceEvents'], container
+  raise TraceFilterException("JSON trace has no trace events")
+
+# See the line formats in src/importer/linux_perf_importer.js.
+_LINUX_PERF_LINE_RES = [
+    # 3.2 and later with the print-tgid option.
+    re.compile(r'^\s*(.+)-(\d+)\s+\(\s*(\d+|-+)\)\s\[(\d+)\]'
+               r'\s+[dX.][N.][Hhs.][0-9a-f.]'
+               r'\s+(\d+\.\d+):\s+(\S+):\s(.*)$'),
+    # 3.2 and later, with irq-info.
+    re.compile(r'^\s*(.+)-(\d+)\s+()\[(\d+)\]'
+               r'\s+[dX.][N.][Hhs.][0-9a-f.]'
+               r'\s+(\d+\.\d+):\s+(\S+):\s(.*)$'),
+    # Before 3.2.
+    re.compile(r'^\s*(.+)-(\d+)\s+()\[(\d+)\]\s*(\d+\.\d+):\s+(\S+):\s(.*)$'),
+]
+
+_ANDROID_EVENT_NAMES = frozenset(['0', 'tracing_mark_write'])
+
+def _is_linux_perf(contents):
+  if contents.startswith('# tracer:'):
+    return True
+  first_line = contents.split('\n', 1)[0]
+  return any(r.match(first_line) for r in _LINUX_PERF_LINE_RES)
+
+def _extract_systrace_html_lines(contents):
+  """Returns the linux perf lines embedded in a systrace html file, or None if
+  contents is not one."""
+  if not contents.startswith('<!DOCTYPE HTML>'):
+    return None
+  begin = contents.find('\n  var linuxPerfData = "\\\n')
+  if begin < 0:
+    return None
+  begin = contents.index('\n', begin + 1) + 1
+  end = contents.find('\n  </script>\n', begin)
+  if end < 0:
+    return None
+  lines = contents[begin:end].split('\n')
+  if not lines[-1].endswith('\\n";'):
+    return None
+  lines[-1] = lines[-1][:-len('\\n";')]
+  return [line[:-len('\\n\\')] if line.endswith('\\n\\') else line
+          for line in lines]
+
+def _linux_perf_records(lines):
+  """Returns a list with, for each line, the fields of the record on it or
+  None if it holds no record."""
+  records = []
+  line_re = None
+  for line in lines:
+    m = None
+    if line and not line.startswith('#'):
+      if line_re is None:
+        for r in _LINUX_PERF_LINE_RES:
+          if r.match(line):
+            line_re = r
+            break
+      if line_re is not None:
+        m = line_re.match(line)
+    records.append(m.groups() if m else None)
+  return records
+
+class LinuxPerfTrace(object):
+  """Linux perf text, filtered line by line.
+
+  Lines without a record, such as the header, are always kept. Userspace
+  trace_marker writes (as written by atrace) that begin and end a slice are
+  kept or dropped as a pair, like B and E events in filter_events(). Any other
+  record is kept if it is inside the time window.
+  """
+  content_type = 'text/plain'
+
+  def __init__(self, lines):
+    self._lines = lines
+    self._records = _linux_perf_records(lines)
+
+    # Processes are only known once a thread names its tgid, so find them all
+    # before filtering anything.
+    self._tgids = {}
+    self._time_base = None
+    for record in self._records:
+      if record is None:
+        continue
+      thread_name, pid, tgid, cpu, timestamp, event_name, details = record
+      # Clock sync markers don't show up in the viewer, and often have a
+      # timestamp of zero.
+      if not details.startswith('trace_event_clock_sync:'):
+        ts = float(timestamp) * 1000000
+        if self._time_base is None or ts < self._time_base:
+          self._time_base = ts
+      pid = int(pid)
+      if tgid and not tgid.startswith('-'):
+        self._tgids[pid] = int(tgid)
+      elif event_name in _ANDROID_EVENT_NAMES and details.startswith('B|'):
+        try:
+          self._tgids.setdefault(pid, int(details.split('|')[1]))
+        except ValueError:
+          pass
+
+  def filter(self, query):
+    if self._time_base is not None:
+      query = query.shifted(self._time_base)
+    keep = [record is None for record in self._records]
+    # Open slices per thread, as indices into self._lines.
+    open_slices = {}
+    for i, record in enumerate(self._records):
+      if record is None:
+        continue
+      thread_name, tid, tgid, cpu, timestamp, event_name, details = record
+      tid = int(tid)
+      if (query.pids is not None and
+          self._tgids.get(tid, tid) not in query.pids):
+        continue
+      ts = float(timestamp) * 1000000
+      if event_name in _ANDROID_EVENT_NAMES:
+        if details.startswith('B|'):
+          open_slices.setdefault(tid, []).append((i, ts))
+          continue
+        if details == 'E' or details.startswith('E|'):
+          stack = open_slices.get(tid)
+          if not stack:
+            continue
+          begin, begin_ts = stack.pop()
+          if (query.matches_category(event_name) and
+              query.overlaps(begin_ts, ts)):
+            keep[begin] = True
+            keep[i] = True
+          continue
+      if not query.matches_category(event_name):
+        continue
+      keep[i] = query.overlaps(ts, ts)
+
+    # Slices that never end run until the end of the trace.
+    for stack in open_slices.itervalues():
+      for begin, begin_ts in stack:
+        event_name = self._records[begin][5]
+        keep[begin] = (query.matches_category(event_name) and
+                       query.overlaps(begin_ts, float('inf')))
+
+    return ''.join('%s\n' % line
+                   for line, kept in zip(self._lines, keep) if kept)
+
+# Mirrors the constants in src/importer/v8_log_importer.js.
+_V8_PID = -32
+_V8_TIMER_TID = 1
+_V8_STACK_TID = 2
+_V8_SAMPLES_TID = 3
+_V8_STACK_FRAMES = 8
+_V8_TIMER_EVENT_ARGS = {
+    'V8.Execute': {'pause': False, 'no_execution': False},
+    'V8.External': {'pause': False, 'no_execution': True},
+    'V8.CompileFullCode': {'pause': True, 'no_execution': True},
+    'V8.RecompileSynchronous': {'pause': True, 'no_execution': True},
+    'V8.RecompileParallel': {'pause': False, 'no_execution': False},
+    'V8.CompileEval': {'pause': True, 'no_execution': True},
+    'V8.Parse': {'pause': True, 'no_execution': True},
+    'V8.PreParse': {'pause': True, 'no_execution': True},
+    'V8.ParseLazy': {'pause': True, 'no_execution': True},
+    'V8.GCScavenger': {'pause': True, 'no_execution': True},
+    'V8.GCContext': {'pause': True, 'no_execution': True},
+    'V8.GCCompactor': {'pause': True, 'no_execution': True},
+}
+_V8_LOG_PREFIXES = ('timer-event,', 'tick,', 'shared-library,', 'profiler,')
+
+class _CodeRanges(object):
+  """Named address ranges, looked up by any address inside them."""
+  def __init__(self):
+    self._starts = []
+    self._entries = {}
+
+  def add(self, start, size, name):
+    if start not in self._entries:
+      bisect.insort(self._starts, start)
+    self._entries[start] = (size, name)
+
+  def remove(self, start):
+    if start not in self._entries:
+      return
+    del self._entries[start]
+    del self._starts[bisect.bisect_left(self._starts, start)]
+
+  def move(self, start, new_start):
+    entry = self._entries.get(start)
+    if entry:
+      self.remove(start)
+      self.add(new_start, *entry)
+
+  def find(self, address):
+    i = bisect.bisect_right(self._starts, address) - 1
+    if i < 0:
+      return None
+    start = self._starts[i]
+    size, name = self._entries[start]
+    if address < start + size:
+      return name
+    return None
+
+def _load_v8_log(contents):
+  """Converts a v8.log to the trace events V8LogImporter would produce."""
+  libraries = _CodeRanges()
+  code = _CodeRanges()
+  def find_name(address):
+    return libraries.find(address) or code.find(address) or 'UnknownCode'
+
+  events = []
+  for name, tid in [('V8 Timers', _V8_TIMER_TID),
+                    ('V8 JavaScript', _V8_STACK_TID),
+                    ('V8 PC', _V8_SAMPLES_TID)]:
+    events.append({'ph': 'M', 'name': 'thread_name', 'pid': _V8_PID,
+                   'tid': tid, 'args': {'name': name}})
+
+  def add(ph, tid, name, ts, args=None):
+    event = {'ph': ph, 'cat': 'v8', 'name': name, 'pid': _V8_PID,
+             'tid': tid, 'ts': ts}
+    if args is not None:
+      event['args'] = args
+    events.append(event)
+
+  for fields in csv.reader(contents.splitlines()):
+    if not fields:
+      continue
+    try:
+      record = fields[0]
+      if record == 'timer-event':
+        args = _V8_TIMER_EVENT_ARGS.get(fields[1])
+        if args is not None:
+          start = int(fields[2])
+          add('B', _V8_TIMER_TID, fields[1], start, args)
+          add('E', _V8_TIMER_TID, fields[1], start + int(fields[3]))
+      elif record == 'timer-event-start':
+        args = _V8_TIMER_EVENT_ARGS.get(fields[1])
+        if args is not None:
+          add('B', _V8_TIMER_TID, fields[1], int(fields[2]), args)
+      elif record == 'timer-event-end':
+        if fields[1] in _V8_TIMER_EVENT_ARGS:
+          add('E', _V8_TIMER_TID, fields[1], int(fields[2]))
+      elif record == 'shared-library':
+        start = int(fields[2], 0)
+        libraries.add(start, int(fields[3], 0) - start, fields[1])
+      elif record == 'code-creation':
+        code.add(int(fields[3], 0), int(fields[4], 0), fields[5])
+      elif record == 'code-move':
+        code.move(int(fields[1], 0), int(fields[2], 0))
+      elif record == 'code-delete':
+        code.remove(int(fields[1], 0))
+      elif record == 'tick':
+        ts = int(fields[3])
+        add('P', _V8_SAMPLES_TID, find_name(int(fields[1], 0)), ts)
+        for frame in fields[7:7 + _V8_STACK_FRAMES]:
+          if not frame:
+            break
+          add('I', _V8_STACK_TID, find_name(int(frame, 0)), ts)
+    except (IndexError, ValueError):
+      raise TraceFilterException("Invalid v8.log line: %s" % ','.join(fields))
+  return events
+
+def load_events(contents):
+  """Returns (events, container) for a trace event JSON or v8.log trace.
+  container is None unless contents was a JSON object holding a traceEvents
+  array, in which case it holds the other fields."""
+  stripped = contents.lstrip()
+  if stripped.startswith('[') or stripped.startswith('{'):
+    return _load_trace_event_json(contents)
+  if contents.startswith(_V8_LOG_PREFIXES):
+    return _load_v8_log(contents), None
+  raise TraceFilterException("Unrecognized trace format")
+
+def to_json(events, container=None):
+  """Serializes events as compact trace event JSON."""
+  if container:
+    data = dict(container)
+    data['traceEvents'] = events
+  else:
+    data = events
+  return json.dumps(data, separators=(',', ':'))
+
+class TraceEvents(object):
+  """Trace events, filtered by filter_events()."""
+  content_type = 'application/json'
+
+  def __init__(self, events, container=None):
+    self.events = events
+    self.container = container
+
+  def filter(self, query):
+    return to_json(filter_events(self.events, query), self.container)
+
+def load_trace(contents):
+  """Returns a LinuxPerfTrace or TraceEvents for a trace in any of the text
+  formats the viewer can import."""
+  lines = _extract_systrace_html_lines(contents)
+  if lines is None and _is_linux_perf(contents):
+    lines = contents.splitlines()
+  if lines is not None:
+    return LinuxPerfTrace(lines)
+  return TraceEvents(*load_events(contents))
+
+def filter_trace(contents, query):
+  return load_trace(contents).filter(query)
+
+def main(args):
+  parser = optparse.OptionParser(
+    usage="%prog [options] trace > filtered.json",
+    epilog="""
+Converts a trace to compact trace event JSON, keeping only the events that
+match the given options. Linux perf and systrace traces are written out as
+linux perf text instead.
+""")
+  parser.add_option("--start", dest="start", type="float",
+                    help="Drop events that end before this time, in ms "
+                         "from the start of the trace")
+  parser.add_option("--end", dest="end", type="float",
+                    help="Drop events that start after this time, in ms "
+                         "from the start of the trace")
+  parser.add_option("--categories", dest="categories",
+                    help="Comma separated list of categories to keep")
+  parser.add_option("--pids", dest="pids",
+                    help="Comma separated list of process ids to keep")
+  options, args = parser.parse_args(args)
+  if len(args) != 1:
+    parser.error("Expected one trace file")
+
+  try:
+    query = TraceQuery(start=options.start, end=options.end,
+                       categories=_parse_list(options.categories),
+                       pids=_parse_list(options.pids, int))
+    f = open(args[0], 'r')
+    try:
+      contents = f.read()
+    finally:
+      f.close()
+    sys.stdout.write(filter_trace(contents, query))
+  except TraceFilterException, ex:
+    sys.stderr.write("Error: %s\n" % ex)
+    return 1
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
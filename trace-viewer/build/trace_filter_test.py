@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import json
+import os
+import unittest
+
+import trace_filter
+
+test_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                             "../test_data"))
+
+def _read_test_data(filename):
+  f = open(os.path.join(test_data_dir, filename), 'r')
+  try:
+    return f.read()
+  finally:
+    f.close()
+
+def _slice(pid, tid, name, begin, end, cat='cat'):
+  return [{'ph': 'B', 'cat': cat, 'name': name, 'pid': pid, 'tid': tid,
+           'ts': begin},
+          {'ph': 'E', 'pid': pid, 'tid': tid, 'ts': end}]
+
+class TraceQueryTest(unittest.TestCase):
+  def test_from_query_string(self):
+    query = trace_filter.TraceQuery.from_query_string(
+        'trace=x.json&start=1.5&end=&categories=a,b&pids=3')
+    self.assertEquals(1.5, query.start)
+    self.assertEquals(None, query.end)
+    self.assertEquals(frozenset(['a', 'b']), query.categories)
+    self.assertEquals(frozenset([3]), query.pids)
+    self.assertEquals(query.key(), trace_filter.TraceQuery.from_query_string(
+        'categories=b,a&pids=3&start=1.5').key())
+    self.assertRaises(trace_filter.TraceFilterException,
+                      trace_filter.TraceQuery.from_query_string, 'pids=x')
+
+class FilterEventsTest(unittest.TestCase):
+  def test_keeps_whole_slices(self):
+    events = (_slice(1, 1, 'before', 0, 1000) +
+              _slice(1, 1, 'overlapping', 1500, 2500) +
+              _slice(1, 1, 'after', 3000, 4000))
+    query = trace_filter.TraceQuery(start=2, end=2.9)
+    self.assertEquals(events[2:4], trace_filter.filter_events(events, query))
+
+  def test_times_start_at_first_event(self):
+    events = (_slice(1, 1, 'first', 7000000, 7001000) +
+              _slice(1, 1, 'second', 7002000, 7003000))
+    query = trace_filter.TraceQuery(start=1.5, end=2.5)
+    self.assertEquals(events[2:], trace_filter.filter_events(events, query))
+
+  def test_nested_and_unclosed_slices(self):
+    outer = _slice(1, 1, 'outer', 0, 5000)
+    inner = _slice(1, 1, 'inner', 100, 200)
+    unclosed = _slice(1, 2, 'unclosed', 4000, None)[:1]
+    events = outer[:1] + inner + outer[1:] + unclosed
+    query = trace_filter.TraceQuery(start=3, end=6)
+    self.assertEquals(outer + unclosed,
+                      trace_filter.filter_events(events, query))
+
+  def test_categories_and_pids(self):
+    thread_name = {'ph': 'M', 'name': 'thread_name', 'pid': 2, 'tid': 2,
+                   'args': {'name': 'unused'}}
+    a = _slice(1, 1, 'a', 0, 10, cat='x,y')
+    b = _slice(1, 1, 'b', 20, 30, cat='z')
+    c = _slice(2, 2, 'c', 0, 10, cat='y')
+    events = [thread_name] + a + b + c
+    self.assertEquals(a, trace_filter.filter_events(
+        events, trace_filter.TraceQuery(categories=frozenset(['y']),
+                                        pids=frozenset([1]))))
+    self.assertEquals([thread_name] + c, trace_filter.filter_events(
+        events, trace_filter.TraceQuery(pids=frozenset([2]))))
+
+  def test_async_slices(self):
+    events = [
+        {'ph': 'S', 'cat': 'c', 'name': 'a', 'id': 1, 'pid': 1, 'tid': 1,
+         'ts': 0},
+        {'ph': 'F', 'cat': 'c', 'name': 'a', 'id': 1, 'pid': 1, 'tid': 1,
+         'ts': 5000},
+        {'ph': 'S', 'cat': 'c', 'name': 'a', 'id': 2, 'pid': 1, 'tid': 1,
+         'ts': 0},
+        {'ph': 'F', 'cat': 'c', 'name': 'a', 'id': 2, 'pid': 1, 'tid': 1,
+         'ts': 1000}]
+    self.assertEquals(events[:2], trace_filter.filter_events(
+        events, trace_filter.TraceQuery(start=2, end=3)))
+
+  def test_complete_events(self):
+    events = [
+        {'ph': 'X', 'cat': 'c', 'name': 'long', 'pid': 1, 'tid': 1, 'ts': 0,
+         'dur': 5000},
+        {'ph': 'X', 'cat': 'c', 'name': 'short', 'pid': 1, 'tid': 1, 'ts': 0,
+         'dur': 1000}]
+    self.assertEquals(events[:1], trace_filter.filter_events(
+        events, trace_filter.TraceQuery(start=2, end=3)))
+
+  def test_flow_events(self):
+    events = [
+        {'ph': 's', 'cat': 'c', 'name': 'a', 'id': 1, 'pid': 1, 'tid': 1,
+         'ts': 0},
+        {'ph': 't', 'cat': 'c', 'name': 'a', 'id': 1, 'pid': 1, 'tid': 2,
+         'ts': 2500},
+        {'ph': 'f', 'cat': 'c', 'name': 'a', 'id': 1, 'pid': 1, 'tid': 3,
+         'ts': 5000},
+        {'ph': 's', 'cat': 'c', 'name': 'a', 'id': 2, 'pid': 1, 'tid': 1,
+         'ts': 0},
+        {'ph': 'f', 'cat': 'c', 'name': 'a', 'id': 2, 'pid': 1, 'tid': 3,
+         'ts': 1000}]
+    self.assertEquals(events[:3], trace_filter.filter_events(
+        events, trace_filter.TraceQuery(start=4, end=6)))
+
+class LoadEventsTest(unittest.TestCase):
+  def test_trace_event_json(self):
+    contents = _read_test_data('simple_trace.json')
+    events, container = trace_filter.load_events(contents)
+    self.assertEquals(json.loads(contents), events)
+    self.assertEquals(None, container)
+
+    events, container = trace_filter.load_events(json.dumps(
+        {'traceEvents': events, 'systemTraceEvents': ''}))
+    self.assertEquals({'systemTraceEvents': ''}, container)
+    result = json.loads(trace_filter.to_json(events, container))
+    self.assertEquals(events, result['traceEvents'])
+
+  def test_v8_log(self):
+    events, _ = trace_filter.load_events(_read_test_data('v8.log'))
+    timers = [e for e in events if e.get('tid') == 1 and e['ph'] != 'M']
+    self.assertEquals(('B', 'V8.GCCompactor', 1936),
+                      (timers[0]['ph'], timers[0]['name'], timers[0]['ts']))
+    self.assertEquals(('E', 3220), (timers[1]['ph'], timers[1]['ts']))
+    samples = [e for e in events if e['ph'] == 'P']
+    self.assertTrue(samples)
+    self.assertTrue([e for e in samples if e['name'] != 'UnknownCode'])
+
+  def test_unrecognized(self):
+    self.assertRaises(trace_filter.TraceFilterException,
+                      trace_filter.load_events, 'hello')
+    self.assertRaises(trace_filter.TraceFilterException,
+                      trace_filter.load_trace, 'hello')
+
+class LinuxPerfTraceTest(unittest.TestCase):
+  lines = [
+      '# tracer: nop',
+      '#',
+      '     surfaceflinger-129   [001] ...1  50.001000: 0: B|129|draw|n=1',
+      '     surfaceflinger-129   [001] d..3  50.002000: sched_switch: '
+      'prev_comm=surfaceflinger',
+      '     surfaceflinger-129   [001] ...1  50.005000: 0: E',
+      '           <idle>-0     [000] d..2  50.006000: cpu_frequency: '
+      'state=1000 cpu_id=0',
+      '     surfaceflinger-130   [001] ...1  50.007000: 0: C|129|fps|60',
+      '        system_server-400 [002] ...1  50.008000: 0: B|400|unclosed',
+  ]
+
+  def _filter(self, query):
+    return trace_filter.filter_trace('\n'.join(self.lines), query)
+
+  def test_filters_lines(self):
+    trace = trace_filter.load_trace('\n'.join(self.lines))
+    self.assertEquals('text/plain', trace.content_type)
+    self.assertEquals('\n'.join(self.lines) + '\n',
+                      trace.filter(trace_filter.TraceQuery()))
+
+    # The draw slice is kept whole, and the unclosed slice never ends.
+    self.assertEquals(
+        '\n'.join(self.lines[:3] + self.lines[4:6]) + '\n',
+        self._filter(trace_filter.TraceQuery(start=2, end=5.5)))
+    self.assertEquals(
+        '\n'.join(self.lines[:2] + self.lines[7:]) + '\n',
+        self._filter(trace_filter.TraceQuery(start=8)))
+
+  def test_pids_and_event_names(self):
+    self.assertEquals(
+        '\n'.join(self.lines[:5]) + '\n',
+        self._filter(trace_filter.TraceQuery(pids=frozenset([129]))))
+    self.assertEquals(
+        '\n'.join(self.lines[:2] + self.lines[3:4] + self.lines[5:6]) + '\n',
+        self._filter(trace_filter.TraceQuery(
+            categories=frozenset(['sched_switch', 'cpu_frequency']))))
+
+  def test_systrace_html(self):
+    contents = _read_test_data('android_systrace.html')
+    trace = trace_filter.load_trace(contents)
+    self.assertTrue(isinstance(trace, trace_filter.LinuxPerfTrace))
+    all_lines = trace.filter(trace_filter.TraceQuery()).splitlines()
+    self.assertTrue(all_lines[0].startswith('# tracer:'))
+    self.assertTrue([l for l in all_lines if 'sched_switch' in l])
+
+    lines = trace.filter(trace_filter.TraceQuery(
+        start=1950, end=2050)).splitlines()
+    self.assertTrue(0 < len(lines) < len(all_lines))
+    num_begins = len([l for l in lines if ': B|' in l])
+    num_ends = len([l for l in lines if l.endswith(': E')])
+    self.assertTrue(num_begins > 10)
+    self.assertEquals(num_begins, num_ends)
+
+  def test_systrace_html_times_start_at_zero(self):
+    # The trace starts at 50260.647576s, ignoring its clock sync marker, and
+    # the viewer shows that as 0ms.
+    trace = trace_filter.load_trace(_read_test_data('android_systrace.html'))
+    lines = trace.filter(trace_filter.TraceQuery(start=0, end=1)).splitlines()
+    self.assertTrue(lines[4].startswith('          atrace-14662 [000] '
+                                        '50260.647576: sched_switch:'))
+    timestamps = [float(l.split(': ')[0].split()[-1])
+                  for l in lines[4:] if 'trace_event_clock_sync' not in l]
+    self.assertTrue(timestamps)
+    self.assertTrue(max(timestamps) <= 50260.648576)
+
+if __name__ == "__main__":
+  unittest.main()
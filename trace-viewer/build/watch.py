@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import os
+import sys
+import time
+
+import parse_deps
+
+try:
+  import pyinotify
+except ImportError:
+  pyinotify = None
+
+"""
+Support for keeping flattened outputs up to date while src/ is being edited.
+
+IncrementalLoadSequence remembers every module and stylesheet it has parsed,
+keyed by filename and stamped with the file's mtime and size. Each call to
+update() re-reads and re-parses only the files whose stamp changed, rewires the
+dependency graph from the cached Module objects and reports whether the load
+sequence or the contents of anything in it changed. watch() uses this to
+re-emit the flattened files only when they would actually differ.
+
+The per-module chunks of a flattened file are the cached Module and StyleSheet
+contents themselves, so regenerating an output only joins strings that are
+already in memory. That join is far cheaper than the stat() sweep in update(),
+so the generated outputs are not cached piece by piece on top of that.
+"""
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+def _stamp(filename):
+  st = os.stat(filename)
+  return (st.st_mtime, st.st_size)
+
+class IncrementalLoadSequence(object):
+  def __init__(self, filenames, toplevel_dir, excluded_module_names=(),
+               stubbed_module_names=()):
+    self._filenames = filenames
+    self._toplevel_dir = toplevel_dir
+    self._excluded_module_names = set(excluded_module_names)
+    self._stubbed_module_names = set(stubbed_module_names)
+    self._root_dir = ''
+    if filenames:
+      self._root_dir = os.path.abspath(os.path.dirname(filenames[0]))
+
+    # filename -> (stamp, Module/StyleSheet/RawScript)
+    self._modules = {}
+    self._style_sheets = {}
+    self._raw_scripts = {}
+
+    self._num_reparsed = 0
+    self._last_signature = None
+    self.load_sequence = None
+
+  @property
+  def num_reparsed(self):
+    """How many files the last update() had to read and parse."""
+    return self._num_reparsed
+
+  def update(self):
+    """Brings the load sequence up to date with the files on disk.
+
+    Returns True if the load sequence or the contents of any module or
+    stylesheet in it changed since the previous call.
+    """
+    self._num_reparsed = 0
+    self._visited = set()
+    scripts = {}
+    for filename in self._filenames:
+      if not os.path.exists(filename):
+        raise parse_deps.DepsException("Could not find %s" % filename)
+      name = parse_deps.calc_module_name(filename, self._toplevel_dir)
+      if name in scripts:
+        continue
+      self._visit_module(name, filename, scripts, decl_required=False)
+
+    # Forget files that are no longer part of the graph.
+    for cache in [self._modules, self._style_sheets, self._raw_scripts]:
+      for filename in cache.keys():
+        if filename not in self._visited:
+          del cache[filename]
+
+    self.load_sequence = parse_deps.sort_modules_into_load_sequence(
+        scripts.values())
+
+    signature = []
+    for module in self.load_sequence:
+      signature.append((module.name, self._modules[module.filename][0]))
+      for style_sheet in module.style_sheets:
+        signature.append((style_sheet.name,
+                          self._style_sheets[style_sheet.filename][0]))
+    signature = tuple(signature)
+    changed = signature != self._last_signature
+    self._last_signature = signature
+    return changed
+
+  def _lookup(self, cache, filename, load):
+    self._visited.add(filename)
+    stamp = _stamp(filename)
+    cached = cache.get(filename)
+    if cached and cached[0] == stamp:
+      return cached[1]
+    resource = load()
+    self._num_reparsed += 1
+    cache[filename] = (stamp, resource)
+    return resource
+
+  def _visit_module(self, name, filename, scripts, decl_required=True):
+    def load():
+      module = parse_deps.Module(name)
+      module.load_and_parse(filename, decl_required=decl_required)
+      return module
+    module = self._lookup(self._modules, filename, load)
+    scripts[name] = module
+
+    module.dependent_modules = []
+    for dependent_name in module.dependent_module_names:
+      if dependent_name in self._stubbed_module_names:
+        continue
+      if dependent_name in self._excluded_module_names:
+        raise parse_deps.DepsException(
+            "%s requires %s, which is excluded" % (name, dependent_name))
+      if dependent_name not in scripts:
+        dependent_filename = os.path.join(
+            self._root_dir, dependent_name.replace(".", os.sep) + ".js")
+        if not os.path.exists(dependent_filename):
+          raise parse_deps.DepsException(
+              "Could not find a file for module %s" % dependent_name)
+        self._visit_module(dependent_name, dependent_filename, scripts)
+      module.dependent_modules.append(scripts[dependent_name])
+
+    module.dependent_raw_scripts = []
+    for raw_script_name in module.dependent_raw_script_names:
+      raw_script_filename = os.path.join(self._root_dir, raw_script_name)
+      if not os.path.exists(raw_script_filename):
+        raise parse_deps.DepsException(
+            "Could not find a file for module %s" % raw_script_name)
+      module.dependent_raw_scripts.append(self._lookup(
+          self._raw_scripts, raw_script_filename,
+          lambda: parse_deps.RawScript(raw_script_name, raw_script_filename,
+                                       _read(raw_script_filename))))
+
+    module.style_sheets = []
+    for style_sheet_name in module.style_sheet_names:
+      style_sheet_filename = os.path.join(
+          self._root_dir, style_sheet_name.replace(".", os.sep) + ".css")
+      if not os.path.exists(style_sheet_filename):
+        raise parse_deps.DepsException(
+            "Could not find a file for stylesheet %s" % style_sheet_name)
+      module.style_sheets.append(self._lookup(
+          self._style_sheets, style_sheet_filename,
+          lambda: parse_deps.StyleSheet(style_sheet_name,
+                                        style_sheet_filename,
+                                        _read(style_sheet_filename))))
+
+def _read(filename):
+  f = open(filename, 'r')
+  contents = f.read()
+  f.close()
+  return contents
+
+def _write_output(filename, contents):
+  if filename == '-':
+    sys.stdout.write(contents)
+    sys.stdout.flush()
+    return
+  f = open(filename, 'w')
+  f.write(contents)
+  f.close()
+
+class _PollingWaiter(object):
+  def __init__(self, poll_interval):
+    self._poll_interval = poll_interval
+
+  def wait(self):
+    time.sleep(self._poll_interval)
+
+class _InotifyWaiter(object):
+  def __init__(self, toplevel_dir):
+    mask = (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_CREATE |
+            pyinotify.IN_DELETE | pyinotify.IN_MOVED_TO |
+            pyinotify.IN_MOVED_FROM)
+    self._watch_manager = pyinotify.WatchManager()
+    self._notifier = pyinotify.Notifier(self._watch_manager)
+    self._watch_manager.add_watch(toplevel_dir, mask, rec=True, auto_add=True)
+
+  def wait(self):
+    # Block until something happens, then drain the queue: we only use the
+    # events as a wakeup, the stamps decide what actually needs reparsing.
+    self._notifier.check_events(timeout=None)
+    self._notifier.read_events()
+    while self._notifier.check_events(timeout=0):
+      self._notifier.read_events()
+
+def make_waiter(toplevel_dir, poll_interval):
+  if pyinotify:
+    try:
+      return _InotifyWaiter(toplevel_dir)
+    except Exception, ex:
+      sys.stderr.write("inotify unavailable (%s), polling instead\n" % ex)
+  return _PollingWaiter(poll_interval)
+
+def watch(filenames, toplevel_dir, outputs,
+          poll_interval=DEFAULT_POLL_INTERVAL, excluded_module_names=(),
+          stubbed_module_names=()):
+  """Regenerates outputs whenever the modules reachable from filenames change.
+
+  outputs is a list of (output_filename, generator) pairs, where generator
+  takes a load sequence and returns the text to write. Never returns.
+  """
+  load_sequence = IncrementalLoadSequence(filenames, toplevel_dir,
+                                          excluded_module_names,
+                                          stubbed_module_names)
+  waiter = make_waiter(toplevel_dir, poll_interval)
+  last_contents = {}
+  while True:
+    try:
+      changed = load_sequence.update()
+    except parse_deps.DepsException, ex:
+      sys.stderr.write("Error: %s\n\n" % str(ex))
+      changed = False
+
+    if changed:
+      for output_filename, generator in outputs:
+        contents = generator(load_sequence.load_sequence)
+        if last_contents.get(output_filename) == contents:
+          continue
+        _write_output(output_filename, contents)
+        last_contents[output_filename] = contents
+        sys.stderr.write("Regenerated %s (%i files reparsed)\n" % (
+            output_filename, load_sequence.num_reparsed))
+
+    waiter.wait()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+import os
+import shutil
+import tempfile
+import unittest
+
+import parse_deps
+import watch
+
+srcdir = os.path.join(os.path.dirname(__file__), "../src")
+
+class IncrementalLoadSequenceTest(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.stamp = 1000
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def write(self, name, contents):
+    filename = os.path.join(self.tmpdir, name)
+    if not os.path.exists(os.path.dirname(filename)):
+      os.makedirs(os.path.dirname(filename))
+    with open(filename, 'w') as f:
+      f.write(contents)
+    # Force a distinct mtime so that fast consecutive writes are noticed.
+    self.stamp += 1
+    os.utime(filename, (self.stamp, self.stamp))
+    return filename
+
+  def test_matches_calc_load_sequence(self):
+    filenames = [os.path.join(srcdir, f)
+                 for f in ['base.js', 'timeline_view.js']]
+    incremental = watch.IncrementalLoadSequence(filenames, srcdir)
+    self.assertTrue(incremental.update())
+    expected = parse_deps.calc_load_sequence(filenames, srcdir)
+    self.assertEquals([m.name for m in expected],
+                      [m.name for m in incremental.load_sequence])
+
+  def test_only_changed_files_are_reparsed(self):
+    x = self.write('x.js', "base.require('y');\nbase.require('z');\n")
+    self.write('y.js', "base.require('z');\nbase.requireStylesheet('y');\n")
+    self.write('y.css', ".y {}\n")
+    self.write('z.js', "// z\n")
+
+    incremental = watch.IncrementalLoadSequence([x], self.tmpdir)
+    self.assertTrue(incremental.update())
+    self.assertEquals(4, incremental.num_reparsed)
+    self.assertEquals(['z', 'y', 'x'],
+                      [m.name for m in incremental.load_sequence])
+
+    self.assertFalse(incremental.update())
+    self.assertEquals(0, incremental.num_reparsed)
+
+    self.write('z.js', "// z, edited\n")
+    self.assertTrue(incremental.update())
+    self.assertEquals(1, incremental.num_reparsed)
+    self.assertEquals("// z, edited\n",
+                      incremental.load_sequence[0].contents)
+
+    self.write('y.css', ".y { color: red; }\n")
+    self.assertTrue(incremental.update())
+    self.assertEquals(1, incremental.num_reparsed)
+    self.assertEquals(".y { color: red; }\n",
+                      incremental.load_sequence[1].style_sheets[0].contents)
+
+  def test_new_dependency_is_picked_up(self):
+    x = self.write('x.js', "base.require('y');\n")
+    self.write('y.js', "// y\n")
+    self.write('sub/w.js', "// w\n")
+
+    incremental = watch.IncrementalLoadSequence([x], self.tmpdir)
+    incremental.update()
+    self.assertEquals(['y', 'x'], [m.name for m in incremental.load_sequence])
+
+    self.write('x.js', "base.require('sub.w');\nbase.require('y');\n")
+    self.assertTrue(incremental.update())
+    self.assertEquals(2, incremental.num_reparsed)
+    self.assertEquals(['sub.w', 'y', 'x'],
+                      [m.name for m in incremental.load_sequence])
+
+  def test_missing_dependency(self):
+    x = self.write('x.js', "base.require('nonexistent');\n")
+    incremental = watch.IncrementalLoadSequence([x], self.tmpdir)
+    self.assertRaises(parse_deps.DepsException, incremental.update)
+
+  def test_missing_toplevel(self):
+    x = self.write('x.js', "// x\n")
+    incremental = watch.IncrementalLoadSequence([x], self.tmpdir)
+    self.assertTrue(incremental.update())
+
+    # Deleting or renaming the file is reported, and recovered from once the
+    # file is back.
+    os.rename(x, x + '.bak')
+    self.assertRaises(parse_deps.DepsException, incremental.update)
+    os.rename(x + '.bak', x)
+    incremental.update()
+    self.assertEquals(['x'], [m.name for m in incremental.load_sequence])
+
+  def test_excluded_and_stubbed_modules(self):
+    x = self.write('x.js', "base.require('y');\n")
+    self.write('y.js', "base.require('z');\n")
+    self.write('z.js', "// z\n")
+
+    incremental = watch.IncrementalLoadSequence([x], self.tmpdir,
+                                                stubbed_module_names=['y'])
+    incremental.update()
+    self.assertEquals(['x'], [m.name for m in incremental.load_sequence])
+
+    incremental = watch.IncrementalLoadSequence([x], self.tmpdir,
+                                                excluded_module_names=['z'])
+    self.assertRaises(parse_deps.DepsException, incremental.update)
+
+if __name__ == "__main__":
+  unittest.main()
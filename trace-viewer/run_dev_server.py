@@ -2,33 +2,527 @@
 # Copyright (c) 2012 The Chromium Authors. All rights reserved.
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
+import collections
+import email.utils
+import gzip
+import hashlib
+import mmap
 import optparse
 import os
+import posixpath
+import StringIO
 import sys
+import threading
 import time
+import urllib
+import urlparse
 
 import SimpleHTTPServer
+import SocketServer
 import BaseHTTPServer
 
+try:
+  from sendfile import sendfile
+except ImportError:
+  sendfile = None
+
 from build import calcdeps
+from build import parse_deps
+from build import trace_filter
+from build import watch
 
 DEFAULT_PORT = 8003
-DEPS_CHECK_DELAY = 5
+DEPS_CHECK_DELAY = 1
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'))
+
+# Files that are written by calcdeps rather than read by it.
+GENERATED_FILES = ['about_tracing.html', 'about_tracing.js', 'deps.js']
+
+# Files larger than this are streamed from disk rather than cached in memory.
+MAX_CACHED_FILE_SIZE = 16 * 1024 * 1024
+SEND_CHUNK_SIZE = 4 * 1024 * 1024
+
+# /filter_trace?trace=test_data/foo.json&start=..&end=..&categories=..&pids=..
+# serves the trace pre-parsed and filtered on the server. See
+# build/trace_filter.py for the query parameters.
+FILTER_TRACE_PATH = '/filter_trace'
+MAX_FILTERED_TRACES = 16
+
+GZIP_CONTENT_TYPES = ['application/javascript', 'application/json',
+                      'application/x-javascript', 'text/css', 'text/html',
+                      'text/javascript', 'text/plain']
+
+class CachedFile(object):
+  """The contents of a file as of a given mtime, plus derived data.
+
+  content_type is None for files served with the type their name implies.
+  """
+  def __init__(self, mtime, contents, content_type=None):
+    self.mtime = mtime
+    self.contents = contents
+    self.content_type = content_type
+    digest = hashlib.sha1(contents).hexdigest()
+    self.etag = '"%s"' % digest
+    # The gzipped body is a different representation, so caches must not
+    # mix it up with the identity one.
+    self.gzip_etag = '"%s-gzip"' % digest
+    self._gzipped_contents = None
+
+  @property
+  def gzipped_contents(self):
+    if self._gzipped_contents is None:
+      out = StringIO.StringIO()
+      f = gzip.GzipFile(fileobj=out, mode='wb', mtime=0)
+      f.write(self.contents)
+      f.close()
+      self._gzipped_contents = out.getvalue()
+    return self._gzipped_contents
+
+class FileCache(object):
+  """Thread safe cache of file contents, invalidated when the mtime changes."""
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._files = {}
+
+  def get(self, path, st):
+    with self._lock:
+      cached = self._files.get(path)
+    if cached and cached.mtime == st.st_mtime and (
+        len(cached.contents) == st.st_size):
+      return cached
+
+    with open(path, 'rb') as f:
+      cached = CachedFile(st.st_mtime, f.read())
+    with self._lock:
+      self._files[path] = cached
+    return cached
+
+class FilteredTraceCache(object):
+  """Thread safe cache of filtered traces, keyed by trace file and query.
+
+  The most recently parsed trace is kept as well, so trying
+  out different queries on one trace only parses it once.
+  """
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._results = collections.OrderedDict()
+    self._parsed = None
+
+  def get(self, path, st, query):
+    stamp = (st.st_mtime, st.st_size)
+    key = (path, query.key())
+    with self._lock:
+      cached = self._results.get(key)
+      if cached and cached[0] == stamp:
+        del self._results[key]
+        self._results[key] = cached
+        return cached[1]
+      parsed = self._parsed
+
+    if parsed and parsed[:2] == (path, stamp):
+      trace = parsed[2]
+    else:
+      with open(path, 'rb') as f:
+        trace = trace_filter.load_trace(f.read())
+    result = CachedFile(st.st_mtime, trace.filter(query), trace.content_type)
+
+    with self._lock:
+      self._parsed = (path, stamp, trace)
+      self._results.pop(key, None)
+      self._results[key] = (stamp, result)
+      while len(self._results) > MAX_FILTERED_TRACES:
+        self._results.popitem(last=False)
+    return result
+
+class RangeNotSatisfiable(Exception):
+  pass
+
+def parse_byte_range(range_header, size):
+  """Parses a Range header for a resource of the given size.
+
+  Returns the inclusive (start, end) byte range, or None if the header should
+  be ignored, which includes requests for more than one range. Raises
+  RangeNotSatisfiable if the range lies outside the resource.
+  """
+  units, _, ranges = range_header.partition('=')
+  if units.strip() != 'bytes' or ',' in ranges:
+    return None
+  first, sep, last = ranges.strip().partition('-')
+  if not sep:
+    return None
+  try:
+    if not first:
+      suffix_length = int(last)
+      if suffix_length <= 0 or size == 0:
+        raise RangeNotSatisfiable()
+      return (max(size - suffix_length, 0), size - 1)
+    start = int(first)
+    end = int(last) if last else size - 1
+  except ValueError:
+    return None
+  if start > end and last:
+    return None
+  if start >= size:
+    raise RangeNotSatisfiable()
+  return (start, min(end, size - 1))
+
+class FileRange(object):
+  """A slice of an open file, sent to a socket with sendfile() when the
+  pysendfile module is available and from a mmap of the file otherwise."""
+  def __init__(self, f, offset, length):
+    self._file = f
+    self._offset = offset
+    self._length = length
+
+  def send(self, sock):
+    if not self._length:
+      return
+    if sendfile:
+      offset = self._offset
+      remaining = self._length
+      while remaining > 0:
+        sent = sendfile(sock.fileno(), self._file.fileno(), offset,
+                        min(remaining, SEND_CHUNK_SIZE))
+        if sent == 0:
+          break
+        offset += sent
+        remaining -= sent
+      return
+
+    m = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      end = self._offset + self._length
+      for offset in xrange(self._offset, end, SEND_CHUNK_SIZE):
+        sock.sendall(buffer(m, offset, min(SEND_CHUNK_SIZE, end - offset)))
+    finally:
+      m.close()
+
+  def close(self):
+    self._file.close()
+
+class DepsWatcher(object):
+  """Regenerates deps.js and about_tracing.* in the background whenever the
+  base.require* directives of a file under src/, or one of the templates,
+  change, and keeps the last good deps.js in memory."""
+  def __init__(self, src_dir, poll_interval):
+    self._src_dir = src_dir
+    self._waiter = watch.make_waiter(src_dir, poll_interval)
+    self._lock = threading.Lock()
+    # filename -> (stamp, directives)
+    self._directives = {}
+    self._deps_js = None
+
+  @property
+  def deps_js(self):
+    """The last successfully generated deps.js, as a CachedFile."""
+    with self._lock:
+      return self._deps_js
+
+  def start(self):
+    self._scan()
+    self._regenerate()
+    t = threading.Thread(target=self._run)
+    t.daemon = True
+    t.start()
+
+  def _run(self):
+    while True:
+      self._waiter.wait()
+      self.check()
+
+  def check(self):
+    """Regenerates deps if the directives changed since the last check."""
+    if self._scan():
+      self._regenerate()
+
+  def _scan(self):
+    """Returns True if any file was added, removed or had its directives
+    changed since the last scan."""
+    changed = False
+    seen = set()
+    for dirpath, dirnames, filenames in os.walk(self._src_dir):
+      for f in filenames:
+        if f.startswith('.') or f in GENERATED_FILES:
+          continue
+        if not f.endswith(('.js', '.template')):
+          continue
+        filename = os.path.join(dirpath, f)
+        seen.add(filename)
+        try:
+          st = os.stat(filename)
+        except OSError:
+          continue
+        stamp = (st.st_mtime, st.st_size)
+        cached = self._directives.get(filename)
+        if cached and cached[0] == stamp:
+          continue
+        directives = self._read_directives(filename)
+        if not cached or cached[1] != directives:
+          changed = True
+        self._directives[filename] = (stamp, directives)
+
+    for filename in self._directives.keys():
+      if filename not in seen:
+        del self._directives[filename]
+        changed = True
+    return changed
+
+  def _read_directives(self, filename):
+    try:
+      with open(filename, 'r') as f:
+        contents = f.read()
+    except IOError:
+      return None
+    if filename.endswith('.template'):
+      return contents
+    module = parse_deps.Module(os.path.basename(filename))
+    try:
+      module.parse_definition_(contents, decl_required=False)
+    except parse_deps.DepsException, ex:
+      return str(ex)
+    return (tuple(module.dependent_module_names),
+            tuple(module.style_sheet_names),
+            tuple(module.dependent_raw_script_names))
+
+  def _regenerate(self):
+    sys.stderr.write('Regenerating deps\n')
+    try:
+      failed = calcdeps.regenerate_deps()
+    except Exception, ex:
+      sys.stderr.write('Error: %s\n\n' % str(ex))
+      failed = True
+    if failed:
+      # Keep serving the previous deps.js.
+      return
+    with open(os.path.join(self._src_dir, 'deps.js'), 'r') as f:
+      deps_js = f.read()
+    with self._lock:
+      self._deps_js = CachedFile(time.time(), deps_js)
 
 class Handler(SimpleHTTPServer.SimpleHTTPRequestHandler):
-  def do_GET(self):
-    if self.path == '/src/deps.js':
-      current_time = time.time()
-      if self.server.next_deps_check < current_time:
-        self.log_message('Regenerating deps')
-        self.server.next_deps_check = current_time + DEPS_CHECK_DELAY
-        calcdeps.regenerate_deps()
-    return SimpleHTTPServer.SimpleHTTPRequestHandler.do_GET(self)
-
-class Server(BaseHTTPServer.HTTPServer):
+  def translate_path(self, path):
+    # Same as SimpleHTTPRequestHandler.translate_path, but relative to the
+    # directory the server was started in: regenerating deps temporarily
+    # changes the working directory of the whole process.
+    path = path.split('?', 1)[0]
+    path = path.split('#', 1)[0]
+    trailing_slash = path.rstrip().endswith('/')
+    path = posixpath.normpath(urllib.unquote(path))
+    words = filter(None, path.split('/'))
+    path = self.server.root_dir
+    for word in words:
+      if os.path.dirname(word) or word in (os.curdir, os.pardir):
+        continue
+      path = os.path.join(path, word)
+    if trailing_slash:
+      path += '/'
+    return path
+
+  def send_head(self):
+    url = urlparse.urlparse(self.path)
+    if url.path == FILTER_TRACE_PATH:
+      return self._send_filtered_trace(url.query)
+    path = self.translate_path(self.path)
+    if path == os.path.join(SRC_DIR, 'deps.js'):
+      deps_js = self.server.deps_watcher.deps_js
+      if deps_js is not None:
+        return self._send_contents(path, deps_js)
+    if os.path.isdir(path):
+      return SimpleHTTPServer.SimpleHTTPRequestHandler.send_head(self)
+    try:
+      st = os.stat(path)
+    except OSError:
+      self.send_error(404, "File not found")
+      return None
+    if st.st_size > MAX_CACHED_FILE_SIZE:
+      return self._send_large_file(path, st)
+
+    try:
+      cached = self.server.file_cache.get(path, st)
+    except IOError:
+      self.send_error(404, "File not found")
+      return None
+    return self._send_contents(path, cached)
+
+  def _send_filtered_trace(self, query_string):
+    trace = urlparse.parse_qs(query_string).get('trace')
+    if not trace:
+      self.send_error(400, "Missing trace parameter")
+      return None
+    path = self.translate_path('/' + trace[-1])
+    try:
+      st = os.stat(path)
+      query = trace_filter.TraceQuery.from_query_string(query_string)
+      cached = self.server.filtered_trace_cache.get(path, st, query)
+    except (IOError, OSError):
+      self.send_error(404, "File not found")
+      return None
+    except trace_filter.TraceFilterException, ex:
+      self.send_error(400, str(ex))
+      return None
+    return self._send_contents(path, cached, ctype=cached.content_type)
+
+  def _send_contents(self, path, cached, ctype=None):
+    if ctype is None:
+      ctype = self.guess_type(path)
+    can_gzip = ctype in GZIP_CONTENT_TYPES
+    use_gzip = can_gzip and self._accepts_gzip()
+    etag = cached.gzip_etag if use_gzip else cached.etag
+    etags = [cached.etag]
+    if can_gzip:
+      etags.append(cached.gzip_etag)
+    if self._is_not_modified(etags, cached.mtime):
+      self._send_not_modified(etag, cached.mtime)
+      return None
+
+    contents = cached.contents
+    try:
+      byte_range = self._get_range(len(contents), cached.etag, cached.mtime)
+    except RangeNotSatisfiable:
+      self._send_range_not_satisfiable(len(contents))
+      return None
+    if byte_range:
+      # Ranges are always of the identity body.
+      start, end = byte_range
+      etag = cached.etag
+      self.send_response(206)
+      self.send_header("Content-type", ctype)
+      self.send_header("Content-Range",
+                       "bytes %d-%d/%d" % (start, end, len(contents)))
+      contents = contents[start:end + 1]
+    else:
+      self.send_response(200)
+      self.send_header("Content-type", ctype)
+      if can_gzip:
+        self.send_header("Vary", "Accept-Encoding")
+      if use_gzip:
+        contents = cached.gzipped_contents
+        self.send_header("Content-Encoding", "gzip")
+    self.send_header("Content-Length", str(len(contents)))
+    self._send_cache_headers(etag, cached.mtime)
+    self.end_headers()
+    return StringIO.StringIO(contents)
+
+  def _send_large_file(self, path, st):
+    """Sends a file too big for the cache straight from disk. The body is
+    written by copyfile, without reading it into python strings if possible."""
+    etag = '"%x-%x"' % (st.st_size, int(st.st_mtime * 1000))
+    if self._is_not_modified([etag], st.st_mtime):
+      self._send_not_modified(etag, st.st_mtime)
+      return None
+
+    try:
+      byte_range = self._get_range(st.st_size, etag, st.st_mtime)
+    except RangeNotSatisfiable:
+      self._send_range_not_satisfiable(st.st_size)
+      return None
+    try:
+      f = open(path, 'rb')
+    except IOError:
+      self.send_error(404, "File not found")
+      return None
+
+    if byte_range:
+      start, end = byte_range
+      self.send_response(206)
+      self.send_header("Content-Range",
+                       "bytes %d-%d/%d" % (start, end, st.st_size))
+    else:
+      start, end = 0, st.st_size - 1
+      self.send_response(200)
+    self.send_header("Content-type", self.guess_type(path))
+    self.send_header("Content-Length", str(end - start + 1))
+    self._send_cache_headers(etag, st.st_mtime)
+    self.end_headers()
+    return FileRange(f, start, end - start + 1)
+
+  def copyfile(self, source, outputfile):
+    if isinstance(source, FileRange):
+      outputfile.flush()
+      source.send(self.connection)
+    else:
+      SimpleHTTPServer.SimpleHTTPRequestHandler.copyfile(
+          self, source, outputfile)
+
+  def _send_cache_headers(self, etag, mtime):
+    self.send_header("Accept-Ranges", "bytes")
+    self.send_header("ETag", etag)
+    self.send_header("Last-Modified", self.date_time_string(mtime))
+    self.send_header("Cache-Control", "no-cache")
+
+  def _send_not_modified(self, etag, mtime):
+    self.send_response(304)
+    self._send_cache_headers(etag, mtime)
+    self.end_headers()
+
+  def _send_range_not_satisfiable(self, size):
+    self.send_response(416)
+    self.send_header("Content-Range", "bytes */%d" % size)
+    self.send_header("Content-Length", "0")
+    self.end_headers()
+
+  def _is_not_modified(self, etags, mtime):
+    """Whether the client already has the resource, given all the etags its
+    current contents are served with."""
+    if_none_match = self.headers.getheader('If-None-Match')
+    if if_none_match is not None:
+      client_etags = [e.strip() for e in if_none_match.split(',')]
+      if '*' in client_etags:
+        return True
+      return bool(set(etags).intersection(client_etags))
+
+    if_modified_since = self.headers.getheader('If-Modified-Since')
+    if if_modified_since is not None:
+      since = email.utils.parsedate_tz(if_modified_since)
+      if since is None:
+        return False
+      return int(mtime) <= email.utils.mktime_tz(since)
+    return False
+
+  def _get_range(self, size, etag, mtime):
+    """Returns the inclusive (start, end) byte range requested by the client,
+    or None if the whole file should be sent."""
+    range_header = self.headers.getheader('Range')
+    if range_header is None:
+      return None
+
+    if_range = self.headers.getheader('If-Range')
+    if if_range is not None:
+      if_range = if_range.strip()
+      if if_range.startswith('"'):
+        if if_range != etag:
+          return None
+      else:
+        date = email.utils.parsedate_tz(if_range)
+        if date is None or email.utils.mktime_tz(date) != int(mtime):
+          return None
+
+    return parse_byte_range(range_header, size)
+
+  def _accepts_gzip(self):
+    accept_encoding = self.headers.getheader('Accept-Encoding') or ''
+    for coding in accept_encoding.split(','):
+      parts = coding.strip().split(';')
+      if parts[0].strip() not in ('gzip', '*'):
+        continue
+      for param in parts[1:]:
+        name, _, value = param.partition('=')
+        if name.strip() == 'q' and value.strip() in ('0', '0.0', '0.00',
+                                                     '0.000'):
+          return False
+      return True
+    return False
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
   def __init__(self, *args, **kwargs):
     BaseHTTPServer.HTTPServer.__init__(self, *args, **kwargs)
-    self.next_deps_check = -1
+    self.root_dir = os.getcwd()
+    self.file_cache = FileCache()
+    self.filtered_trace_cache = FilteredTraceCache()
+    self.deps_watcher = DepsWatcher(SRC_DIR, DEPS_CHECK_DELAY)
 
 def Main(args):
   parser = optparse.OptionParser()
@@ -39,6 +533,7 @@ def Main(args):
                     help='Port to serve from')
   options, args = parser.parse_args()
   server = Server(('', options.port), Handler)
+  server.deps_watcher.start()
   sys.stderr.write("Now running on http://localhost:%i\n" % options.port)
   server.serve_forever()
 
@@ -44,18 +44,21 @@ flags.DEFINE_list('ignored_extra_namespaces', '',
 class JavaScriptStyleChecker(checkerbase.CheckerBase):
   """Checker that applies JavaScriptLintRules."""
 
-  def __init__(self, error_handler):
+  def __init__(self, error_handler, namespaces_index=None):
     """Initialize an JavaScriptStyleChecker object.
 
     Args:
       error_handler: Error handler to pass all errors to.
+      namespaces_index: Optional namespacesindex.NamespacesIndex to check
+          goog.require statements against.
     """
     self._namespaces_info = None
     if flags.FLAGS.closurized_namespaces:
       self._namespaces_info = (
           closurizednamespacesinfo.ClosurizedNamespacesInfo(
               flags.FLAGS.closurized_namespaces,
-              flags.FLAGS.ignored_extra_namespaces))
+              flags.FLAGS.ignored_extra_namespaces,
+              namespaces_index))
 
     checkerbase.CheckerBase.__init__(
         self,
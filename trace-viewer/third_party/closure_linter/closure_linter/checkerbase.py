@@ -189,6 +189,37 @@ class CheckerBase(object):
       is_html: Whether the file being checked is an HTML file with extracted
           contents.
 
+    Returns:
+      A boolean indicating whether the full file could be checked or if checking
+      failed prematurely.
+    """
+    token = self.Tokenize(lines_iter)
+    return self.CheckTokens(filename, token, is_html)
+
+  def Tokenize(self, lines_iter):
+    """Tokenizes a file for CheckTokens.
+
+    Args:
+      lines_iter: An iterator that yields one line of the file at a time.
+
+    Returns:
+      The first token in the file.
+    """
+    return self._tokenizer.TokenizeFile(lines_iter)
+
+  def CheckTokens(self, filename, token, is_html):
+    """Checks a file that was already tokenized by Tokenize.
+
+    Lets callers that need the token stream themselves share it with the
+    checker rather than tokenizing the file twice. No other file may be
+    tokenized in between, since the checker uses the tokenizer's final mode.
+
+    Args:
+      filename: The name of the file to check.
+      token: The first token in the file, as returned by Tokenize.
+      is_html: Whether the file being checked is an HTML file with extracted
+          contents.
+
     Returns:
       A boolean indicating whether the full file could be checked or if checking
       failed prematurely.
@@ -203,8 +234,6 @@ class CheckerBase(object):
     lint_rules = self._lint_rules
     lint_rules.Initialize(self, limited_doc_checks, is_html)
 
-    token = self._tokenizer.TokenizeFile(lines_iter)
-
     parse_error = None
     if self._metadata_pass:
       try:
@@ -257,8 +286,19 @@ class CheckerBase(object):
     """
     self._lint_rules.CheckToken(token, self._state_tracker)
 
+  def _BeforeToken(self, token):
+    """Called by _ExecutePass before each token is handled.
+
+    Does nothing by default; subclasses can override it to observe the state
+    as it was before the token.
+
+    Args:
+      token: The token about to be handled.
+    """
+    pass
+
   def _ExecutePass(self, token, pass_function, parse_error=None,
-                   debug_tokens=False):
+                   debug_tokens=False, reset_state=True):
     """Calls the given function for every token in the given token stream.
 
     As each token is passed to the given function, state is kept up to date and,
@@ -273,6 +313,8 @@ class CheckerBase(object):
       parse_error: A ParseError if any errors occurred.
       debug_tokens: Whether every token should be printed as it is encountered
           during the pass.
+      reset_state: Whether to reset the state tracker first. Pass False to
+          continue from a state that matches the token before the given one.
 
     Returns:
       A boolean indicating whether the full token stream could be checked or if
@@ -281,7 +323,8 @@ class CheckerBase(object):
     Raises:
       Exception: If any error occurred while calling the given function.
     """
-    self._state_tracker.Reset()
+    if reset_state:
+      self._state_tracker.Reset()
     while token:
       if debug_tokens:
         print token
@@ -293,6 +336,7 @@ class CheckerBase(object):
         self._error_handler.FinishFile()
         return
 
+      self._BeforeToken(token)
       try:
         self._state_tracker.HandleToken(
             token, self._state_tracker.GetLastNonSpaceToken())
@@ -43,7 +43,8 @@ class ClosurizedNamespacesInfo(object):
   there are missing require or provide statements.
   """
 
-  def __init__(self, closurized_namespaces, ignored_extra_namespaces):
+  def __init__(self, closurized_namespaces, ignored_extra_namespaces,
+               namespaces_index=None):
     """Initializes an instance the ClosurizedNamespacesInfo class.
 
     Args:
@@ -52,8 +53,12 @@ class ClosurizedNamespacesInfo(object):
           ignored.
       ignored_extra_namespaces: A list of namespaces that should not be reported
           as extra regardless of whether they are actually used.
+      namespaces_index: Optional namespacesindex.NamespacesIndex of the
+          namespaces the project provides. If given, only namespaces it
+          provides are reported as missing requires.
     """
     self._closurized_namespaces = closurized_namespaces
+    self._namespaces_index = namespaces_index
     self._ignored_extra_namespaces = (ignored_extra_namespaces +
                                       DEFAULT_EXTRA_NAMESPACES)
     self.Reset()
@@ -180,18 +185,46 @@ class ClosurizedNamespacesInfo(object):
       return False
 
     # If the namespace contains a component that is initial caps, then that
-    # must be the last component of the namespace.
+    # must be the last component of the namespace. Unless some file provides
+    # it, in which case it is what needs to be required.
     parts = namespace.split('.')
-    if len(parts) > 1 and parts[-2][0].isupper():
+    if (len(parts) > 1 and parts[-2][0].isupper() and
+        (self._namespaces_index is None or
+         not self._namespaces_index.IsProvided(namespace))):
       return True
 
     # TODO(user): There's probably a faster way to compute this.
     for used_namespace, used_identifier in self._used_namespaces:
       if namespace == used_namespace or namespace == used_identifier:
         return False
+      if (self._namespaces_index is not None and
+          namespace == self._GetRequiredNamespace(used_namespace,
+                                                  used_identifier)):
+        return False
 
     return True
 
+  def IsUnknownRequire(self, token):
+    """Returns whether no file provides the namespace of a goog.require token.
+
+    Args:
+      token: A goog.require token.
+
+    Returns:
+      True if there is a namespaces index and no file in it provides the
+      namespace the given token requires, otherwise False.
+    """
+    if self._namespaces_index is None:
+      return False
+
+    namespace = tokenutil.Search(token, TokenType.STRING_TEXT).string
+
+    base_namespace = namespace.split('.', 1)[0]
+    if base_namespace not in self._closurized_namespaces:
+      return False
+
+    return not self._namespaces_index.IsProvided(namespace)
+
   def GetMissingProvides(self):
     """Returns the set of missing provided namespaces for the current file.
 
@@ -226,6 +259,10 @@ class ClosurizedNamespacesInfo(object):
     a subset of created namespaces, but we check both because in some cases we
     can't always detect the creation of the namespace.
 
+    With a namespaces index, a namespace no file provides is replaced by the
+    longest provided namespace the identifier is in, if any, since that is
+    what needs to be required to use it.
+
     Returns:
       Returns a set of strings where each string is a namespace that should be
       required by this file, but is not.
@@ -249,10 +286,32 @@ class ClosurizedNamespacesInfo(object):
           namespace not in self._provided_namespaces and
           identifier not in external_dependencies and
           identifier not in created_identifiers):
+        namespace = self._GetRequiredNamespace(namespace, identifier)
+        if (namespace is None or
+            namespace in external_dependencies or
+            namespace in self._provided_namespaces):
+          continue
         missing_requires.add(namespace)
 
     return missing_requires
 
+  def _GetRequiredNamespace(self, namespace, identifier):
+    """Returns the namespace to require to use an identifier.
+
+    Args:
+      namespace: The closurized namespace of the identifier.
+      identifier: The identifier.
+
+    Returns:
+      The namespace itself, unless there is a namespaces index that does not
+      contain it. Then the longest namespace in the index the identifier is
+      in, or None if there is none.
+    """
+    if (self._namespaces_index is None or
+        self._namespaces_index.IsProvided(namespace)):
+      return namespace
+    return self._namespaces_index.GetProvidedPrefix(identifier)
+
   def _IsPrivateIdentifier(self, identifier):
     """Returns whether the given identifer is private."""
     pieces = identifier.split('.')
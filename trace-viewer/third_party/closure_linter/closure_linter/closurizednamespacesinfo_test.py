@@ -23,6 +23,7 @@ from closure_linter import closurizednamespacesinfo
 from closure_linter import javascriptstatetracker
 from closure_linter import javascripttokenizer
 from closure_linter import javascripttokens
+from closure_linter import namespacesindex
 from closure_linter import tokenutil
 
 # pylint: disable-msg=C6409
@@ -397,6 +398,69 @@ class ClosurizedNamespacesInfoTest(googletest.TestCase):
     self.assertEquals(1, len(namespaces_info.GetMissingRequires()),
                     'The whole class, not the object, should be required.');
 
+  def testGetMissingRequires_indexed(self):
+    """Tests that only namespaces some file provides are missing requires."""
+    input_lines = [
+        'goog.require(\'package.Bar\');',
+        'var x = new package.Foo();',
+        'var y = package.util.format();',
+        'var z = package.sub.Baz.create();',
+        'var w = package.V8.run();',
+        'package.Bar.run();',
+    ]
+    index = namespacesindex.NamespacesIndex()
+    index.AddFile('a.js', ['package.Foo'])
+    index.AddFile('a.js', ['package.Bar'])
+    index.AddFile('a.js', ['package.sub'])
+    index.AddFile('a.js', ['package.V8'])
+    token = self._tokenizer.TokenizeFile(input_lines)
+    namespaces_info = self._GetInitializedNamespacesInfo(token, ['package'], [],
+                                                         index)
+
+    # package.util is provided by no file, package.sub.Baz is created by
+    # whichever file provides package.sub, and package.V8 looks like a
+    # constant but is provided.
+    self.assertEquals(set(['package.Foo', 'package.sub', 'package.V8']),
+                      namespaces_info.GetMissingRequires())
+
+  def testIsExtraRequire_indexed(self):
+    """Tests that requires of provided inner namespaces are not extra."""
+    input_lines = [
+        'goog.require(\'package.Foo.Enum\');',
+        'goog.require(\'package.sub\');',
+        'var x = package.Foo.Enum.VALUE1;',
+        'var y = package.sub.Baz.create();',
+    ]
+    index = namespacesindex.NamespacesIndex()
+    index.AddFile('a.js', ['package.Foo.Enum'])
+    index.AddFile('a.js', ['package.sub'])
+    token = self._tokenizer.TokenizeFile(input_lines)
+    namespaces_info = self._GetInitializedNamespacesInfo(token, ['package'], [],
+                                                         index)
+
+    self.assertFalse(namespaces_info.IsExtraRequire(token))
+    self.assertFalse(namespaces_info.IsExtraRequire(
+        namespaces_info._require_tokens[1]))
+    self.assertEquals(set(), namespaces_info.GetMissingRequires())
+
+  def testIsUnknownRequire(self):
+    """Tests that requires of namespaces no file provides are unknown."""
+    index = namespacesindex.NamespacesIndex()
+    index.AddFile('a.js', ['package.Foo'])
+    for namespace, expected in (('package.Foo', False),
+                                ('package.Bar', True),
+                                ('other.Bar', False)):
+      token = self._GetRequireTokens(namespace)
+      namespaces_info = self._GetInitializedNamespacesInfo(
+          token, ['package'], [], index)
+      self.assertEquals(expected, namespaces_info.IsUnknownRequire(token),
+                        namespace)
+
+    # Without an index, nothing is known to be unprovided.
+    token = self._GetRequireTokens('package.Bar')
+    namespaces_info = self._GetInitializedNamespacesInfo(token, ['package'], [])
+    self.assertFalse(namespaces_info.IsUnknownRequire(token))
+
   def testIsFirstProvide(self):
     """Tests operation of the isFirstProvide method."""
     input_lines = [
@@ -424,11 +488,13 @@ class ClosurizedNamespacesInfoTest(googletest.TestCase):
                       namespaces_info._GetWholeIdentifierString(token.next))
 
   def _GetInitializedNamespacesInfo(self, token, closurized_namespaces,
-                                    ignored_extra_namespaces):
+                                    ignored_extra_namespaces,
+                                    namespaces_index=None):
     """Returns a namespaces info initialized with the given token stream."""
     namespaces_info = closurizednamespacesinfo.ClosurizedNamespacesInfo(
         closurized_namespaces=closurized_namespaces,
-        ignored_extra_namespaces=ignored_extra_namespaces)
+        ignored_extra_namespaces=ignored_extra_namespaces,
+        namespaces_index=namespaces_index)
     state_tracker = javascriptstatetracker.JavaScriptStateTracker()
 
     while token:
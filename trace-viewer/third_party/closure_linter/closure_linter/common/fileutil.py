@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Utilities for writing files."""
+
+
+
+import os
+import tempfile
+
+
+def WriteAtomically(path, contents):
+  """Writes a file so that readers see either all of the contents or none.
+
+  The contents go to a temporary file next to path first, which is then
+  renamed over path, so that other runs of the linter, or its worker
+  processes, never read a partially written file.
+
+  Args:
+    path: The path of the file to write. Its directory must exist.
+    contents: The string to write.
+
+  Raises:
+    IOError or OSError: If the file can't be written.
+  """
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                  suffix='.tmp')
+  try:
+    f = os.fdopen(fd, 'w')
+    try:
+      f.write(contents)
+    finally:
+      f.close()
+    os.rename(tmp_path, path)
+  except:
+    try:
+      os.remove(tmp_path)
+    except OSError:
+      pass
+    raise
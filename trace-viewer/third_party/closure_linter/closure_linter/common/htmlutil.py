@@ -19,76 +19,222 @@
 __author__ = ('robbyw@google.com (Robert Walker)')
 
 import cStringIO
-import formatter
-import htmllib
 import HTMLParser
 import re
 
+# Matches the start of a comment or of a script tag.
+_MARKUP_START = re.compile(r'<!--|<script(?=[\s/>])', re.IGNORECASE)
 
-class ScriptExtractor(htmllib.HTMLParser):
-  """Subclass of HTMLParser that extracts script contents from an HTML file.
+# Matches the rest of a start tag, up to and including its '>'.
+_START_TAG_REST = re.compile(r'''(?:[^>"']|"[^"]*"|'[^']*')*>''')
+
+# Matches the quoted attribute values in a tag.
+_QUOTED_VALUE = re.compile(r'"[^"]*"|\'[^\']*\'')
+
+# Matches a src attribute, once quoted values are removed.
+_SRC_ATTRIBUTE = re.compile(r'[\s/]src(?=[\s/=>])', re.IGNORECASE)
+
+# Matches the start of a script end tag.
+_SCRIPT_END = re.compile(r'</script(?=[\s/>])', re.IGNORECASE)
+
+# The parts of an HTML file, in the order ScriptExtractor reads them.
+_TEXT = 'text'
+_COMMENT = 'comment'
+_START_TAG = 'start_tag'
+_SCRIPT = 'script'
+_END_TAG = 'end_tag'
+
+
+def _CountLineBreaks(text):
+  """Returns the number of line breaks in the given text.
+
+  Args:
+    text: The text to count line breaks in.
+
+  Returns:
+    The number of line breaks, counting a carriage return followed by a
+    newline as one, as splitlines does.
+  """
+  return text.count('\n') + text.count('\r') - text.count('\r\n')
+
+
+class ScriptExtractor(object):
+  """Extracts script contents from an HTML file.
 
   Also inserts appropriate blank lines so that line numbers in the extracted
   code match the line numbers in the original HTML.
+
+  Rather than parsing the HTML, scans it for the boundaries of comments and
+  script tags, and takes everything up to '</script' as the script's
+  contents, as browsers do.  The HTML can be fed to it a piece at a time, and
+  only the end of what was fed, which may still be unfinished, is kept.
   """
 
   def __init__(self):
     """Initialize a ScriptExtractor."""
-    htmllib.HTMLParser.__init__(self, formatter.NullFormatter())
-    self._in_script = False
-    self._text = ''
+    self._buffer = ''
+    self._scan_from = 0
+    self._state = _TEXT
+    self._skip_script = False
+    self._pieces = []
 
-  def start_script(self, attrs):
-    """Internal handler for the start of a script tag.
+  def feed(self, data):
+    """Reads more of the HTML file.
 
     Args:
-      attrs: The attributes of the script tag, as a list of tuples.
+      data: The next part of the HTML file.
     """
-    for attribute in attrs:
-      if attribute[0].lower() == 'src':
-        # Skip script tags with a src specified.
-        return
-    self._in_script = True
+    self._buffer += data
+    self._Process(False)
+
+  def close(self):
+    """Reads whatever is left of the HTML file once all of it is fed."""
+    self._Process(True)
+
+  def _AppendNewlines(self, data):
+    """Count the number of newlines in the given string and append them.
 
-  def end_script(self):
-    """Internal handler for the end of a script tag."""
-    self._in_script = False
+    This ensures line numbers are correct for reported errors.
 
-  def handle_data(self, data):
-    """Internal handler for character data.
+    Args:
+      data: The data to count newlines in.
+    """
+    count = _CountLineBreaks(data)
+    if count:
+      self._pieces.append('\n' * count)
+
+  def _AppendScript(self, data):
+    """Appends the contents of a script tag.
 
     Args:
-      data: The character data from the HTML file.
+      data: The contents of the script tag.
     """
-    if self._in_script:
-      # If the last line contains whitespace only, i.e. is just there to
-      # properly align a </script> tag, strip the whitespace.
-      if data.rstrip(' \t') != data.rstrip(' \t\n\r\f'):
-        data = data.rstrip(' \t')
-      self._text += data
-    else:
+    if self._skip_script:
+      # Skip script tags with a src specified.
       self._AppendNewlines(data)
+      return
+
+    # If the last line contains whitespace only, i.e. is just there to
+    # properly align a </script> tag, strip the whitespace.
+    if data.rstrip(' \t') != data.rstrip(' \t\n\r\f'):
+      data = data.rstrip(' \t')
+    self._pieces.append(data)
 
-  def handle_comment(self, data):
-    """Internal handler for HTML comments.
+  def _AppendNewlinesBefore(self, data, pos, end):
+    """Appends the newlines in a part of the data that is complete.
+
+    Used to pass on what was read so far, so that it need not be kept.
 
     Args:
-      data: The text of the comment.
-    """
-    self._AppendNewlines(data)
+      data: The data read so far.
+      pos: Where the part starts.
+      end: Where the rest of the data, which may still be incomplete, starts.
 
-  def _AppendNewlines(self, data):
-    """Count the number of newlines in the given string and append them.
+    Returns:
+      Where the data that is kept starts.
+    """
+    if end > pos and data[end - 1] == '\r':
+      # Keep a carriage return that a newline may follow.
+      end -= 1
+    if end <= pos:
+      return pos
+    self._AppendNewlines(data[pos:end])
+    return end
 
-    This ensures line numbers are correct for reported errors.
+  def _Process(self, is_end):
+    """Reads the complete parts of the HTML fed so far.
 
     Args:
-      data: The data to count newlines in.
+      is_end: Whether all of the file has been fed, so that any unfinished
+          part at the end is complete.
     """
-    # We append 'x' to both sides of the string to ensure that splitlines
-    # gives us an accurate count.
-    for i in xrange(len(('x' + data + 'x').splitlines()) - 1):
-      self._text += '\n'
+    data = self._buffer
+    pos = 0
+    while pos < len(data):
+      state = self._state
+      scan_from = max(pos, self._scan_from)
+
+      if state == _TEXT:
+        match = _MARKUP_START.search(data, scan_from)
+        if not match:
+          if is_end:
+            self._AppendNewlines(data[pos:])
+            pos = len(data)
+          else:
+            # The end may be the start of a script tag.
+            self._scan_from = len(data) - len('<script')
+            pos = self._AppendNewlinesBefore(data, pos, self._scan_from)
+          break
+        self._AppendNewlines(data[pos:match.start()])
+        pos = match.end()
+        if match.group() == '<!--':
+          self._state = _COMMENT
+        else:
+          self._state = _START_TAG
+
+      elif state == _COMMENT:
+        end = data.find('-->', scan_from)
+        if end < 0:
+          if is_end:
+            self._AppendNewlines(data[pos:])
+            pos = len(data)
+          else:
+            self._scan_from = len(data) - len('--')
+            pos = self._AppendNewlinesBefore(data, pos, self._scan_from)
+          break
+        end += len('-->')
+        self._AppendNewlines(data[pos:end])
+        pos = end
+        self._state = _TEXT
+
+      elif state == _START_TAG:
+        match = _START_TAG_REST.match(data, pos)
+        if not match:
+          if is_end:
+            self._AppendNewlines(data[pos:])
+            pos = len(data)
+          break
+        tag = match.group()
+        self._AppendNewlines(tag)
+        self._skip_script = bool(
+            _SRC_ATTRIBUTE.search(_QUOTED_VALUE.sub('', tag)))
+        pos = match.end()
+        self._state = _SCRIPT
+
+      elif state == _SCRIPT:
+        match = _SCRIPT_END.search(data, scan_from)
+        if not match:
+          if is_end:
+            self._AppendScript(data[pos:])
+            pos = len(data)
+          else:
+            # The end may be the start of the end tag.
+            self._scan_from = len(data) - len('</script')
+            # Pass on the script before it, up to its last non-space so that
+            # the whitespace at the end of the script is still seen as a whole.
+            script = data[pos:max(pos, self._scan_from)].rstrip(' \t\n\r\f')
+            if script:
+              self._AppendScript(script)
+              pos += len(script)
+          break
+        self._AppendScript(data[pos:match.start()])
+        pos = match.end()
+        self._state = _END_TAG
+
+      else:
+        end = data.find('>', pos)
+        if end < 0:
+          if is_end:
+            self._AppendNewlines(data[pos:])
+            pos = len(data)
+          break
+        end += len('>')
+        self._AppendNewlines(data[pos:end])
+        pos = end
+        self._state = _TEXT
+
+    self._buffer = data[pos:]
+    self._scan_from = max(0, self._scan_from - pos)
 
   def GetScriptLines(self):
     """Return the extracted script lines.
@@ -96,7 +242,7 @@ class ScriptExtractor(htmllib.HTMLParser):
     Returns:
       The extracted script lines as a list of strings.
     """
-    return self._text.splitlines()
+    return ''.join(self._pieces).splitlines()
 
 
 def GetScriptLines(f):
@@ -109,16 +255,7 @@ def GetScriptLines(f):
     Lines in the HTML file that are from script tags.
   """
   extractor = ScriptExtractor()
-
-  # The HTML parser chokes on text like Array.<!string>, so we patch
-  # that bug by replacing the < with &lt; - escaping all text inside script
-  # tags would be better but it's a bit of a catch 22.
-  contents = f.read()
-  contents = re.sub(r'<([^\s\w/])',
-         lambda x: '&lt;%s' % x.group(1),
-         contents)
-
-  extractor.feed(contents)
+  extractor.feed(f.read())
   extractor.close()
   return extractor.GetScriptLines()
 
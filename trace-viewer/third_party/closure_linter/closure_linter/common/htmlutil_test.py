@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the htmlutil module."""
+
+
+
+import StringIO
+import unittest as googletest
+from closure_linter.common import htmlutil
+
+_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<!-- A comment
+     <script>notScript();</script>
+-->
+<script
+    src="base.js"></script>
+<script type="text/javascript"
+    class="x">
+  var x = a<b && c > d;
+  var s = '<idle> &amp;';
+  </script>
+</head>
+<body><SCRIPT>y();</SCRIPT ><script>z();
+</script></body>
+</html>
+"""
+
+
+class ScriptExtractorTest(googletest.TestCase):
+
+  def testGetScriptLines(self):
+    lines = htmlutil.GetScriptLines(StringIO.StringIO(_HTML))
+    html_lines = _HTML.splitlines()
+    self.assertEquals(
+        ['  var x = a<b && c > d;',
+         "  var s = '<idle> &amp;';"],
+        lines[10:12])
+    # Script lines are on the same line as in the HTML.
+    for index, line in enumerate(lines[:14]):
+      if line:
+        self.assertTrue(line in html_lines[index], line)
+    self.assertEquals(['', '', 'y();z();', '', ''], lines[12:])
+    self.assertEquals(len(html_lines), len(lines))
+
+  def testFedInPieces(self):
+    expected = htmlutil.GetScriptLines(StringIO.StringIO(_HTML))
+    for size in (1, 2, 3, 7, 10):
+      extractor = htmlutil.ScriptExtractor()
+      for start in xrange(0, len(_HTML), size):
+        extractor.feed(_HTML[start:start + size])
+      extractor.close()
+      self.assertEquals(expected, extractor.GetScriptLines())
+
+  def testFedInPiecesKeepsLittle(self):
+    html = ('<p>\r\n</p>\r\n<script>\r\n' + 'a();\r\n' * 1000 +
+            '  </script>\r\n<!--\r\n-->' + '<p>\r\n</p>\r\n' * 1000)
+    expected = htmlutil.GetScriptLines(StringIO.StringIO(html))
+    for size in (1, 2, 3, 7, 10):
+      extractor = htmlutil.ScriptExtractor()
+      for start in xrange(0, len(html), size):
+        extractor.feed(html[start:start + size])
+        self.assertTrue(len(extractor._buffer) < 20)
+      extractor.close()
+      self.assertEquals(expected, extractor.GetScriptLines())
+
+  def testLineBreaks(self):
+    lines = htmlutil.GetScriptLines(StringIO.StringIO(
+        '<p>\r\n</p>\r<script>\r\na();\r\n</script>'))
+    self.assertEquals(['', '', '', 'a();'], lines)
+
+  def testUnfinished(self):
+    self.assertEquals(['a();'], htmlutil.GetScriptLines(
+        StringIO.StringIO('<script>a();')))
+    self.assertEquals(['', ''], htmlutil.GetScriptLines(
+        StringIO.StringIO('<!--\n\n<script>a();')))
+
+
+if __name__ == '__main__':
+  googletest.main()
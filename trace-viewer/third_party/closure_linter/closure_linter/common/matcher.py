@@ -19,6 +19,11 @@
 __author__ = ('robbyw@google.com (Robert Walker)',
               'ajp@google.com (Andy Perelson)')
 
+import re
+import sre_constants
+import sre_parse
+import string
+
 from closure_linter.common import position
 from closure_linter.common import tokens
 
@@ -26,6 +31,95 @@ from closure_linter.common import tokens
 Token = tokens.Token
 Position = position.Position
 
+# The characters in each character class, for regexes without the locale or
+# unicode flags.
+_CATEGORY_CHARS = {
+    sre_constants.CATEGORY_DIGIT: frozenset(string.digits),
+    sre_constants.CATEGORY_SPACE: frozenset(' \t\n\r\f\v'),
+    sre_constants.CATEGORY_WORD: frozenset(string.ascii_letters +
+                                           string.digits + '_'),
+}
+
+# Opcodes that match without consuming a character.
+_ZERO_WIDTH_OPS = frozenset([sre_constants.AT, sre_constants.ASSERT,
+                             sre_constants.ASSERT_NOT])
+
+
+def _GetSetChars(items):
+  """Returns the characters matched by the items of a [...] set, or None."""
+  chars = set()
+  for op, av in items:
+    if op == sre_constants.LITERAL and av < 128:
+      chars.add(chr(av))
+    elif op == sre_constants.RANGE and av[1] < 128:
+      chars.update(chr(c) for c in xrange(av[0], av[1] + 1))
+    elif op == sre_constants.CATEGORY and av in _CATEGORY_CHARS:
+      chars.update(_CATEGORY_CHARS[av])
+    else:
+      return None
+  return chars
+
+
+def _GetFirstChars(items):
+  """Returns the characters that a match of a parsed pattern can start with.
+
+  Args:
+    items: A sequence of (opcode, argument) pairs from sre_parse.
+
+  Returns:
+    A tuple of the set of first characters, or None if it could be any
+    character, and whether the pattern can match the empty string.
+  """
+  chars = set()
+  for op, av in items:
+    if op in _ZERO_WIDTH_OPS:
+      # Lookarounds can only make the set of first characters smaller.
+      continue
+    elif op == sre_constants.LITERAL and av < 128:
+      item_chars, nullable = set([chr(av)]), False
+    elif op == sre_constants.IN:
+      item_chars, nullable = _GetSetChars(av), False
+    elif op == sre_constants.SUBPATTERN:
+      item_chars, nullable = _GetFirstChars(av[1])
+    elif op == sre_constants.BRANCH:
+      item_chars, nullable = set(), False
+      for branch in av[1]:
+        branch_chars, branch_nullable = _GetFirstChars(branch)
+        if branch_chars is None:
+          return None, True
+        item_chars.update(branch_chars)
+        nullable = nullable or branch_nullable
+    elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+      item_chars, nullable = _GetFirstChars(av[2])
+      nullable = nullable or av[0] == 0
+    else:
+      return None, True
+
+    if item_chars is None:
+      return None, True
+    chars.update(item_chars)
+    if not nullable:
+      return chars, False
+  return chars, True
+
+
+def GetFirstChars(regex):
+  """Returns the characters that a match of a regex can start with.
+
+  Args:
+    regex: A compiled regular expression.
+
+  Returns:
+    A frozenset of the ASCII characters a match can start with, or None if it
+    could start with any character or be empty.
+  """
+  if regex.flags & (re.IGNORECASE | re.LOCALE | re.UNICODE):
+    return None
+  chars, nullable = _GetFirstChars(sre_parse.parse(regex.pattern, regex.flags))
+  if chars is None or nullable:
+    return None
+  return frozenset(chars)
+
 
 class Matcher(object):
   """A token matcher.
@@ -41,6 +135,8 @@ class Matcher(object):
     regex: The regular expression representing this matcher.
     type: The type of token indicated by a successful match.
     result_mode: The mode to move to after a successful match.
+    first_chars: The characters a match can start with, or None if it could be
+        any character.  Lets the tokenizer skip matchers that can't match.
   """
 
   def __init__(self, regex, token_type, result_mode=None, line_start=False):
@@ -58,3 +154,4 @@ class Matcher(object):
     self.type = token_type
     self.result_mode = result_mode
     self.line_start = line_start
+    self.first_chars = GetFirstChars(regex)
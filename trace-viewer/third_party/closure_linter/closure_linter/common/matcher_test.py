@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for matchers and the tokenizer's use of them."""
+
+
+
+import copy
+import re
+import unittest as googletest
+from closure_linter import javascripttokenizer
+from closure_linter.common import matcher
+
+
+class _UndispatchedTokenizer(javascripttokenizer.JavaScriptTokenizer):
+  """A tokenizer that tries every matcher at every position."""
+
+  def __init__(self):
+    javascripttokenizer.JavaScriptTokenizer.__init__(self)
+    matchers = {}
+    for mode, mode_matchers in self.matchers.iteritems():
+      matchers[mode] = []
+      for m in mode_matchers:
+        m = copy.copy(m)
+        m.first_chars = None
+        matchers[mode].append(m)
+    self.matchers = matchers
+
+
+class GetFirstCharsTest(googletest.TestCase):
+
+  def _GetFirstChars(self, pattern, flags=0):
+    chars = matcher.GetFirstChars(re.compile(pattern, flags))
+    if chars is not None:
+      return ''.join(sorted(chars))
+
+  def testLiterals(self):
+    self.assertEquals('/', self._GetFirstChars(r'/\*\*'))
+    self.assertEquals('a', self._GetFirstChars(r'\bab'))
+    self.assertEquals('abc', self._GetFirstChars(r'a|(b|c)d'))
+
+  def testSets(self):
+    self.assertEquals('0123456789', self._GetFirstChars(r'\d'))
+    self.assertEquals('\t\n\x0b\x0c\r ', self._GetFirstChars(r'\s+'))
+    self.assertEquals('$-Xabc', self._GetFirstChars(r'[a-c$X-]'))
+    self.assertEquals(None, self._GetFirstChars(r'[^a]'))
+    self.assertEquals(None, self._GetFirstChars(r'\S'))
+
+  def testOptionalPrefixes(self):
+    self.assertEquals('.0123456789',
+                      self._GetFirstChars(r'\d*\.\d+|\d+'))
+    self.assertEquals('@', self._GetFirstChars(r'(^|(?<=\s))@(?P<name>\w+)'))
+
+  def testAnything(self):
+    self.assertEquals(None, self._GetFirstChars(r'.'))
+    self.assertEquals(None, self._GetFirstChars(r'a*'))
+    self.assertEquals(None, self._GetFirstChars(r'a', re.IGNORECASE))
+
+
+class TokenizerTest(googletest.TestCase):
+
+  def _GetTokens(self, tokenizer_class, lines):
+    token = tokenizer_class().TokenizeFile(lines)
+    result = []
+    while token:
+      result.append((token.type, token.string, token.line_number,
+                     token.start_index, token.values))
+      token = token.next
+    return result
+
+  def testSameTokensAsTryingEveryMatcher(self):
+    lines = [
+        '/**\n',
+        ' * Does things, mail me@example.com.\n',
+        ' * @param {number=} x The {@code x}.\n',
+        ' * @return {!Array.<string>} */\n',
+        'foo.bar = function baz(x, y) {\n',
+        '  var re = /a[/]b\\/c/g, s = "q\\"t" + \'it\\\'s\'; // done\n',
+        '  return x >>>= 0x1F + .5e-3 - 10. ? #@\\ : \xe9\xe9 in y;\n',
+        '  /* block\n',
+        '     comment */\n',
+        '}\n',
+        '\n',
+    ]
+    self.assertEquals(self._GetTokens(_UndispatchedTokenizer, lines),
+                      self._GetTokens(javascripttokenizer.JavaScriptTokenizer,
+                                      lines))
+    self.assertEquals(
+        self._GetTokens(_UndispatchedTokenizer, [unicode(l, 'latin-1')
+                                                 for l in lines]),
+        self._GetTokens(javascripttokenizer.JavaScriptTokenizer,
+                        [unicode(l, 'latin-1') for l in lines]))
+
+
+if __name__ == '__main__':
+  googletest.main()
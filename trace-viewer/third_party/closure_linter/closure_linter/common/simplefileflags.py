@@ -44,6 +44,11 @@ flags.DEFINE_list(
     ('deps.js'),
     'Exclude the specified files',
     short_name='x')
+flags.DEFINE_list(
+    'additional_extensions',
+    None,
+    'List of additional file extensions (not js) that should be treated as '
+    'JavaScript files.')
 
 
 def MatchesSuffixes(filename, suffixes):
@@ -50,6 +50,9 @@ class Tokenizer(object):
     self.__starting_mode = starting_mode
     self.matchers = matchers
     self.default_types = default_types
+    # Cache of the matchers to try for each mode, start of line or not, and
+    # first character.
+    self.__matchers_by_char = {}
 
   def TokenizeFile(self, file):
     """Tokenizes the given file.
@@ -109,10 +112,7 @@ class Tokenizer(object):
     normal_token = ''
     index = 0
     while index < len(string):
-      for matcher in self.matchers[self.mode]:
-        if matcher.line_start and index > 0:
-          continue
-
+      for matcher in self.__GetMatchers(self.mode, index == 0, string[index]):
         match = matcher.regex.match(string, index)
 
         if match:
@@ -122,9 +122,13 @@ class Tokenizer(object):
                                          line_number))
             normal_token = ''
 
-          # Add the match.
+          # Add the match.  Most matchers have no named groups, and their
+          # tokens share None rather than each holding an empty dict.
+          values = None
+          if matcher.regex.groupindex:
+            values = match.groupdict()
           self.__AddToken(self._CreateToken(match.group(), matcher.type, line,
-                                            line_number, match.groupdict()))
+                                            line_number, values))
 
           # Change the mode to the correct one for after this match.
           self.mode = matcher.result_mode or self.mode
@@ -137,15 +141,42 @@ class Tokenizer(object):
       else:
         # If the for loop finishes naturally (i.e. no matches) we just add the
         # first character to the string of consecutive non match characters.
-        # These will constitute a NORMAL token.
-        if string:
-          normal_token += string[index:index + 1]
-          index += 1
+        # These will constitute a NORMAL token.  So will any characters after
+        # it that no matcher can start with, which are added all at once.
+        end = index + 1
+        while (end < len(string) and
+               not self.__GetMatchers(self.mode, False, string[end])):
+          end += 1
+        normal_token += string[index:end]
+        index = end
 
     if normal_token:
       self.__AddToken(
           self.__CreateNormalToken(self.mode, normal_token, line, line_number))
 
+  def __GetMatchers(self, mode, line_start, char):
+    """Returns the matchers that could match at a character, in order.
+
+    Trying only these gives the same result as trying every matcher for the
+    mode, since the others can't match there.
+
+    Args:
+      mode: The current mode.
+      line_start: Whether the character is the first in the line.
+      char: The character.
+
+    Returns:
+      A list of Matcher objects.
+    """
+    key = (mode, line_start, char)
+    matchers = self.__matchers_by_char.get(key)
+    if matchers is None:
+      matchers = [m for m in self.matchers[mode]
+                  if (line_start or not m.line_start) and
+                  (m.first_chars is None or char in m.first_chars)]
+      self.__matchers_by_char[key] = matchers
+    return matchers
+
   def __CreateNormalToken(self, mode, string, line, line_number):
     """Creates a normal token.
 
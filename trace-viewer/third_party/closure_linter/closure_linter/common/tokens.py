@@ -31,6 +31,8 @@ class Token(object):
   """Token class for intelligent text splitting.
 
   The token class represents a string of characters and an identifying type.
+  Files are split into hundreds of thousands of tokens, so tokens have no
+  instance dictionary; only the attributes below can be set.
 
   Attributes:
     type: The type of token.
@@ -38,7 +40,8 @@ class Token(object):
     length: The length of the token.
     line: The text of the line the token is found in.
     line_number: The number of the line the token is found in.
-    values: Dictionary of values returned from the tokens regex match.
+    values: Dictionary of values returned from the tokens regex match, or None
+        if the token was not matched by a regex with named groups.
     previous: The token before this one.
     next: The token after this one.
     start_index: The character index in the line where this token starts.
@@ -47,6 +50,10 @@ class Token(object):
         a separate metadata pass.
   """
 
+  __slots__ = ('type', 'string', 'length', 'line', 'line_number', 'values',
+               'previous', 'next', 'start_index', 'attached_object',
+               'metadata')
+
   def __init__(self, string, token_type, line, line_number, values=None):
     """Creates a new Token object.
 
@@ -78,6 +85,20 @@ class Token(object):
     # This part is set in *metadatapass.py
     self.metadata = None
 
+  def __deepcopy__(self, memo):
+    """Returns the token itself.
+
+    Tokens are nodes of the file's token stream, so copying one would copy the
+    whole file.  Copies of objects that refer to tokens share them instead.
+
+    Args:
+      memo: The deepcopy memo dictionary.
+
+    Returns:
+      This token.
+    """
+    return self
+
   def IsFirstInLine(self):
     """Tests if this token is the first token in its line.
 
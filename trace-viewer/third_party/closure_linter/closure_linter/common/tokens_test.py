@@ -92,6 +92,13 @@ class TokensTest(googletest.TestCase):
     a = tokens.Token('foo', 'fakeType1', 1, 1)
     self.assertEquals('<Token: fakeType1, "foo", None, 1, None>', str(a))
 
+  def testNoInstanceDict(self):
+    a = tokens.Token('foo', 'fakeType1', 1, 1)
+    a.metadata = 'metadata'
+    self.assertEquals('metadata', a.metadata)
+    self.assertFalse(hasattr(a, '__dict__'))
+    self.assertRaises(AttributeError, setattr, a, 'foo', 1)
+
   def testIter(self):
     dummy_tokens = _CreateDummyTokens(5)
     _SetTokensAsNeighbors(dummy_tokens)
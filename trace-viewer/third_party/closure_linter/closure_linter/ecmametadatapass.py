@@ -196,6 +196,17 @@ class EcmaMetaDataPass(object):
     self._AddContext(EcmaContext.ROOT)
     self._last_code = None
 
+  def Resume(self, context, last_code):
+    """Prepares to process tokens that follow already processed ones.
+
+    Args:
+      context: The context at the end of the processed tokens.
+      last_code: The last code token among the processed tokens.
+    """
+    self._token = None
+    self._context = context
+    self._last_code = last_code
+
   def _CreateContext(self, type):
     """Overridable by subclasses to create the appropriate context type."""
     return EcmaContext(type, self._token, self._context)
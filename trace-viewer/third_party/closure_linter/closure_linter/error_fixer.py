@@ -21,14 +21,18 @@ __author__ = 'robbyw@google.com (Robert Walker)'
 import re
 
 import gflags as flags
+from closure_linter import checker
+from closure_linter import ecmametadatapass
 from closure_linter import errors
 from closure_linter import javascriptstatetracker
 from closure_linter import javascripttokens
 from closure_linter import requireprovidesorter
 from closure_linter import tokenutil
+from closure_linter.common import erroraccumulator
 from closure_linter.common import errorhandler
 
 # Shorthand
+Context = ecmametadatapass.EcmaContext
 Token = javascripttokens.JavaScriptToken
 Type = javascripttokens.JavaScriptTokenType
 
@@ -48,22 +52,51 @@ FLAGS = flags.FLAGS
 flags.DEFINE_boolean('disable_indentation_fixing', False,
                      'Whether to disable automatic fixing of indentation.')
 
+# The most times a file is checked and fixed in one run.  Fixes that overlap
+# another fix, and errors that only show up once others are fixed, are fixed
+# by checking the file again.
+_MAX_PASSES = 5
+
+# Errors whose fixes move the tokens after them on their line.  The checker
+# accounts for indentation fixes when checking the lines after them, but not
+# for these.
+_COLUMN_CHANGING_CODES = frozenset([errors.MISSING_SPACE, errors.EXTRA_SPACE])
+
+
+def _TokenEdit(token):
+  """Returns an edit that changes or deletes the given token."""
+  return ('token', id(token), token.line_number)
+
+
+def _InsertEdit(token):
+  """Returns an edit that inserts tokens after the given token."""
+  return ('insert', id(token), token.line_number)
+
+
+def _LineEdits(first_line_number, last_line_number):
+  """Returns edits that may change anything on the given lines."""
+  return [('line', None, line_number)
+          for line_number in xrange(first_line_number, last_line_number + 1)]
+
 
 class ErrorFixer(errorhandler.ErrorHandler):
   """Object that fixes simple style errors."""
 
-  def __init__(self, external_file=None):
+  def __init__(self, external_file=None, namespaces_index=None):
     """Initialize the error fixer.
 
     Args:
       external_file: If included, all output will be directed to this file
           instead of overwriting the files the errors are found in.
+      namespaces_index: Optional namespacesindex.NamespacesIndex to check
+          fixed files against, as the files were first checked with.
     """
     errorhandler.ErrorHandler.__init__(self)
 
     self._file_name = None
     self._file_token = None
     self._external_file = external_file
+    self._namespaces_index = namespaces_index
 
   def HandleFile(self, filename, first_token):
     """Notifies this ErrorPrinter that subsequent errors are in filename.
@@ -75,7 +108,7 @@ class ErrorFixer(errorhandler.ErrorHandler):
     self._file_name = filename
     self._file_token = first_token
     self._file_fix_count = 0
-    self._file_changed_lines = set()
+    self._file_errors = []
 
   def _AddFix(self, tokens):
     """Adds the fix to the internal count.
@@ -84,13 +117,210 @@ class ErrorFixer(errorhandler.ErrorHandler):
       tokens: The token or sequence of tokens changed to fix an error.
     """
     self._file_fix_count += 1
-    if hasattr(tokens, 'line_number'):
-      self._file_changed_lines.add(tokens.line_number)
-    else:
-      for token in tokens:
-        self._file_changed_lines.add(token.line_number)
 
   def HandleError(self, error):
+    """Records the error, to be fixed once the whole file is checked.
+
+    Fixing errors as they are found would change the token stream while the
+    checker is still going through it, and the checker would then check the
+    inserted tokens as if they had been in the file all along.
+
+    Args:
+      error: The error object
+    """
+    self._file_errors.append(error)
+
+  def _GetEdits(self, error):
+    """Returns the parts of the token stream that fixing the error changes.
+
+    Args:
+      error: The error object.
+
+    Returns:
+      A list of edits, as returned by _TokenEdit, _InsertEdit and _LineEdits.
+    """
+    code = error.code
+    token = error.token
+    if not token:
+      return []
+
+    if code == errors.MISSING_SPACE:
+      if not error.position:
+        return []
+      elif error.position.IsAtBeginning():
+        return [_InsertEdit(token.previous)]
+      elif error.position.IsAtEnd(token.string):
+        return [_InsertEdit(token)]
+      return [_TokenEdit(token)]
+
+    elif code in (errors.MISSING_SEMICOLON_AFTER_FUNCTION,
+                  errors.MISSING_SEMICOLON):
+      return [_InsertEdit(token)]
+
+    elif code in (errors.ILLEGAL_SEMICOLON_AFTER_FUNCTION,
+                  errors.REDUNDANT_SEMICOLON,
+                  errors.COMMA_AT_END_OF_LITERAL,
+                  errors.EXTRA_LINE):
+      edits = [_TokenEdit(token), _InsertEdit(token)]
+      if token.previous:
+        edits.append(_InsertEdit(token.previous))
+      return edits
+
+    elif code in (errors.INVALID_JSDOC_TAG,
+                  errors.JSDOC_TAG_DESCRIPTION_ENDS_WITH_INVALID_CHARACTER,
+                  errors.INVALID_AUTHOR_TAG_DESCRIPTION):
+      return [_TokenEdit(token)]
+
+    elif code == errors.EXTRA_SPACE and error.position:
+      return [_TokenEdit(token)]
+
+    elif code == errors.MISSING_LINE:
+      if error.position.IsAtBeginning():
+        return [_InsertEdit(token.previous)]
+      return [_InsertEdit(token)]
+
+    elif (code == errors.WRONG_INDENTATION and
+          not FLAGS.disable_indentation_fixing):
+      token = tokenutil.GetFirstTokenInSameLine(token)
+      if (token.type in (Type.WHITESPACE, Type.PARAMETERS) and
+          error.position.start != 0):
+        return [_TokenEdit(token)]
+      return [_InsertEdit(token.previous)]
+
+    elif code == errors.UNNECESSARY_DOUBLE_QUOTED_STRING:
+      end_quote = tokenutil.Search(token, Type.DOUBLE_QUOTE_STRING_END)
+      if end_quote:
+        return [_TokenEdit(token), _TokenEdit(end_quote)]
+      return []
+
+    elif code == errors.WRONG_BLANK_LINE_COUNT:
+      return _LineEdits(token.line_number - abs(error.fix_data),
+                        token.line_number)
+
+    elif code in (errors.GOOG_REQUIRES_NOT_ALPHABETIZED,
+                  errors.GOOG_PROVIDES_NOT_ALPHABETIZED):
+      # The statements are moved around, along with the comments before them.
+      first_token = error.fix_data
+      last_token = first_token
+      iterator = first_token
+      while iterator:
+        if iterator.type == Type.IDENTIFIER:
+          if iterator.string not in ('goog.provide', 'goog.require'):
+            break
+          last_token = iterator
+        iterator = iterator.next
+      return _LineEdits(1, last_token.line_number)
+
+    elif code in (errors.MISSING_GOOG_PROVIDE, errors.MISSING_GOOG_REQUIRE):
+      if token.previous:
+        return [_InsertEdit(token.previous)]
+      return _LineEdits(token.line_number, token.line_number)
+
+    elif code in (errors.JSDOC_PREFER_QUESTION_TO_PIPE_NULL,
+                  errors.JSDOC_MISSING_OPTIONAL_TYPE,
+                  errors.MISSING_BRACES_AROUND_TYPE,
+                  errors.UNNECESSARY_BRACES_AROUND_INHERIT_DOC,
+                  errors.MALFORMED_END_OF_SCOPE_COMMENT,
+                  errors.MISSING_END_OF_SCOPE_COMMENT,
+                  errors.EXTRA_GOOG_PROVIDE,
+                  errors.EXTRA_GOOG_REQUIRE):
+      # Fixes that may change several tokens on the line.
+      return _LineEdits(token.line_number, token.line_number)
+
+    # Errors that are not fixed, or are fixed by how the file is written out.
+    return []
+
+  def _GetAlignedColumns(self):
+    """Returns where on each line the lines after it may be lined up with.
+
+    Lines continuing a statement may be indented to line up with a bracket,
+    'return', '?' or assignment before them in the statement.  The checker
+    works out which indentations are right from where those tokens were, so
+    fixes that move them can make it wrong, or right.
+
+    Returns:
+      A dictionary from the number of each line followed by a line continuing
+      its statement to the start index of the last such token on it.
+    """
+    continuation_lines = set()
+    last_line_number = None
+    token = self._file_token
+    while token:
+      if token.IsCode() and token.line_number != last_line_number:
+        last_line_number = token.line_number
+        context = token.metadata and token.metadata.context
+        while context and context.type not in (Context.STATEMENT, Context.VAR):
+          context = context.parent
+        if (context and context.start_token and
+            context.start_token.line_number < token.line_number):
+          continuation_lines.add(token.line_number)
+      token = token.next
+
+    columns = {}
+    token = self._file_token
+    while token:
+      if (token.line_number + 1 in continuation_lines and
+          (token.type in (Type.START_PAREN, Type.START_PARAMETERS,
+                          Type.START_BRACKET) or
+           token.string in ('return', '?') or token.IsAssignment())):
+        columns[token.line_number] = token.start_index
+      token = token.next
+    return columns
+
+  def _FixErrors(self):
+    """Fixes the errors found in the file, leaving overlapping ones for later.
+
+    An error is only fixed if fixing it changes none of the tokens changed to
+    fix an earlier error, inserts no tokens where an earlier fix did, and
+    touches no lines that an earlier fix may change as a whole.
+
+    Returns:
+      Whether the file needs to be checked again, because some errors were
+      left unfixed or a fix moved tokens that lines after them may be lined
+      up with.
+    """
+    edited = set()
+    edited_lines = set()
+    whole_lines = set()
+    needs_check = False
+
+    # Work out what each fix changes before the line numbers change.
+    aligned_columns = self._GetAlignedColumns()
+    errors_and_edits = [(error, self._GetEdits(error))
+                        for error in self._file_errors]
+    for error, edits in errors_and_edits:
+      overlaps = False
+      for kind, token_id, line_number in edits:
+        if line_number in whole_lines:
+          overlaps = True
+        elif kind == 'line':
+          overlaps = line_number in edited_lines
+        else:
+          overlaps = (kind, token_id) in edited
+        if overlaps:
+          break
+      if overlaps:
+        needs_check = True
+        continue
+
+      for kind, token_id, line_number in edits:
+        edited_lines.add(line_number)
+        if kind == 'line':
+          whole_lines.add(line_number)
+        else:
+          edited.add((kind, token_id))
+        if kind == 'line' and line_number in aligned_columns:
+          needs_check = True
+      if (error.code in _COLUMN_CHANGING_CODES and error.token and
+          error.token.start_index <= aligned_columns.get(
+              error.token.line_number, -1)):
+        needs_check = True
+      self._FixError(error)
+
+    self._file_errors = []
+    return needs_check
+
+  def _FixError(self, error):
     """Attempts to fix the error.
 
     Args:
@@ -208,16 +438,12 @@ class ErrorFixer(errorhandler.ErrorHandler):
     elif code == errors.UNNECESSARY_DOUBLE_QUOTED_STRING:
       end_quote = tokenutil.Search(token, Type.DOUBLE_QUOTE_STRING_END)
       if end_quote:
-        single_quote_start = Token(
-            "'", Type.SINGLE_QUOTE_STRING_START, token.line, token.line_number)
-        single_quote_end = Token(
-            "'", Type.SINGLE_QUOTE_STRING_START, end_quote.line,
-            token.line_number)
-
-        tokenutil.InsertTokenAfter(single_quote_start, token)
-        tokenutil.InsertTokenAfter(single_quote_end, end_quote)
-        tokenutil.DeleteToken(token)
-        tokenutil.DeleteToken(end_quote)
+        # Change the quotes in place, so that fixes inserting tokens after
+        # them still apply.
+        token.string = "'"
+        token.type = Type.SINGLE_QUOTE_STRING_START
+        end_quote.string = "'"
+        end_quote.type = Type.SINGLE_QUOTE_STRING_END
         self._AddFix([token, end_quote])
 
     elif code == errors.MISSING_BRACES_AROUND_TYPE:
@@ -306,7 +532,8 @@ class ErrorFixer(errorhandler.ErrorHandler):
       expected = error.position.length
 
       if token.type in (Type.WHITESPACE, Type.PARAMETERS) and actual != 0:
-        token.string = token.string.lstrip() + (' ' * expected)
+        # A PARAMETERS token starts with the indentation of its line.
+        token.string = (' ' * expected) + token.string.lstrip()
         self._AddFix([token])
       else:
         # We need to add indentation.
@@ -415,32 +642,79 @@ class ErrorFixer(errorhandler.ErrorHandler):
         Token(';', Type.SEMICOLON, line_text, line_number)
         ]
 
+  def _GetLines(self):
+    """Returns the lines of the file as the token stream now has them.
+
+    Returns:
+      A list of lines, each ending with a newline.
+    """
+    lines = []
+    line = []
+    token = self._file_token
+    while token:
+      line.append(token.string)
+      if token.IsLastInLine():
+        line.append('\n')
+        lines.append(''.join(line))
+        line = []
+      token = token.next
+    return lines
+
+  def _CheckAgain(self, lines):
+    """Checks the fixed file again, recording the errors still left.
+
+    Args:
+      lines: The lines of the fixed file.
+    """
+    error_accumulator = erroraccumulator.ErrorAccumulator()
+    style_checker = checker.JavaScriptStyleChecker(error_accumulator,
+                                                   self._namespaces_index)
+    self._file_token = style_checker.Tokenize(lines)
+    style_checker.CheckTokens(self._file_name, self._file_token, False)
+    self._file_errors = error_accumulator.GetErrors()
+
   def FinishFile(self):
     """Called when the current file has finished style checking.
 
-    Used to go back and fix any errors in the file.
+    Used to go back and fix any errors in the file.  Once fixed, the file is
+    checked and fixed again until no more errors can be fixed, so that
+    running the fixer again would not change it.
     """
-    if self._file_fix_count:
+    if not self._file_token:
+      return
+
+    # Remember which lines were already too long, so as to only warn about
+    # lines that are made too long.
+    long_lines = set()
+    token = self._file_token
+    while token:
+      if token.IsFirstInLine() and len(token.line.rstrip('\n')) > 80:
+        long_lines.add(token.line.rstrip('\n'))
+      token = token.next
+
+    lines = None
+    for unused_pass in xrange(_MAX_PASSES):
+      fix_count = self._file_fix_count
+      needs_check = self._FixErrors()
+      if self._file_fix_count == fix_count:
+        break
+      lines = self._GetLines()
+      if not needs_check:
+        break
+      self._CheckAgain(lines)
+
+    if lines is not None:
       f = self._external_file
       if not f:
         print 'Fixed %d errors in %s' % (self._file_fix_count, self._file_name)
         f = open(self._file_name, 'w')
 
-      token = self._file_token
-      char_count = 0
-      while token:
-        f.write(token.string)
-        char_count += len(token.string)
-
-        if token.IsLastInLine():
-          f.write('\n')
-          if char_count > 80 and token.line_number in self._file_changed_lines:
-            print 'WARNING: Line %d of %s is now longer than 80 characters.' % (
-                token.line_number, self._file_name)
-
-          char_count = 0
-
-        token = token.next
+      f.writelines(lines)
+      for line_number, line in enumerate(lines):
+        line = line.rstrip('\n')
+        if len(line) > 80 and line not in long_lines:
+          print 'WARNING: Line %d of %s is now longer than 80 characters.' % (
+              line_number + 1, self._file_name)
 
       if not self._external_file:
         # Close the file if we created it
@@ -67,6 +67,7 @@ MISSING_GOOG_REQUIRE = 142
 MISSING_GOOG_PROVIDE = 143
 EXTRA_GOOG_REQUIRE = 144
 EXTRA_GOOG_PROVIDE = 145
+UNKNOWN_GOOG_REQUIRE = 146
 
 # JsDoc
 INVALID_JSDOC_TAG = 200
@@ -139,4 +140,5 @@ NEW_ERRORS = frozenset([
     MALFORMED_END_OF_SCOPE_COMMENT,
     UNUSED_PRIVATE_MEMBER,
     # Errors added after 2.3.5:
+    UNKNOWN_GOOG_REQUIRE,
     ])
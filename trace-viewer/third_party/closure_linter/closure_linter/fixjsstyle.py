@@ -24,12 +24,10 @@ import sys
 import gflags as flags
 from closure_linter import checker
 from closure_linter import error_fixer
+from closure_linter import namespacesindex
 from closure_linter.common import simplefileflags as fileflags
 
 FLAGS = flags.FLAGS
-flags.DEFINE_list('additional_extensions', None, 'List of additional file '
-                  'extensions (not js) that should be treated as '
-                  'JavaScript files.')
 
 
 def main(argv = None):
@@ -47,7 +45,16 @@ def main(argv = None):
 
   files = fileflags.GetFileList(argv, 'JavaScript', suffixes)
 
-  style_checker = checker.JavaScriptStyleChecker(error_fixer.ErrorFixer())
+  # Fix files against the same index gjslint checks them against, so that
+  # the requires it adds are the ones gjslint asks for.
+  namespaces_index = None
+  if FLAGS.index_namespaces:
+    namespaces_index = namespacesindex.BuildIndex(
+        files + namespacesindex.GetIndexPaths(FLAGS.namespaces_index_paths))
+
+  style_checker = checker.JavaScriptStyleChecker(
+      error_fixer.ErrorFixer(namespaces_index=namespaces_index),
+      namespaces_index)
 
   # Check the list of files.
   for filename in files:
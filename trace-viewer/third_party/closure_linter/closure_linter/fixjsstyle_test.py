@@ -24,6 +24,7 @@ import gflags as flags
 import unittest as googletest
 from closure_linter import checker
 from closure_linter import error_fixer
+from closure_linter import namespacesindex
 
 _RESOURCE_PREFIX = 'closure_linter/testdata'
 
@@ -222,14 +223,100 @@ class FixJsStyleTest(googletest.TestCase):
 
     self._AssertFixes(original, expected)
 
-  def _AssertFixes(self, original, expected):
+  def testParametersIndentation(self):
+    """Tests fixing the indentation of wrapped function parameters."""
+    original = [
+        'dummy.f = function(a, b,',
+        '   c, d) {',
+        '};',
+        ]
+
+    expected = [
+        'dummy.f = function(a, b,',
+        '    c, d) {',
+        '};',
+        ]
+
+    self._AssertFixes(original, expected)
+
+  def testSeveralFixesOnOneLine(self):
+    """Tests fixing errors on the same line and tokens all at once."""
+    original = [
+        'dummy.f = function() {',
+        '  var a=1',
+        '    var b = "b"',
+        '};',
+        ]
+
+    expected = [
+        'dummy.f = function() {',
+        '  var a = 1;',
+        "  var b = 'b';",
+        '};',
+        ]
+
+    self._AssertFixes(original, expected)
+
+  def testIndentationAlignedWithFixedLine(self):
+    """Tests fixing lines lined up with tokens that other fixes move."""
+    original = [
+        'dummy.f = function() {',
+        '    x.y( new Z(1,',
+        '              {a: 1,',
+        '               b: 2}));',
+        '};',
+        ]
+
+    expected = [
+        'dummy.f = function() {',
+        '  x.y(new Z(1,',
+        '      {a: 1,',
+        '        b: 2}));',
+        '};',
+        ]
+
+    self._AssertFixes(original, expected)
+
+  def testMissingRequiresIndexed(self):
+    """Tests that the requires added are those the namespaces index has."""
+    original = [
+        "goog.provide('dummy.Foo');",
+        '',
+        '',
+        '/**',
+        ' * @return {Object} A thing.',
+        ' */',
+        'dummy.Foo = function() {',
+        '  return dummy.c.Thing.create();',
+        '};',
+        ]
+
+    expected = [
+        "goog.provide('dummy.Foo');",
+        '',
+        "goog.require('dummy.c');",
+        '',
+        '',
+        '/**',
+        ' * @return {Object} A thing.',
+        ' */',
+        'dummy.Foo = function() {',
+        '  return dummy.c.Thing.create();',
+        '};',
+        ]
+
+    index = namespacesindex.NamespacesIndex()
+    index.AddFile('a.js', ['dummy.Foo', 'dummy.c'])
+    self._AssertFixes(original, expected, index)
+
+  def _AssertFixes(self, original, expected, namespaces_index=None):
     """Asserts that the error fixer corrects original to expected."""
     original = self._GetHeader() + original
     expected = self._GetHeader() + expected
 
     actual = StringIO.StringIO()
     style_checker = checker.JavaScriptStyleChecker(
-        error_fixer.ErrorFixer(actual))
+        error_fixer.ErrorFixer(actual, namespaces_index), namespaces_index)
     style_checker.CheckLines('testing.js', original, False)
     actual.seek(0)
 
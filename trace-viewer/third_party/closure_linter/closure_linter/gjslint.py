@@ -38,6 +38,7 @@ __author__ = ('robbyw@google.com (Robert Walker)',
 
 import functools
 import itertools
+import os
 import sys
 import time
 
@@ -45,6 +46,8 @@ import gflags as flags
 
 from closure_linter import checker
 from closure_linter import errorrecord
+from closure_linter import namespacesindex
+from closure_linter import resultcache
 from closure_linter.common import erroraccumulator
 from closure_linter.common import simplefileflags as fileflags
 
@@ -64,75 +67,193 @@ flags.DEFINE_boolean('check_html', False,
                      'Whether to check javascript in html files.')
 flags.DEFINE_boolean('summary', False,
                      'Whether to show an error count summary.')
-flags.DEFINE_list('additional_extensions', None, 'List of additional file '
-                  'extensions (not js) that should be treated as '
-                  'JavaScript files.')
 flags.DEFINE_boolean('multiprocess', False,
                      'Whether to parallalize linting using the '
-                     'multiprocessing module.  Disabled by default.')
+                     'multiprocessing module.  If not given, linting is '
+                     'parallelized when checking at least '
+                     '--multiprocess_min_files files on a machine with more '
+                     'than one CPU.')
+flags.DEFINE_integer('multiprocess_min_files', 16,
+                     'How many files to check before parallelizing linting '
+                     'by default.')
 
 
 GJSLINT_ONLY_FLAGS = ['--unix_mode', '--beep', '--nobeep', '--time',
-                      '--check_html', '--summary']
+                      '--check_html', '--summary', '--cache', '--nocache',
+                      '--multiprocess', '--nomultiprocess']
 
+# Flags that only apply to gjslint and take a value, which may be given as the
+# next argument.
+GJSLINT_ONLY_VALUE_FLAGS = ['--cache_dir', '--multiprocess_min_files']
 
-def _MultiprocessCheckPaths(paths):
+# The namespaces index in worker processes, set once when each worker starts
+# rather than sent along with every file to check.
+_worker_namespaces_index = None
+
+
+def _UseMultiprocessing(paths):
+  """Returns whether to lint the given paths over multiple processes.
+
+  Args:
+    paths: paths to check.
+
+  Returns:
+    The value of --multiprocess if given. Otherwise, whether there are enough
+    paths and CPUs for it to be worth starting worker processes.
+  """
+  if not multiprocessing:
+    return False
+  if FLAGS['multiprocess'].present:
+    return FLAGS.multiprocess
+  try:
+    cpu_count = multiprocessing.cpu_count()
+  except NotImplementedError:
+    return False
+  return cpu_count > 1 and len(paths) >= FLAGS.multiprocess_min_files
+
+
+def _GetFileSize(path):
+  try:
+    return os.path.getsize(path)
+  except OSError:
+    return 0
+
+
+def _SetWorkerNamespacesIndex(namespaces_index):
+  global _worker_namespaces_index
+  _worker_namespaces_index = namespaces_index
+
+
+def _CheckIndexedPath(index_and_path, result_cache=None):
+  """Run _CheckPath in a worker process.
+
+  Args:
+    index_and_path: A tuple of the index of the path in the list of paths to
+        check, and the path.
+    result_cache: Optional resultcache.ResultCache to check files against.
+
+  Returns:
+    A tuple of the index, and a list of (error_string, new_error) tuples for
+    any found errors, which are cheaper to send back than ErrorRecords.
+  """
+  index, path = index_and_path
+  records = _CheckPath(path, result_cache, _worker_namespaces_index)
+  return index, [(record.error_string, record.new_error) for record in records]
+
+
+def _MultiprocessCheckPaths(paths, result_cache=None, namespaces_index=None):
   """Run _CheckPath over mutltiple processes.
 
   Tokenization, passes, and checks are expensive operations.  Running in a
   single process, they can only run on one CPU/core.  Instead,
   shard out linting over all CPUs with multiprocessing to parallelize.
 
+  Files are handed out one at a time, largest first, so that a large file
+  started last doesn't leave the other processes idle while it finishes.
+  Errors are still yielded in the order of paths, as soon as all the files
+  before them are done.
+
   Args:
     paths: paths to check.
+    result_cache: Optional resultcache.ResultCache to check files against.
+    namespaces_index: Optional namespacesindex.NamespacesIndex to check
+        goog.require statements against.
 
   Yields:
     errorrecord.ErrorRecords for any found errors.
   """
-
-  pool = multiprocessing.Pool()
-
-  for results in pool.imap(_CheckPath, paths):
-    for record in results:
+  paths = list(paths)
+  try:
+    pool = multiprocessing.Pool(initializer=_SetWorkerNamespacesIndex,
+                                initargs=(namespaces_index,))
+  except OSError:
+    # No working multiprocessing here (e.g. no /dev/shm).
+    for record in _CheckPaths(paths, result_cache, namespaces_index):
       yield record
-
-  pool.close()
-  pool.join()
-
-
-def _CheckPaths(paths):
+    return
+
+  try:
+    indexed_paths = sorted(enumerate(paths),
+                           key=lambda item: -_GetFileSize(item[1]))
+    check_path = functools.partial(_CheckIndexedPath,
+                                   result_cache=result_cache)
+    done = {}
+    next_index = 0
+    for index, results in pool.imap_unordered(check_path, indexed_paths):
+      done[index] = results
+      while next_index in done:
+        path = paths[next_index]
+        for error_string, new_error in done.pop(next_index):
+          yield errorrecord.ErrorRecord(path, error_string, new_error)
+        next_index += 1
+    pool.close()
+  finally:
+    # Stops the workers early if the caller stopped iterating.
+    pool.terminate()
+    pool.join()
+
+
+def _CheckPaths(paths, result_cache=None, namespaces_index=None):
   """Run _CheckPath on all paths in one thread.
 
   Args:
     paths: paths to check.
+    result_cache: Optional resultcache.ResultCache to check files against.
+    namespaces_index: Optional namespacesindex.NamespacesIndex to check
+        goog.require statements against.
 
   Yields:
     errorrecord.ErrorRecords for any found errors.
   """
 
   for path in paths:
-    results = _CheckPath(path)
+    results = _CheckPath(path, result_cache, namespaces_index)
     for record in results:
       yield record
 
 
-def _CheckPath(path):
+def _CheckPath(path, result_cache=None, namespaces_index=None):
   """Check a path and return any errors.
 
   Args:
     path: paths to check.
+    result_cache: Optional resultcache.ResultCache. If it has the results for
+        the current contents of the file, they are returned without checking
+        it again.
+    namespaces_index: Optional namespacesindex.NamespacesIndex to check
+        goog.require statements against.
 
   Returns:
     A list of errorrecord.ErrorRecords for any found errors.
   """
 
+  contents = None
+  if result_cache:
+    try:
+      f = open(path)
+      try:
+        contents = f.read()
+      finally:
+        f.close()
+    except IOError:
+      # Let the checker report the missing file.
+      pass
+    else:
+      records = result_cache.Get(path, contents)
+      if records is not None:
+        return records
+
   error_accumulator = erroraccumulator.ErrorAccumulator()
-  style_checker = checker.JavaScriptStyleChecker(error_accumulator)
-  style_checker.Check(path)
+  style_checker = checker.JavaScriptStyleChecker(error_accumulator,
+                                                 namespaces_index)
+  style_checker.Check(path, contents)
 
   # Return any errors as error records.
   make_error_record = functools.partial(errorrecord.MakeErrorRecord, path)
-  return map(make_error_record, error_accumulator.GetErrors())
+  records = map(make_error_record, error_accumulator.GetErrors())
+  if contents is not None:
+    result_cache.Set(path, contents, records)
+  return records
 
 
 def _GetFilePaths(argv):
@@ -147,6 +268,42 @@ def _GetFilePaths(argv):
 # Error printing functions
 
 
+def _GetFixjsstyleArgs(argv):
+  """Returns the arguments to run fixjsstyle with to fix the errors found.
+
+  Args:
+    argv: The command line arguments gjslint was run with, not including the
+        program name.
+
+  Returns:
+    The arguments, without the flags that only apply to gjslint.
+  """
+  fix_args = []
+  skip_value = False
+  for arg in argv:
+    if skip_value:
+      skip_value = False
+      continue
+    name = arg.split('=', 1)[0]
+    if name in GJSLINT_ONLY_VALUE_FLAGS:
+      skip_value = '=' not in arg
+    elif name not in GJSLINT_ONLY_FLAGS:
+      fix_args.append(arg)
+  return fix_args
+
+
+def _PrintDuplicateProvides(namespaces_index):
+  """Warns about the namespaces that more than one file provides.
+
+  Args:
+    namespaces_index: The namespacesindex.NamespacesIndex of the files.
+  """
+  duplicates = namespaces_index.GetDuplicateProvides()
+  for namespace in sorted(duplicates):
+    sys.stderr.write('Warning: %s is provided by more than one file: %s\n' %
+                     (namespace, ', '.join(duplicates[namespace])))
+
+
 def _PrintFileSummary(paths, records):
   """Print a detailed summary of the number of errors in each file."""
 
@@ -235,10 +392,35 @@ def main(argv = None):
     suffixes += ['.html', '.htm']
   paths = fileflags.GetFileList(argv, 'JavaScript', suffixes)
 
-  if FLAGS.multiprocess:
-    records_iter = _MultiprocessCheckPaths(paths)
+  linter_version = None
+  if FLAGS.cache:
+    linter_version = resultcache.GetLinterVersion()
+
+  namespaces_index = None
+  if FLAGS.index_namespaces:
+    scan_cache = None
+    if FLAGS.cache:
+      scan_cache = namespacesindex.ScanCache(FLAGS.cache_dir, linter_version)
+    index_paths = paths + namespacesindex.GetIndexPaths(
+        FLAGS.namespaces_index_paths)
+    namespaces_index = namespacesindex.BuildIndex(
+        index_paths, scan_cache, _UseMultiprocessing(index_paths))
+    _PrintDuplicateProvides(namespaces_index)
+
+  result_cache = None
+  if FLAGS.cache:
+    lint_flags = resultcache.GetLintFlags()
+    if namespaces_index:
+      # Errors depend on what the other files provide, too.
+      lint_flags.append(('namespaces_index', namespaces_index.GetDigest()))
+    result_cache = resultcache.ResultCache(FLAGS.cache_dir, linter_version,
+                                           lint_flags)
+
+  if _UseMultiprocessing(paths):
+    records_iter = _MultiprocessCheckPaths(paths, result_cache,
+                                           namespaces_index)
   else:
-    records_iter = _CheckPaths(paths)
+    records_iter = _CheckPaths(paths, result_cache, namespaces_index)
 
   records_iter, records_iter_copy = itertools.tee(records_iter, 2)
   _PrintErrorRecords(records_iter_copy)
@@ -266,13 +448,7 @@ def main(argv = None):
 
     # Write out instructions for using fixjsstyle script to fix some of the
     # reported errors.
-    fix_args = []
-    for flag in sys.argv[1:]:
-      for f in GJSLINT_ONLY_FLAGS:
-        if flag.startswith(f):
-          break
-      else:
-        fix_args.append(flag)
+    fix_args = _GetFixjsstyleArgs(sys.argv[1:])
 
     print """
 Some of the errors reported by GJsLint may be auto-fixable using the script
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for checking many paths in gjslint."""
+
+
+
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+import unittest as googletest
+
+import gflags as flags
+from closure_linter import gjslint
+from closure_linter import namespacesindex
+
+FLAGS = flags.FLAGS
+
+
+class CheckPathsTest(googletest.TestCase):
+  """Tests for checking paths serially and over multiple processes."""
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    self._paths = []
+    # Files of different sizes, so that they are dispatched out of order.
+    for i, repeat in enumerate([1, 20, 3, 0, 10]):
+      path = os.path.join(self._dir, '%d.js' % i)
+      f = open(path, 'w')
+      f.write('var x%d = 1;\n' % i)
+      f.write('var y=2 ;\n' * repeat)
+      f.close()
+      self._paths.append(path)
+    self._paths.append(os.path.join(self._dir, 'missing.js'))
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def _GetRecords(self, records_iter):
+    return [(r.path, r.error_string, r.new_error) for r in records_iter]
+
+  def testMultiprocessMatchesSerial(self):
+    serial = self._GetRecords(gjslint._CheckPaths(self._paths))
+    self.assertTrue(serial)
+    self.assertEquals(
+        serial, self._GetRecords(gjslint._MultiprocessCheckPaths(self._paths)))
+
+  def testUseMultiprocessing(self):
+    if not gjslint.multiprocessing:
+      return
+    self.assertFalse(gjslint._UseMultiprocessing(self._paths[:1]))
+    if gjslint.multiprocessing.cpu_count() > 1:
+      paths = self._paths * FLAGS.multiprocess_min_files
+      self.assertTrue(gjslint._UseMultiprocessing(paths))
+
+  def testPrintDuplicateProvides(self):
+    index = namespacesindex.NamespacesIndex()
+    index.AddFile('a.js', ['a.A', 'b.B'])
+    index.AddFile('b.js', ['b.B'])
+    old_stderr = sys.stderr
+    sys.stderr = StringIO.StringIO()
+    try:
+      gjslint._PrintDuplicateProvides(index)
+      output = sys.stderr.getvalue()
+    finally:
+      sys.stderr = old_stderr
+    self.assertEquals(
+        'Warning: b.B is provided by more than one file: a.js, b.js\n', output)
+
+  def testGetFixjsstyleArgs(self):
+    self.assertEquals(
+        ['--strict', '-r', '../../src'],
+        gjslint._GetFixjsstyleArgs(
+            ['--cache', '--cache_dir', '/tmp/gjc', '--strict',
+             '--multiprocess_min_files', '4', '-r', '../../src']))
+    self.assertEquals(
+        ['--strict', 'a.js'],
+        gjslint._GetFixjsstyleArgs(
+            ['--cache_dir=/tmp/gjc', '--strict', '--multiprocess_min_files=4',
+             '--nobeep', 'a.js']))
+    # Flags that merely start like a gjslint only flag are kept.
+    self.assertEquals(
+        ['--cached_thing', 'a.js'],
+        gjslint._GetFixjsstyleArgs(['--cached_thing', 'a.js']))
+
+
+if __name__ == '__main__':
+  googletest.main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Checks a file again after it is edited, re-checking only what can change.
+
+IncrementalChecker keeps the tokens and errors of the last check of a file,
+along with copies of the checker's state before some of its statements.  When
+the file changes, it re-tokenizes and re-checks it starting from the last such
+statement before the first changed line.
+
+Statements inside blocks are used as well as top-level ones, since many files
+wrap all of their code in a single top-level call.
+"""
+
+import copy
+import StringIO
+import traceback
+
+import gflags as flags
+from closure_linter import checker
+from closure_linter import ecmametadatapass
+from closure_linter.common import erroraccumulator
+from closure_linter.common import htmlutil
+
+FLAGS = flags.FLAGS
+
+# The minimum number of lines between snapshots.  The state grows as the file
+# goes on, so copying it before every statement would make checking a file
+# from scratch much slower.
+_SNAPSHOT_INTERVAL = 50
+
+
+class _ErrorList(erroraccumulator.ErrorAccumulator):
+  """Error accumulator that can drop the errors found after some point."""
+
+  def Truncate(self, count):
+    """Drops all but the first count errors.
+
+    Args:
+      count: The number of errors to keep.
+    """
+    del self._errors[count:]
+
+
+class _Snapshot(object):
+  """The state of a check just before a statement.
+
+  Attributes:
+    line_index: The index of the line the statement starts on.
+    code_line_index: The index of the line of the first code token at or
+        after the start of the statement.  Checking the tokens before the
+        statement may have looked ahead as far as that token.
+    last_token: The last token before the statement.
+    context: The context of the metadata pass before the statement.  It and
+        its parents are shared with the token stream, not copied.
+    last_code: The last code token before the statement.
+    error_count: The number of errors found before the statement.
+    state: A copy of the state tracker and lint rules before the statement.
+  """
+
+  def __init__(self, line_index, code_line_index, last_token, context,
+               last_code, error_count, state):
+    self.line_index = line_index
+    self.code_line_index = code_line_index
+    self.last_token = last_token
+    self.context = context
+    self.last_code = last_code
+    self.error_count = error_count
+    self.state = state
+
+
+def _GetFirstChangedLine(old_lines, new_lines):
+  """Returns the index of the first line that differs between two versions.
+
+  Args:
+    old_lines: The lines of the old version.
+    new_lines: The lines of the new version.
+
+  Returns:
+    The index of the first differing line, or the length of the shorter
+    version if it is a prefix of the other.
+  """
+  for index, (old_line, new_line) in enumerate(zip(old_lines, new_lines)):
+    if old_line != new_line:
+      return index
+  return min(len(old_lines), len(new_lines))
+
+
+def _GetStartedStatement(token):
+  """Returns the statement that a token starts, if any.
+
+  Args:
+    token: A token that went through the metadata pass.
+
+  Returns:
+    The statement context that starts with the token, directly in a block, or
+    None.
+  """
+  context = token.metadata and token.metadata.context
+  while context and context.start_token is token:
+    if (context.type == ecmametadatapass.EcmaContext.STATEMENT and
+        context.parent.type in ecmametadatapass.EcmaContext.BLOCK_TYPES):
+      return context
+    context = context.parent
+  return None
+
+
+class IncrementalChecker(checker.JavaScriptStyleChecker):
+  """Checks one file over and over as it is edited.
+
+  Finds the same errors as checking each version of the file from scratch
+  with a JavaScriptStyleChecker.  Files are always checked from scratch when
+  --closurized_namespaces is given, since the dependency pass looks at the
+  whole file before any token is checked.
+  """
+
+  def __init__(self, filename):
+    """Initialize an IncrementalChecker object.
+
+    Args:
+      filename: The name of the file to check.
+    """
+    self._errors = _ErrorList()
+    checker.JavaScriptStyleChecker.__init__(self, self._errors)
+    self._filename = filename
+    self._is_html = filename.endswith('.html') or filename.endswith('.htm')
+    self._lines = None
+    self._line_modes = []
+    self._snapshots = []
+    self._resuming = False
+    # Lint rules keep some state from one file to the next, so each check
+    # from scratch starts with a copy of the initial state.
+    self._initial_state = self._CopyState(
+        (self._state_tracker, self._lint_rules))
+
+  def Update(self, source):
+    """Checks the current contents of the file.
+
+    Args:
+      source: The contents of the file, as a string.
+
+    Returns:
+      The list of common.error.Errors found in the file, in the order they
+      were found.
+    """
+    f = StringIO.StringIO(source)
+    if self._is_html:
+      lines = htmlutil.GetScriptLines(f)
+    else:
+      lines = f.readlines()
+
+    if lines != self._lines:
+      snapshot = None
+      if self._lines is not None:
+        snapshot = self._FindSnapshot(
+            _GetFirstChangedLine(self._lines, lines))
+      self._lines = lines
+      if not snapshot or not self._CheckFrom(snapshot):
+        self._CheckAll()
+      self._has_errors = bool(self._errors.GetErrors())
+
+    return list(self._errors.GetErrors())
+
+  def _FindSnapshot(self, first_changed_line):
+    """Finds the last snapshot that the rest of the file can be checked from.
+
+    Args:
+      first_changed_line: The index of the first line that changed.
+
+    Returns:
+      A _Snapshot, or None if the file has to be checked from scratch.
+    """
+    for snapshot in reversed(self._snapshots):
+      if snapshot.code_line_index < first_changed_line:
+        return snapshot
+    return None
+
+  def _CheckAll(self):
+    """Checks the whole file from scratch."""
+    self._errors.Truncate(0)
+    self._line_modes = []
+    self._snapshots = []
+    self._resuming = False
+    self._state_tracker, self._lint_rules = self._CopyState(
+        self._initial_state)
+    self.CheckTokens(self._filename, self.Tokenize(self._lines),
+                     self._is_html)
+
+  def _CheckFrom(self, snapshot):
+    """Checks the file from the statement before which a snapshot was taken.
+
+    Args:
+      snapshot: The _Snapshot to check from.
+
+    Returns:
+      False if the file has to be checked from scratch instead.
+    """
+    line_index = snapshot.line_index
+    self._errors.Truncate(snapshot.error_count)
+    del self._line_modes[line_index:]
+    self._snapshots = self._snapshots[:self._snapshots.index(snapshot)]
+
+    # Unlink the tokens being replaced, so that they are freed right away
+    # rather than left for the cyclic garbage collector.
+    old_token = snapshot.last_token.next
+    while old_token:
+      next_token = old_token.next
+      old_token.previous = old_token.next = None
+      old_token.metadata = old_token.attached_object = None
+      old_token = next_token
+    snapshot.last_token.next = None
+
+    token = self.Tokenize(self._lines[line_index:])
+    if not token:
+      return False
+    for new_token in token:
+      new_token.line_number += line_index
+    token.previous = snapshot.last_token
+    snapshot.last_token.next = token
+
+    # The snapshot is used again if a later edit starts after it, so continue
+    # from a copy of its state.
+    self._state_tracker, self._lint_rules = self._CopyState(snapshot.state)
+
+    # The contexts the statement is in end among the tokens checked again.
+    open_contexts = []
+    context = snapshot.context
+    while context.parent:
+      context.end_token = None
+      open_contexts.append(context)
+      context = context.parent
+
+    parse_error = None
+    try:
+      self._metadata_pass.Resume(snapshot.context, snapshot.last_code)
+      self._metadata_pass.Process(token)
+    except ecmametadatapass.ParseError, caught_parse_error:
+      if FLAGS.error_trace:
+        traceback.print_exc()
+      parse_error = caught_parse_error
+    except Exception:
+      return False
+
+    # Checking the tokens before the statement looked at where the blocks it
+    # is in end, so if one of them no longer ends those tokens must be checked
+    # again too.
+    for context in open_contexts:
+      if not context.end_token:
+        return False
+
+    self._resuming = True
+    self._CheckTokens(token, parse_error=parse_error,
+                      debug_tokens=FLAGS.debug_tokens)
+    return True
+
+  def Tokenize(self, lines_iter):
+    """Tokenizes the file, noting the tokenizer's mode at each line start.
+
+    Args:
+      lines_iter: An iterator that yields one line of the file at a time.
+
+    Returns:
+      The first token in the file.
+    """
+    return self._tokenizer.TokenizeFile(self._NoteModes(lines_iter))
+
+  def _NoteModes(self, lines_iter):
+    """Yields lines, noting the tokenizer's mode before each one.
+
+    Args:
+      lines_iter: An iterator that yields one line of the file at a time.
+
+    Yields:
+      The lines of the file.
+    """
+    for line in lines_iter:
+      self._line_modes.append(self._tokenizer.mode)
+      yield line
+
+  def _CopyState(self, state):
+    """Copies the state tracker and lint rules, which may refer to each other.
+
+    Args:
+      state: A (state tracker, lint rules) pair.
+
+    Returns:
+      A copy of the pair.  Tokens, and the checker the lint rules report
+      errors to, are shared with the original.
+    """
+    return copy.deepcopy(state, {id(self): self})
+
+  def _BeforeToken(self, token):
+    """Takes a snapshot before the token if it starts a statement.
+
+    Args:
+      token: The next token to check.
+    """
+    line_index = token.line_number - 1
+    if (not token.previous or not token.IsFirstInLine() or
+        self._namespaces_info or
+        self._line_modes[line_index] != self._line_modes[0]):
+      return
+    if (self._snapshots and
+        line_index - self._snapshots[-1].line_index < _SNAPSHOT_INTERVAL):
+      return
+    statement = _GetStartedStatement(token)
+    if not statement:
+      return
+
+    code_token = token
+    while code_token and not code_token.IsCode():
+      code_token = code_token.next
+    if code_token:
+      code_line_index = code_token.line_number - 1
+    else:
+      code_line_index = len(self._lines)
+
+    self._snapshots.append(_Snapshot(
+        line_index, code_line_index, token.previous,
+        statement.parent, token.metadata.last_code,
+        len(self._errors.GetErrors()),
+        self._CopyState((self._state_tracker, self._lint_rules))))
+
+  def _ExecutePass(self, token, pass_function, parse_error=None,
+                   debug_tokens=False):
+    """Like CheckerBase._ExecutePass, but continues from the restored state
+    rather than resetting it when checking from a snapshot."""
+    reset_state = not self._resuming
+    self._resuming = False
+    return checker.JavaScriptStyleChecker._ExecutePass(
+        self, token, pass_function, parse_error, debug_tokens,
+        reset_state=reset_state)
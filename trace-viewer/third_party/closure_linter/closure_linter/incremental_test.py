@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the incremental module."""
+
+
+
+import unittest as googletest
+
+from closure_linter import checker
+from closure_linter import incremental
+from closure_linter.common import erroraccumulator
+from closure_linter.common import erroroutput
+
+_FUNCTION = """
+/**
+ * Adds %(i)d.
+ * @param {number} x The number.
+ * @return {number} The sum.
+ */
+ns.add%(i)d = function(x) {
+  var y = x + %(i)d;
+  return y;
+};
+"""
+
+
+def _GetErrorStrings(errors):
+  return [erroroutput.GetErrorOutput(e) for e in errors]
+
+
+class IncrementalCheckerTest(googletest.TestCase):
+  """Tests for IncrementalChecker."""
+
+  def setUp(self):
+    self._lines = ('var ns = {};\n' +
+                   ''.join(_FUNCTION % {'i': i} for i in range(40))
+                  ).splitlines(True)
+    self._checker = incremental.IncrementalChecker('test.js')
+
+  def _Update(self):
+    source = ''.join(self._lines)
+    errors = self._checker.Update(source)
+
+    error_accumulator = erroraccumulator.ErrorAccumulator()
+    checker.JavaScriptStyleChecker(error_accumulator).Check('test.js', source)
+    self.assertEquals(_GetErrorStrings(error_accumulator.GetErrors()),
+                      _GetErrorStrings(errors))
+    return errors
+
+  def testSameErrorsAsFullCheck(self):
+    self._Update()
+    self._lines[298] = '  var y = x+1;\n'
+    self.assertTrue(self._Update())
+    self._lines[-3] = '  return y\n'
+    self._Update()
+    self._lines.insert(250, '  if (x) {\n')
+    self._Update()
+    self._lines.insert(200, '/*\n')
+    self._Update()
+    del self._lines[200:251]
+    self._Update()
+    self._lines[1:1] = ['\n', 'ns.x = 1;\n']
+    self._Update()
+    self._lines.append('ns.y=2;')
+    self._Update()
+
+  def testChecksFromLastStatementBeforeEdit(self):
+    self._lines[8] = '  var y = x+1;\n'
+    first_errors = self._Update()
+    self._lines[-3] = '  return y\n'
+    errors = self._Update()
+    self.assertEquals(len(first_errors) + 1, len(errors))
+    # Errors before the edit are kept, rather than found again.
+    self.assertTrue(errors[0] is first_errors[0])
+
+  def testUnchanged(self):
+    self._lines[8] = '  var y = x+1;\n'
+    errors = self._Update()
+    self.assertEquals(errors, self._Update())
+
+
+if __name__ == '__main__':
+  googletest.main()
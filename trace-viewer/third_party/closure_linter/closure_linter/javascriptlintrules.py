@@ -376,6 +376,13 @@ class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
               'Unnecessary goog.require: ' + namespace,
               token, position=Position.AtBeginning())
 
+        # Report goog.require statements that no file satisfies.
+        if namespaces_info.IsUnknownRequire(token):
+          self._HandleError(
+              errors.UNKNOWN_GOOG_REQUIRE,
+              'No file provides goog.require: ' + namespace,
+              token, position=Position.AtBeginning())
+
         # Report missing goog.require statements.
         if namespaces_info.IsLastRequire(token):
           missing_requires = namespaces_info.GetMissingRequires()
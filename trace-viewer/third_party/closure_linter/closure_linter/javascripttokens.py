@@ -96,6 +96,8 @@ class JavaScriptToken(tokens.Token):
     - All JsDoc flags: a parser.JsDocFlag object.
   """
 
+  __slots__ = ()
+
   def IsKeyword(self, keyword):
     """Tests if this token is the given keyword.
 
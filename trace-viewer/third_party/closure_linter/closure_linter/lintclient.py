@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Thin gjslint and fixjsstyle front ends that run them in lintdaemon.py.
+
+Takes the same arguments and flags as gjslint and fixjsstyle, and prints the
+same output and exits with the same code, but runs them in a long-running
+lintdaemon.py process which already has closure_linter loaded.  The daemon is
+started if it is not running.  If it cannot be reached, the command is run in
+this process instead.
+
+Only the standard library is imported here, so that starting the client is
+cheap.
+"""
+
+import errno
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# How long to wait for a newly started daemon to listen, in seconds.
+_START_TIMEOUT = 10
+
+# The environment variable that overrides the daemon's socket path.
+_SOCKET_PATH_VARIABLE = 'GJSLINT_DAEMON_SOCKET'
+
+
+def GetSocketPath():
+  """Returns the path of the Unix socket the daemon listens on.
+
+  Returns:
+    The value of $GJSLINT_DAEMON_SOCKET if set, otherwise a path in the
+    temporary directory specific to the current user.
+  """
+  if os.environ.get(_SOCKET_PATH_VARIABLE):
+    return os.environ[_SOCKET_PATH_VARIABLE]
+  return os.path.join(tempfile.gettempdir(),
+                      'gjslint-daemon-%d.sock' % os.getuid())
+
+
+def Connect(socket_path):
+  """Connects to the daemon.
+
+  Args:
+    socket_path: The path of the daemon's Unix socket.
+
+  Returns:
+    A connected socket, or None if no daemon is listening on the path.
+  """
+  sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    sock.connect(socket_path)
+  except socket.error, e:
+    sock.close()
+    if e.errno in (errno.ENOENT, errno.ECONNREFUSED):
+      return None
+    raise
+  return sock
+
+
+def _StartDaemon(socket_path):
+  """Starts a daemon in the background and waits for it to listen.
+
+  Args:
+    socket_path: The path of the Unix socket for the daemon to listen on.
+
+  Returns:
+    A socket connected to the daemon, or None if it did not start listening
+    in time.
+  """
+  daemon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'lintdaemon.py')
+  env = dict(os.environ)
+  # Let the daemon import the same closure_linter and gflags as this process.
+  env['PYTHONPATH'] = os.pathsep.join(path for path in sys.path if path)
+  devnull = open(os.devnull, 'r+')
+  try:
+    subprocess.Popen([sys.executable, daemon_path, '--socket', socket_path],
+                     stdin=devnull, stdout=devnull, stderr=devnull,
+                     close_fds=True, cwd='/', env=env,
+                     # Outlive the process group of the hook that started it.
+                     preexec_fn=os.setsid)
+  finally:
+    devnull.close()
+
+  deadline = time.time() + _START_TIMEOUT
+  while time.time() < deadline:
+    sock = Connect(socket_path)
+    if sock:
+      return sock
+    time.sleep(0.05)
+  return None
+
+
+def _Send(sock, command, args):
+  """Runs a command in the daemon, copying its output to this process's.
+
+  Args:
+    sock: A socket connected to the daemon.
+    command: The name of the command to run, 'gjslint' or 'fixjsstyle'.
+    args: The command line arguments, not including the program name.
+
+  Returns:
+    The command's exit code, or None if the daemon closed the connection
+    without running the command.
+  """
+  request = {'command': command, 'args': args, 'cwd': os.getcwd()}
+  output_received = False
+  try:
+    sock.sendall(json.dumps(request) + '\n')
+    responses = sock.makefile('rb')
+    for line in responses:
+      response = json.loads(line)
+      for name, stream in (('stdout', sys.stdout), ('stderr', sys.stderr)):
+        if name in response:
+          # Output is sent as bytes, one character per byte.
+          stream.write(response[name].encode('latin-1'))
+          output_received = True
+      if 'exit_code' in response:
+        return response['exit_code']
+  except socket.error:
+    pass
+  finally:
+    sock.close()
+
+  if output_received:
+    sys.stderr.write('The lint daemon exited before %s finished.\n' % command)
+    return 1
+  return None
+
+
+def Run(command, args, socket_path=None):
+  """Runs gjslint or fixjsstyle in the daemon, starting it if needed.
+
+  Args:
+    command: The name of the command to run, 'gjslint' or 'fixjsstyle'.
+    args: The command line arguments, not including the program name.
+    socket_path: The path of the daemon's Unix socket, or None for the
+        default.
+
+  Returns:
+    The command's exit code, or None if the daemon could not run it.
+  """
+  socket_path = socket_path or GetSocketPath()
+  sock = Connect(socket_path)
+  if sock:
+    exit_code = _Send(sock, command, args)
+    if exit_code is not None:
+      return exit_code
+    # The daemon exited without running the command, e.g. because
+    # closure_linter changed since it started.  Start a new one.
+
+  sock = _StartDaemon(socket_path)
+  if not sock:
+    return None
+  return _Send(sock, command, args)
+
+
+def _Main(command):
+  """Runs a command in the daemon with this process's arguments, and exits.
+
+  Args:
+    command: The name of the command to run, 'gjslint' or 'fixjsstyle'.
+  """
+  exit_code = Run(command, sys.argv[1:])
+  if exit_code is not None:
+    sys.exit(exit_code)
+
+  # No daemon; check the files in this process.
+  if command == 'gjslint':
+    from closure_linter import gjslint  # pylint: disable-msg=C6204
+    gjslint.main()
+  else:
+    from closure_linter import fixjsstyle  # pylint: disable-msg=C6204
+    fixjsstyle.main()
+
+
+def main():
+  """Main function, which runs gjslint."""
+  _Main('gjslint')
+
+
+def FixStyleMain():
+  """Main function for running fixjsstyle."""
+  _Main('fixjsstyle')
+
+
+if __name__ == '__main__':
+  main()
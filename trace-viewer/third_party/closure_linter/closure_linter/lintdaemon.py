@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long-running process that runs gjslint and fixjsstyle for lintclient.py.
+
+Starting Python, importing closure_linter and gflags and compiling the
+tokenizer's regular expressions take most of the time of a gjslint run on a
+single file.  The daemon does them once, then runs the command lines that
+clients send it over a Unix socket, one at a time.
+
+Each connection carries one JSON request line:
+  {"command": "gjslint", "args": ["--strict", "foo.js"], "cwd": "/src"}
+      Runs gjslint or fixjsstyle as if from the given directory with the given
+      arguments.  The response is any number of {"stdout": "..."} and
+      {"stderr": "..."} lines, with bytes sent as one character each,
+      followed by {"exit_code": 0}.
+  {"command": "stop"}
+      Stops the daemon.
+  Any lintserver.py request
+      Handled by a lintserver.LintServer shared by all connections.
+
+The daemon exits when it has been idle for --idle_timeout seconds, and
+instead of handling a request if any of the closure_linter or gflags sources
+changed since it started, so that clients start an up to date one.
+"""
+
+import errno
+import json
+import os
+import SocketServer
+import sys
+import traceback
+
+import gflags as flags
+from closure_linter import fixjsstyle
+from closure_linter import gjslint
+from closure_linter import lintclient
+from closure_linter import lintserver
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string('socket', None,
+                    'The Unix socket to listen on.  Defaults to '
+                    '$GJSLINT_DAEMON_SOCKET, or a per-user path in the '
+                    'temporary directory.')
+flags.DEFINE_integer('idle_timeout', 3600,
+                     'How many seconds to wait for a request before exiting.')
+flags.DEFINE_boolean('stop', False,
+                     'Stop the daemon listening on the socket, if any.')
+
+_COMMANDS = {
+    'gjslint': gjslint,
+    'fixjsstyle': fixjsstyle,
+}
+
+
+def _GetSourceModificationTimes():
+  """Returns the modification times of the closure_linter and gflags sources.
+
+  Returns:
+    A dictionary from the path of each source file loaded so far to its
+    modification time.
+  """
+  mtimes = {}
+  for name, module in sys.modules.items():
+    path = getattr(module, '__file__', None)
+    if not path or not (name.startswith('closure_linter') or
+                        name.startswith('gflags')):
+      continue
+    if path.endswith('.pyc') or path.endswith('.pyo'):
+      path = path[:-1]
+    try:
+      mtimes[path] = os.path.getmtime(path)
+    except OSError:
+      pass
+  return mtimes
+
+
+class _OutputWriter(object):
+  """File-like object that sends what is written to it to the client."""
+
+  def __init__(self, output_file, name):
+    """Initialize an _OutputWriter.
+
+    Args:
+      output_file: The file to write responses to.
+      name: The name of the stream, 'stdout' or 'stderr'.
+    """
+    self._output_file = output_file
+    self._name = name
+    self.softspace = 0
+
+  def write(self, s):
+    if isinstance(s, unicode):
+      s = s.encode('utf-8')
+    if s:
+      self._output_file.write(
+          json.dumps({self._name: s.decode('latin-1')}) + '\n')
+
+  def writelines(self, lines):
+    for line in lines:
+      self.write(line)
+
+  def flush(self):
+    self._output_file.flush()
+
+  def isatty(self):
+    return False
+
+
+class _RequestHandler(SocketServer.StreamRequestHandler):
+  """Handles the request on a connection to the daemon."""
+
+  # Buffer output rather than sending a packet for every line of it.
+  wbufsize = -1
+
+  def handle(self):
+    server = self.server
+    line = self.rfile.readline()
+    try:
+      request = json.loads(line)
+    except ValueError:
+      request = None
+    if not isinstance(request, dict):
+      self._Respond({'error': 'Invalid request: %r' % line})
+      return
+
+    if server.IsStale():
+      # Close the connection without responding, so the client starts a new
+      # daemon.
+      server.Stop()
+      return
+
+    command = request.get('command')
+    if command == 'stop':
+      server.Stop()
+      self._Respond({'exit_code': 0})
+    elif command in _COMMANDS:
+      exit_code = RunCommand(command, request.get('args', []),
+                             request.get('cwd', '/'), self.wfile)
+      self._Respond({'exit_code': exit_code})
+    elif command is None:
+      self._Respond(server.lint_server.HandleRequest(request))
+    else:
+      self._Respond({'error': 'Unknown command: %s' % command})
+
+  def _Respond(self, response):
+    self.wfile.write(json.dumps(response) + '\n')
+
+
+class LintDaemon(SocketServer.UnixStreamServer):
+  """Unix socket server that handles requests one at a time."""
+
+  def __init__(self, socket_path, idle_timeout=None):
+    """Initialize a LintDaemon, listening on the given socket.
+
+    Args:
+      socket_path: The path of the Unix socket to listen on.
+      idle_timeout: How many seconds to wait for a request before exiting
+          from ServeUntilStopped, or None to wait forever.
+    """
+    SocketServer.UnixStreamServer.__init__(self, socket_path, _RequestHandler)
+    os.chmod(socket_path, 0600)
+    self.timeout = idle_timeout
+    self.lint_server = lintserver.LintServer()
+    self._source_mtimes = _GetSourceModificationTimes()
+    self._stopped = False
+
+  def IsStale(self):
+    """Returns whether the code the daemon runs changed since it started."""
+    for path, mtime in self._source_mtimes.iteritems():
+      try:
+        if os.path.getmtime(path) != mtime:
+          return True
+      except OSError:
+        return True
+    return False
+
+  def Stop(self):
+    """Makes ServeUntilStopped return after the current request."""
+    self._stopped = True
+
+  def handle_timeout(self):
+    self.Stop()
+
+  def ServeUntilStopped(self):
+    """Handles requests until stopped or idle for too long."""
+    try:
+      while not self._stopped:
+        self.handle_request()
+    finally:
+      self.server_close()
+      try:
+        os.remove(self.server_address)
+      except OSError:
+        pass
+
+
+def _ResetFlags():
+  """Resets all flags to their defaults, as if they were never parsed."""
+  for flag in FLAGS.FlagDict().values():
+    # A multi flag that is still marked present appends its default to the
+    # values it was given instead of replacing them.
+    flag.present = 0
+    flag.Unparse()
+
+
+def RunCommand(command, args, cwd, output_file):
+  """Runs gjslint or fixjsstyle as if from the command line.
+
+  Flags are reset to their defaults afterwards, so that they don't carry over
+  to the next command.
+
+  Args:
+    command: The name of the command, 'gjslint' or 'fixjsstyle'.
+    args: The command line arguments, not including the program name.
+    cwd: The directory to run the command from.
+    output_file: File to write the command's output to, as responses.
+
+  Returns:
+    The command's exit code.
+  """
+  module = _COMMANDS[command]
+  old_argv, old_stdout, old_stderr = sys.argv, sys.stdout, sys.stderr
+  old_main, old_cwd = sys.modules['__main__'], os.getcwd()
+  sys.argv = [command] + list(args)
+  # gflags takes the usage message for --help from the main module.
+  sys.modules['__main__'] = module
+  sys.stdout = _OutputWriter(output_file, 'stdout')
+  sys.stderr = _OutputWriter(output_file, 'stderr')
+  exit_code = 0
+  try:
+    try:
+      os.chdir(cwd)
+      module.main(FLAGS(sys.argv))
+    except SystemExit, e:
+      if e.code is None:
+        exit_code = 0
+      elif isinstance(e.code, int):
+        exit_code = e.code
+      else:
+        sys.stderr.write('%s\n' % e.code)
+        exit_code = 1
+    except flags.FlagsError, e:
+      sys.stderr.write('%s\nRun %s --help for the list of flags.\n' %
+                       (e, command))
+      exit_code = 1
+    except:  # Anything the command would have died of.
+      traceback.print_exc()
+      exit_code = 1
+  finally:
+    _ResetFlags()
+    sys.argv, sys.stdout, sys.stderr = old_argv, old_stdout, old_stderr
+    sys.modules['__main__'] = old_main
+    os.chdir(old_cwd)
+  return exit_code
+
+
+def _StopDaemon(socket_path):
+  """Stops the daemon listening on the given socket, if any."""
+  sock = lintclient.Connect(socket_path)
+  if sock:
+    try:
+      sock.sendall(json.dumps({'command': 'stop'}) + '\n')
+      sock.makefile('rb').readline()
+    finally:
+      sock.close()
+
+
+def main(argv=None):
+  """Main function.
+
+  Args:
+    argv: Sequence of command line arguments.
+  """
+  if argv is None:
+    argv = flags.FLAGS(sys.argv)
+
+  socket_path = FLAGS.socket or lintclient.GetSocketPath()
+  if FLAGS.stop:
+    _StopDaemon(socket_path)
+    return
+
+  sock = lintclient.Connect(socket_path)
+  if sock:
+    # Another daemon is already listening.
+    sock.close()
+    return
+  try:
+    os.remove(socket_path)
+  except OSError, e:
+    if e.errno != errno.ENOENT:
+      raise
+
+  daemon = LintDaemon(socket_path, FLAGS.idle_timeout)
+  # The daemon's own flags are read; commands start from the defaults.
+  _ResetFlags()
+  daemon.ServeUntilStopped()
+
+
+if __name__ == '__main__':
+  main()
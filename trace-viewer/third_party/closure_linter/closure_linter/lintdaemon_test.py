@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the lintdaemon module."""
+
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest as googletest
+
+from closure_linter import errors
+from closure_linter import lintclient
+from closure_linter import lintdaemon
+
+
+class LintDaemonTest(googletest.TestCase):
+  """Tests for LintDaemon."""
+
+  def setUp(self):
+    self._temp_dir = tempfile.mkdtemp()
+    self._socket_path = os.path.join(self._temp_dir, 'socket')
+    self._daemon = lintdaemon.LintDaemon(self._socket_path)
+    self._thread = threading.Thread(target=self._daemon.ServeUntilStopped)
+    self._thread.start()
+
+    self._js_path = os.path.join(self._temp_dir, 'a.js')
+    f = open(self._js_path, 'w')
+    f.write('var x = 1\n')
+    f.close()
+
+  def tearDown(self):
+    if self._thread.isAlive():
+      self._Request({'command': 'stop'})
+    self._thread.join()
+    shutil.rmtree(self._temp_dir)
+
+  def _Request(self, request):
+    """Sends a request to the daemon and returns the responses."""
+    sock = lintclient.Connect(self._socket_path)
+    try:
+      sock.sendall(json.dumps(request) + '\n')
+      return [json.loads(line) for line in sock.makefile('rb')]
+    finally:
+      sock.close()
+
+  def _RunCommand(self, command, args):
+    """Runs a command in the daemon and returns its exit code and output."""
+    responses = self._Request({'command': command, 'args': args,
+                               'cwd': self._temp_dir})
+    stdout = ''.join(r['stdout'] for r in responses if 'stdout' in r)
+    stderr = ''.join(r['stderr'] for r in responses if 'stderr' in r)
+    return responses[-1]['exit_code'], stdout, stderr
+
+  def testGjslint(self):
+    exit_code, stdout, _ = self._RunCommand('gjslint', ['--nobeep', 'a.js'])
+    self.assertNotEquals(0, exit_code)
+    self.assertTrue('----- FILE  :  %s -----' % self._js_path in stdout)
+    self.assertTrue('E:%04d' % errors.MISSING_SEMICOLON in stdout)
+
+    exit_code, stdout, _ = self._RunCommand(
+        'gjslint', ['--nobeep', '--unix_mode', 'a.js'])
+    self.assertNotEquals(0, exit_code)
+    self.assertFalse('----- FILE' in stdout)
+
+    # Flags from the last command don't carry over.
+    exit_code, stdout, _ = self._RunCommand('gjslint', ['a.js'])
+    self.assertTrue('----- FILE' in stdout)
+    self.assertTrue(chr(7) in stdout)
+
+    # Nor do multistring flags.
+    f = open(os.path.join(self._temp_dir, 'b.js'), 'w')
+    f.write('var x = 1;\n'
+            '/**\n'
+            ' * @return {number} One.\n'
+            ' */\n'
+            'function f() {\n'
+            '  return 1;\n'
+            '}\n')
+    f.close()
+    blank_lines_error = 'E:%04d' % errors.WRONG_BLANK_LINE_COUNT
+
+    _, stdout, _ = self._RunCommand(
+        'gjslint', ['--nobeep', '--jslint_error=all', 'b.js'])
+    self.assertTrue(blank_lines_error in stdout)
+
+    exit_code, stdout, _ = self._RunCommand('gjslint', ['--nobeep', 'b.js'])
+    self.assertEquals(0, exit_code)
+    self.assertFalse(blank_lines_error in stdout)
+
+  def testFixjsstyle(self):
+    exit_code, _, _ = self._RunCommand('fixjsstyle', ['a.js'])
+    self.assertEquals(0, exit_code)
+    self.assertEquals('var x = 1;\n', open(self._js_path).read())
+
+  def testBadFlag(self):
+    exit_code, stdout, stderr = self._RunCommand('gjslint', ['--bogus'])
+    self.assertEquals(1, exit_code)
+    self.assertEquals('', stdout)
+    self.assertTrue('bogus' in stderr)
+
+  def testLintServerRequest(self):
+    responses = self._Request({'path': 'b.js', 'contents': 'var y = 2\n'})
+    self.assertEquals(1, len(responses))
+    self.assertEquals(
+        [errors.MISSING_SEMICOLON],
+        [error['code'] for error in responses[0]['errors']])
+
+  def testStop(self):
+    self.assertEquals([{'exit_code': 0}], self._Request({'command': 'stop'}))
+    self._thread.join()
+    self.assertFalse(os.path.exists(self._socket_path))
+
+
+if __name__ == '__main__':
+  googletest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long-running linter for editors, checking files again as they are edited.
+
+Reads one JSON request per line from stdin and writes one JSON response per
+line to stdout.  Each file is checked with an incremental.IncrementalChecker,
+so only the part of a file after the first edit since the last request is
+checked again.
+
+Requests:
+  {"path": "foo.js", "contents": "..."}
+      Checks the file with the given contents, or its contents on disk if
+      "contents" is missing.
+  {"path": "foo.js", "close": true}
+      Forgets the file.
+
+Responses:
+  {"path": "foo.js", "errors": [{"line": 3, "code": 1, "message": "...",
+                                 "new_error": false,
+                                 "error_string": "Line 3, E:0001: ..."}]}
+      The errors found, in the order gjslint reports them.  "line" is null
+      for errors about the whole file.
+  {"path": "foo.js", "error": "..."}
+      If the request could not be handled.
+
+Flags are the same as gjslint's and apply to every file.
+"""
+
+import json
+import sys
+
+import gflags as flags
+from closure_linter import errors
+from closure_linter import incremental
+from closure_linter.common import erroroutput
+
+
+class LintServer(object):
+  """Handles lint requests, keeping an IncrementalChecker per open file."""
+
+  def __init__(self):
+    """Initialize a LintServer with no open files."""
+    self._checkers = {}
+
+  def HandleRequest(self, request):
+    """Handles a single request.
+
+    Args:
+      request: The decoded JSON request.
+
+    Returns:
+      The response, to be encoded as JSON.
+    """
+    path = request.get('path')
+    if not isinstance(path, basestring):
+      return {'error': 'Missing "path".'}
+    response = {'path': path}
+
+    if request.get('close'):
+      self._checkers.pop(path, None)
+      response['errors'] = []
+      return response
+
+    contents = request.get('contents')
+    if contents is None:
+      try:
+        f = open(path)
+        try:
+          contents = f.read()
+        finally:
+          f.close()
+      except IOError, e:
+        self._checkers.pop(path, None)
+        response['error'] = str(e)
+        return response
+    elif isinstance(contents, unicode):
+      # Check the same bytes that gjslint would read from disk.
+      contents = contents.encode('utf-8')
+
+    if path not in self._checkers:
+      self._checkers[path] = incremental.IncrementalChecker(path)
+    response['errors'] = [_EncodeError(error)
+                          for error in self._checkers[path].Update(contents)]
+    return response
+
+  def Serve(self, input_file, output_file):
+    """Handles requests until the end of the input.
+
+    Args:
+      input_file: File to read requests from, one per line.
+      output_file: File to write responses to, one per line.
+    """
+    for line in iter(input_file.readline, ''):
+      if not line.strip():
+        continue
+      try:
+        request = json.loads(line)
+      except ValueError, e:
+        response = {'error': 'Invalid request: %s' % e}
+      else:
+        if isinstance(request, dict):
+          response = self.HandleRequest(request)
+        else:
+          response = {'error': 'Requests must be JSON objects.'}
+      output_file.write(json.dumps(response) + '\n')
+      output_file.flush()
+
+
+def _EncodeError(error):
+  """Returns the JSON representation of an error.
+
+  Args:
+    error: The common.error.Error to encode.
+
+  Returns:
+    A dictionary describing the error.
+  """
+  new_error = error.code in errors.NEW_ERRORS
+  line = None
+  if error.token:
+    line = error.token.line_number
+  return {
+      'line': line,
+      'code': error.code,
+      'message': error.message,
+      'new_error': new_error,
+      'error_string': erroroutput.GetErrorOutput(error, new_error)}
+
+
+def main(argv=None):
+  """Main function.
+
+  Args:
+    argv: Sequence of command line arguments.
+  """
+  if argv is None:
+    argv = flags.FLAGS(sys.argv)
+
+  LintServer().Serve(sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+  main()
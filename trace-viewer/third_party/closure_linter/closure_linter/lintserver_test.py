@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the lintserver module."""
+
+
+
+import json
+import os
+import StringIO
+import tempfile
+import unittest as googletest
+
+from closure_linter import errors
+from closure_linter import lintserver
+
+
+class LintServerTest(googletest.TestCase):
+  """Tests for LintServer."""
+
+  def _Serve(self, *requests):
+    input_file = StringIO.StringIO(
+        ''.join(json.dumps(request) + '\n' for request in requests))
+    output_file = StringIO.StringIO()
+    lintserver.LintServer().Serve(input_file, output_file)
+    return [json.loads(line) for line in output_file.getvalue().splitlines()]
+
+  def testCheckContents(self):
+    responses = self._Serve(
+        {'path': 'a.js', 'contents': 'var x = 1;\n'},
+        {'path': 'a.js', 'contents': 'var x = 1;\nvar y=2;\n'},
+        {'path': 'a.js', 'close': True})
+    self.assertEquals(3, len(responses))
+    self.assertEquals({'path': 'a.js', 'errors': []}, responses[0])
+    self.assertEquals({'path': 'a.js', 'errors': []}, responses[2])
+
+    self.assertEquals('a.js', responses[1]['path'])
+    error = responses[1]['errors'][0]
+    self.assertEquals(2, error['line'])
+    self.assertEquals(errors.MISSING_SPACE, error['code'])
+    self.assertEquals('Line 2, E:%04d: %s' % (error['code'], error['message']),
+                      error['error_string'])
+
+  def testCheckFileOnDisk(self):
+    fd, path = tempfile.mkstemp(suffix='.js')
+    try:
+      os.write(fd, 'var x = 1\n')
+      os.close(fd)
+      responses = self._Serve({'path': path})
+    finally:
+      os.remove(path)
+    self.assertEquals(
+        [errors.MISSING_SEMICOLON],
+        [error['code'] for error in responses[0]['errors']])
+
+    responses = self._Serve({'path': path})
+    self.assertTrue('error' in responses[0])
+
+  def testBadRequests(self):
+    input_file = StringIO.StringIO('{"path": \n[]\n{}\n')
+    output_file = StringIO.StringIO()
+    lintserver.LintServer().Serve(input_file, output_file)
+    responses = [json.loads(line)
+                 for line in output_file.getvalue().splitlines()]
+    self.assertEquals(3, len(responses))
+    for response in responses:
+      self.assertTrue('error' in response)
+
+
+if __name__ == '__main__':
+  googletest.main()
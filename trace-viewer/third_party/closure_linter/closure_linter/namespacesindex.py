@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index of the namespaces provided by the files of a project.
+
+The index is built once, before any file is checked, by scanning every file
+for its top level goog.provide statements.  It maps each namespace to the
+files that provide it.  Checking a file can then look up which namespaces the
+project actually provides, instead of guessing from the shape of an
+identifier, and report goog.require statements that nothing provides.
+"""
+
+import functools
+import hashlib
+import itertools
+import json
+import os
+import StringIO
+
+import gflags as flags
+
+from closure_linter import javascripttokenizer
+from closure_linter import javascripttokens
+from closure_linter.common import fileutil
+from closure_linter.common import htmlutil
+
+# Attempt import of multiprocessing (should be available in Python 2.6 and up).
+try:
+  # pylint: disable-msg=C6204
+  import multiprocessing
+except ImportError:
+  multiprocessing = None
+
+FLAGS = flags.FLAGS
+flags.DEFINE_boolean('index_namespaces', False,
+                     'Whether to index the goog.provide statements of all the '
+                     'files checked, and of --namespaces_index_paths, before '
+                     'checking them.  Missing goog.require statements are '
+                     'then only reported for namespaces that some file '
+                     'provides, and goog.require statements of namespaces '
+                     'that no file provides are reported.')
+flags.DEFINE_list('namespaces_index_paths', '',
+                  'Files and directories of .js files to add to the '
+                  'namespaces index without checking them, e.g. libraries '
+                  'the checked files depend on.')
+
+# pylint: disable-msg=C6409
+TokenType = javascripttokens.JavaScriptTokenType
+
+_HTML_SUFFIXES = ('.html', '.htm')
+
+
+def GetProvidedNamespaces(contents, is_html=False):
+  """Returns the namespaces a file provides.
+
+  Only statements outside of any block are counted, like the checker does for
+  goog.require statements in functions (e.g. dynamic loading in test runners).
+
+  Args:
+    contents: The contents of the file.
+    is_html: Whether the file is HTML, to only scan its scripts.
+
+  Returns:
+    The list of provided namespaces, in the order they appear in the file.
+  """
+  provides = []
+  if 'goog.provide' not in contents:
+    return provides
+
+  if is_html:
+    lines = htmlutil.GetScriptLines(StringIO.StringIO(contents))
+  else:
+    lines = contents.splitlines()
+
+  tokenizer = javascripttokenizer.JavaScriptTokenizer()
+  token = tokenizer.TokenizeFile(lines)
+  depth = 0
+  while token:
+    if token.type == TokenType.START_BLOCK:
+      depth += 1
+    elif token.type == TokenType.END_BLOCK:
+      depth -= 1
+    elif (token.type == TokenType.IDENTIFIER and not depth and
+          token.string == 'goog.provide'):
+      # The namespace is the first string before the end of the statement.
+      next_token = token.next
+      while next_token and next_token.type not in (TokenType.STRING_TEXT,
+                                                   TokenType.SEMICOLON,
+                                                   TokenType.END_PAREN):
+        next_token = next_token.next
+      if next_token and next_token.type == TokenType.STRING_TEXT:
+        provides.append(next_token.string)
+    token = token.next
+  return provides
+
+
+class NamespacesIndex(object):
+  """The namespaces provided by the files of a project, and by which files.
+
+  Instances are picklable, so that they can be passed to worker processes.
+  """
+
+  def __init__(self):
+    # Namespace -> paths of the files that provide it, in the order added.
+    self._providers = {}
+
+  def AddFile(self, path, namespaces):
+    """Adds the namespaces a file provides to the index.
+
+    Args:
+      path: The path of the file.
+      namespaces: The namespaces the file provides.
+    """
+    for namespace in namespaces:
+      providers = self._providers.setdefault(namespace, [])
+      if path not in providers:
+        providers.append(path)
+
+  def IsProvided(self, namespace):
+    """Returns whether any file provides the namespace."""
+    return namespace in self._providers
+
+  def GetProviders(self, namespace):
+    """Returns the paths of the files that provide the namespace."""
+    return list(self._providers.get(namespace, []))
+
+  def GetDuplicateProvides(self):
+    """Returns the namespaces that more than one file provides.
+
+    Returns:
+      A dict from each such namespace to the paths of the files providing it.
+    """
+    return dict((namespace, list(providers))
+                for namespace, providers in self._providers.iteritems()
+                if len(providers) > 1)
+
+  def GetProvidedPrefix(self, identifier):
+    """Returns the longest provided namespace an identifier is in.
+
+    Args:
+      identifier: A dotted identifier, e.g. 'goog.array.forEach'.
+
+    Returns:
+      The identifier itself or the longest of its dotted prefixes that some
+      file provides, or None if there is none.
+    """
+    parts = identifier.split('.')
+    while parts:
+      namespace = '.'.join(parts)
+      if namespace in self._providers:
+        return namespace
+      parts.pop()
+    return None
+
+  def GetDigest(self):
+    """Returns a hex string that changes whenever the provided namespaces do.
+
+    Which files provide a namespace does not change the errors found in a
+    file, so it is not part of the digest.
+    """
+    digest = hashlib.sha1()
+    for namespace in sorted(self._providers):
+      digest.update(namespace)
+      digest.update('\0')
+    return digest.hexdigest()
+
+
+class ScanCache(object):
+  """The namespaces each file provides, stored as one JSON file per entry.
+
+  Entries are keyed by a hash of the file's contents and the linter's source,
+  so a file is only scanned again after one of those changes.  Instances are
+  picklable, so that they can be passed to worker processes.
+  """
+
+  def __init__(self, cache_dir, linter_version):
+    """Initialize a cache for the current linter version.
+
+    Args:
+      cache_dir: The directory to keep the cache in. Created if missing.
+      linter_version: A string identifying the linter's source, e.g.
+          resultcache.GetLinterVersion().
+    """
+    self._cache_dir = cache_dir
+    self._key_prefix = 'provides\0%s\0' % linter_version
+
+  def _GetEntryPath(self, contents, is_html):
+    digest = hashlib.sha1(self._key_prefix)
+    digest.update('html\0' if is_html else 'js\0')
+    digest.update(contents)
+    return os.path.join(self._cache_dir, digest.hexdigest())
+
+  def Get(self, contents, is_html=False):
+    """Returns the cached provided namespaces of a file.
+
+    Args:
+      contents: The contents of the file.
+      is_html: Whether the file is HTML.
+
+    Returns:
+      The list of provided namespaces, or None if nothing is cached.
+    """
+    try:
+      f = open(self._GetEntryPath(contents, is_html), 'r')
+    except IOError:
+      return None
+    try:
+      provides = json.load(f)
+    except ValueError:
+      return None
+    finally:
+      f.close()
+    return [namespace.encode('utf-8') for namespace in provides]
+
+  def Set(self, contents, is_html, provides):
+    """Caches the provided namespaces of a file.
+
+    Failing to write the cache is not an error; the file will just be scanned
+    again next time.
+
+    Args:
+      contents: The contents of the file.
+      is_html: Whether the file is HTML.
+      provides: The namespaces the file provides.
+    """
+    try:
+      if not os.path.isdir(self._cache_dir):
+        os.makedirs(self._cache_dir)
+      fileutil.WriteAtomically(self._GetEntryPath(contents, is_html),
+                               json.dumps(provides))
+    except (IOError, OSError):
+      pass
+
+
+def _ScanPath(path, scan_cache=None):
+  """Returns the namespaces a file provides.
+
+  Args:
+    path: The path of the file.
+    scan_cache: Optional ScanCache to look the file's namespaces up in.
+
+  Returns:
+    The list of provided namespaces, or None if the file can't be read.
+  """
+  try:
+    f = open(path)
+    try:
+      contents = f.read()
+    finally:
+      f.close()
+  except IOError:
+    # The checker reports files it can't read.
+    return None
+
+  is_html = path.endswith(_HTML_SUFFIXES)
+  provides = None
+  if scan_cache:
+    provides = scan_cache.Get(contents, is_html)
+  if provides is None:
+    provides = GetProvidedNamespaces(contents, is_html)
+    if scan_cache:
+      scan_cache.Set(contents, is_html, provides)
+  return provides
+
+
+def GetIndexPaths(paths):
+  """Returns the files to index for the given files and directories.
+
+  Args:
+    paths: Paths of files, and of directories to index all .js files under.
+
+  Returns:
+    A list of paths of files.
+  """
+  result = []
+  for path in paths:
+    if os.path.isdir(path):
+      for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        result.extend(os.path.join(dirpath, filename)
+                      for filename in sorted(filenames)
+                      if filename.endswith('.js'))
+    else:
+      result.append(path)
+  return result
+
+
+def BuildIndex(paths, scan_cache=None, use_multiprocessing=False):
+  """Builds the namespaces index of a list of files.
+
+  Args:
+    paths: The paths of the files to index.
+    scan_cache: Optional ScanCache to look the files' namespaces up in.
+    use_multiprocessing: Whether to scan the files over multiple processes.
+
+  Returns:
+    A NamespacesIndex.
+  """
+  scan_path = functools.partial(_ScanPath, scan_cache=scan_cache)
+  pool = None
+  if use_multiprocessing and multiprocessing:
+    try:
+      pool = multiprocessing.Pool()
+    except OSError:
+      # No working multiprocessing here (e.g. no /dev/shm).
+      pass
+
+  index = NamespacesIndex()
+  try:
+    if pool:
+      results = pool.imap(scan_path, paths, chunksize=16)
+    else:
+      results = itertools.imap(scan_path, paths)
+    for path, provides in itertools.izip(paths, results):
+      if provides:
+        index.AddFile(path, provides)
+    if pool:
+      pool.close()
+  finally:
+    if pool:
+      pool.terminate()
+      pool.join()
+  return index
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the namespacesindex module."""
+
+
+
+import os
+import shutil
+import tempfile
+import unittest as googletest
+
+from closure_linter import namespacesindex
+
+_FOO_JS = """goog.provide('package.Foo');
+goog.provide('package.Foo.Bar');
+
+goog.require('goog.array');
+goog.require('package.Missing');
+
+package.Foo = function() {
+  goog.require('package.Dynamic');
+};
+"""
+
+
+class GetProvidedNamespacesTest(googletest.TestCase):
+  """Tests for GetProvidedNamespaces."""
+
+  def testTopLevelStatements(self):
+    self.assertEquals(['package.Foo', 'package.Foo.Bar'],
+                      namespacesindex.GetProvidedNamespaces(_FOO_JS))
+
+  def testNoStatements(self):
+    self.assertEquals([],
+                      namespacesindex.GetProvidedNamespaces('var x = 1;\n'))
+    self.assertEquals([], namespacesindex.GetProvidedNamespaces(
+        'goog.provide(namespace);\n'))
+
+  def testHtml(self):
+    html = ('<p>goog.provide(\'package.NotScript\');</p>\n'
+            '<script>\n'
+            'goog.provide(\'package.Foo\');\n'
+            '</script>\n')
+    self.assertEquals(['package.Foo'], namespacesindex.GetProvidedNamespaces(
+        html, is_html=True))
+
+
+class NamespacesIndexTest(googletest.TestCase):
+  """Tests for NamespacesIndex."""
+
+  def setUp(self):
+    self._index = namespacesindex.NamespacesIndex()
+    self._index.AddFile('foo.js', ['package.Foo'])
+    self._index.AddFile('bar.js', ['package.bar'])
+
+  def testIsProvided(self):
+    self.assertTrue(self._index.IsProvided('package.Foo'))
+    self.assertTrue(self._index.IsProvided('package.bar'))
+    self.assertFalse(self._index.IsProvided('package.Missing'))
+    self.assertFalse(self._index.IsProvided('package'))
+
+  def testGetProvidedPrefix(self):
+    self.assertEquals('package.Foo',
+                      self._index.GetProvidedPrefix('package.Foo'))
+    self.assertEquals('package.Foo',
+                      self._index.GetProvidedPrefix('package.Foo.Enum.A'))
+    self.assertEquals(None, self._index.GetProvidedPrefix('package.baz.f'))
+
+  def testGetProviders(self):
+    self.assertEquals(['foo.js'], self._index.GetProviders('package.Foo'))
+    self.assertEquals([], self._index.GetProviders('package.Missing'))
+    self.assertEquals({}, self._index.GetDuplicateProvides())
+
+    self._index.AddFile('foo.js', ['package.Foo'])
+    self.assertEquals({}, self._index.GetDuplicateProvides())
+    self._index.AddFile('foo2.js', ['package.Foo'])
+    self.assertEquals(['foo.js', 'foo2.js'],
+                      self._index.GetProviders('package.Foo'))
+    self.assertEquals({'package.Foo': ['foo.js', 'foo2.js']},
+                      self._index.GetDuplicateProvides())
+
+  def testGetDigest(self):
+    digest = self._index.GetDigest()
+    self._index.AddFile('foo2.js', ['package.Foo'])
+    self.assertEquals(digest, self._index.GetDigest())
+    self._index.AddFile('baz.js', ['package.baz'])
+    self.assertNotEquals(digest, self._index.GetDigest())
+
+
+class BuildIndexTest(googletest.TestCase):
+  """Tests for BuildIndex and ScanCache."""
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    self._cache_dir = os.path.join(self._dir, 'cache')
+    self._foo_path = os.path.join(self._dir, 'src', 'foo.js')
+    os.mkdir(os.path.dirname(self._foo_path))
+    f = open(self._foo_path, 'w')
+    try:
+      f.write(_FOO_JS)
+    finally:
+      f.close()
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def testBuildIndex(self):
+    paths = namespacesindex.GetIndexPaths([os.path.join(self._dir, 'src'),
+                                           os.path.join(self._dir, 'gone.js')])
+    self.assertEquals([self._foo_path, os.path.join(self._dir, 'gone.js')],
+                      paths)
+    for use_multiprocessing in (False, True):
+      index = namespacesindex.BuildIndex(paths,
+                                         use_multiprocessing=use_multiprocessing)
+      self.assertTrue(index.IsProvided('package.Foo'))
+      self.assertTrue(index.IsProvided('package.Foo.Bar'))
+      self.assertFalse(index.IsProvided('package.Missing'))
+      self.assertEquals([self._foo_path],
+                        index.GetProviders('package.Foo.Bar'))
+
+  def testScanCache(self):
+    cache = namespacesindex.ScanCache(self._cache_dir, '1')
+    self.assertEquals(None, cache.Get(_FOO_JS))
+
+    index = namespacesindex.BuildIndex([self._foo_path], cache)
+    self.assertEquals(['package.Foo', 'package.Foo.Bar'], cache.Get(_FOO_JS))
+    self.assertEquals(None, cache.Get(_FOO_JS, is_html=True))
+    self.assertEquals(
+        None, namespacesindex.ScanCache(self._cache_dir, '2').Get(_FOO_JS))
+
+    # The cached namespaces are used instead of scanning the file again.
+    cache.Set(_FOO_JS, False, ['package.Cached'])
+    index = namespacesindex.BuildIndex([self._foo_path], cache)
+    self.assertTrue(index.IsProvided('package.Cached'))
+    self.assertFalse(index.IsProvided('package.Foo'))
+
+
+if __name__ == '__main__':
+  googletest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-disk cache of the errors found in each file.
+
+Results are keyed by a hash of the file's path and contents, the linter's
+source and the values of the flags that can change what is reported, so a file
+is only checked again after one of those changes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import gflags as flags
+
+from closure_linter import errorrecord
+from closure_linter.common import fileutil
+
+FLAGS = flags.FLAGS
+flags.DEFINE_boolean('cache', False,
+                     'Whether to cache the errors found in each file, and '
+                     'skip checking files that are unchanged since.')
+flags.DEFINE_string('cache_dir',
+                    os.path.join(tempfile.gettempdir(), 'gjslint_cache'),
+                    'Directory to keep the cache in when using --cache.')
+
+# Flags that only select files or change how results are shown, not which
+# errors are found in a file or how they are formatted. The namespaces index
+# flags are left out too: the index itself is part of each key, through
+# NamespacesIndex.GetDigest().
+_NON_LINT_FLAGS = frozenset([
+    'beep', 'cache', 'cache_dir', 'e', 'exclude_directories', 'exclude_files',
+    'flagfile', 'help', 'helpshort', 'helpxml', 'index_namespaces',
+    'multiprocess', 'multiprocess_min_files', 'namespaces_index_paths', 'r',
+    'recurse', 'summary', 'time', 'undefok', 'x'])
+
+
+def GetLinterVersion():
+  """Returns a digest of the linter's source files.
+
+  Returns:
+    A hex string that changes whenever any of the linter's code does.
+  """
+  digest = hashlib.sha1()
+  package_dir = os.path.dirname(os.path.abspath(__file__))
+  for dirpath, dirnames, filenames in os.walk(package_dir):
+    dirnames.sort()
+    for filename in sorted(filenames):
+      if filename.endswith('.py'):
+        path = os.path.join(dirpath, filename)
+        digest.update(os.path.relpath(path, package_dir))
+        f = open(path, 'rb')
+        try:
+          digest.update(f.read())
+        finally:
+          f.close()
+  return digest.hexdigest()
+
+
+def GetLintFlags():
+  """Returns the flag values that can change the errors found in a file.
+
+  Returns:
+    A sorted list of (flag name, value) pairs.
+  """
+  return sorted((name, value)
+                for name, value in FLAGS.FlagValuesDict().iteritems()
+                if name not in _NON_LINT_FLAGS)
+
+
+class ResultCache(object):
+  """Error records by file, stored as one small JSON file per entry.
+
+  Instances are picklable, so that they can be passed to worker processes.
+  """
+
+  def __init__(self, cache_dir, linter_version=None, lint_flags=None):
+    """Initialize a cache for the current linter version and flags.
+
+    Args:
+      cache_dir: The directory to keep the cache in. Created if missing.
+      linter_version: Optional. Defaults to GetLinterVersion().
+      lint_flags: Optional. Defaults to GetLintFlags().
+    """
+    if linter_version is None:
+      linter_version = GetLinterVersion()
+    if lint_flags is None:
+      lint_flags = GetLintFlags()
+    self._cache_dir = cache_dir
+    self._key_prefix = '%s\0%r\0' % (linter_version, lint_flags)
+
+  def _GetEntryPath(self, path, contents):
+    digest = hashlib.sha1(self._key_prefix)
+    digest.update(path)
+    digest.update('\0')
+    digest.update(contents)
+    return os.path.join(self._cache_dir, digest.hexdigest())
+
+  def Get(self, path, contents):
+    """Returns the cached error records for a file.
+
+    Args:
+      path: The path of the file, as given to the linter.
+      contents: The contents of the file.
+
+    Returns:
+      A list of errorrecord.ErrorRecords, or None if nothing is cached.
+    """
+    try:
+      f = open(self._GetEntryPath(path, contents), 'r')
+    except IOError:
+      return None
+    try:
+      entries = json.load(f)
+    except ValueError:
+      return None
+    finally:
+      f.close()
+    return [errorrecord.ErrorRecord(path, error_string, new_error)
+            for error_string, new_error in entries]
+
+  def Set(self, path, contents, records):
+    """Caches the error records for a file.
+
+    Failing to write the cache is not an error; the file will just be checked
+    again next time.
+
+    Args:
+      path: The path of the file, as given to the linter.
+      contents: The contents of the file.
+      records: The list of errorrecord.ErrorRecords found in it.
+    """
+    entries = [[record.error_string, record.new_error] for record in records]
+    try:
+      if not os.path.isdir(self._cache_dir):
+        os.makedirs(self._cache_dir)
+      fileutil.WriteAtomically(self._GetEntryPath(path, contents),
+                               json.dumps(entries))
+    except (IOError, OSError):
+      pass
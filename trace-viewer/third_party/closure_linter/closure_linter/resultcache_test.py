@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the resultcache module."""
+
+
+
+import os
+import shutil
+import tempfile
+import unittest as googletest
+
+from closure_linter import error_check  # For the strict flag.
+from closure_linter import errorrecord
+from closure_linter import namespacesindex  # For the index flags.
+from closure_linter import resultcache
+
+
+class ResultCacheTest(googletest.TestCase):
+  """Tests for ResultCache."""
+
+  def setUp(self):
+    self._cache_dir = tempfile.mkdtemp()
+    self._records = [
+        errorrecord.ErrorRecord('a.js', 'Line 1, E:0001: Extra space', False),
+        errorrecord.ErrorRecord('a.js', 'Line 2, E:0010: Missing ;', True)]
+
+  def tearDown(self):
+    shutil.rmtree(self._cache_dir)
+
+  def _MakeCache(self, linter_version='1', lint_flags=None):
+    return resultcache.ResultCache(self._cache_dir, linter_version,
+                                   lint_flags or [('strict', False)])
+
+  def testGetAfterSet(self):
+    cache = self._MakeCache()
+    self.assertEquals(None, cache.Get('a.js', 'var a = 1;\n'))
+
+    cache.Set('a.js', 'var a = 1;\n', self._records)
+    records = self._MakeCache().Get('a.js', 'var a = 1;\n')
+    self.assertEquals(
+        [('a.js', r.error_string, r.new_error) for r in self._records],
+        [(r.path, r.error_string, r.new_error) for r in records])
+
+  def testNoErrors(self):
+    cache = self._MakeCache()
+    cache.Set('a.js', 'var a = 1;\n', [])
+    self.assertEquals([], cache.Get('a.js', 'var a = 1;\n'))
+
+  def testKeyedOnEverything(self):
+    self._MakeCache().Set('a.js', 'var a = 1;\n', self._records)
+    self.assertEquals(None, self._MakeCache().Get('a.js', 'var a = 2;\n'))
+    self.assertEquals(None, self._MakeCache().Get('b.js', 'var a = 1;\n'))
+    self.assertEquals(None, self._MakeCache(linter_version='2').Get(
+        'a.js', 'var a = 1;\n'))
+    self.assertEquals(None, self._MakeCache(lint_flags=[('strict', True)]).Get(
+        'a.js', 'var a = 1;\n'))
+
+  def testUnwritableCache(self):
+    cache_file = os.path.join(self._cache_dir, 'file')
+    open(cache_file, 'w').close()
+    cache = resultcache.ResultCache(cache_file, '1', [])
+    cache.Set('a.js', 'var a = 1;\n', self._records)
+    self.assertEquals(None, cache.Get('a.js', 'var a = 1;\n'))
+
+  def testLintFlags(self):
+    lint_flags = dict(resultcache.GetLintFlags())
+    self.assertTrue('strict' in lint_flags)
+    self.assertFalse('cache_dir' in lint_flags)
+    self.assertFalse('index_namespaces' in lint_flags)
+    self.assertFalse('namespaces_index_paths' in lint_flags)
+
+
+if __name__ == '__main__':
+  googletest.main()
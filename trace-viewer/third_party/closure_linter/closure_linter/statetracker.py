@@ -19,6 +19,7 @@
 __author__ = ('robbyw@google.com (Robert Walker)',
               'ajp@google.com (Andy Perelson)')
 
+import copy
 import re
 
 from closure_linter import javascripttokenizer
@@ -588,6 +589,29 @@ class StateTracker(object):
     self._first_token = None
     self._documented_identifiers = set()
 
+  def __deepcopy__(self, memo):
+    """Returns a deep copy of the state tracker.
+
+    Functions that have ended no longer change, so they are shared with the
+    copy rather than copied along with their documentation.
+
+    Args:
+      memo: The deepcopy memo dictionary.
+
+    Returns:
+      The copy.
+    """
+    open_functions = set(id(function) for function in self._functions)
+    for function in self._functions_by_name.itervalues():
+      if id(function) not in open_functions:
+        memo.setdefault(id(function), function)
+
+    result = self.__class__.__new__(self.__class__)
+    memo[id(self)] = result
+    for name, value in self.__dict__.iteritems():
+      setattr(result, name, copy.deepcopy(value, memo))
+    return result
+
   def InFunction(self):
     """Returns true if the current token is within a function.
 
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures how fast fixjsstyle fixes badly formatted files.
+
+Breaks the formatting of a tree of .js files in repeatable ways, joining
+--scale copies of each file into one, then fixes each file in memory over
+and over until fixing it changes nothing.  Reports how long the first run
+took and how many runs it took to stop changing the files.
+"""
+
+import optparse
+import os
+import random
+import re
+import StringIO
+import sys
+import time
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _THIS_DIR)
+sys.path.insert(0, os.path.join(_THIS_DIR, '..', 'python_gflags'))
+
+import gflags as flags
+from closure_linter import checker
+from closure_linter import error_fixer
+
+_SRC_DIR = os.path.join(_THIS_DIR, '..', '..', 'src')
+
+# The most runs to try before giving up on a file changing no more.
+_MAX_RUNS = 10
+
+_SINGLE_QUOTED_STRING = re.compile(r"'([^'\"\\]*)'")
+
+
+def _FindFiles(src_dir):
+  filenames = []
+  for dirpath, _, files in os.walk(src_dir):
+    filenames.extend(os.path.join(dirpath, f) for f in files
+                     if f.endswith('.js'))
+  return sorted(filenames)
+
+
+def _BreakFormatting(lines, rand):
+  """Returns the lines with style errors fixjsstyle can fix added."""
+  broken_lines = []
+  for line in lines:
+    line = line.rstrip('\n')
+    stripped = line.lstrip(' ')
+    indentation = len(line) - len(stripped)
+    if indentation and rand.random() < 0.15:
+      indentation += rand.choice([-1, 1, 2])
+    line = ' ' * indentation + stripped
+    if rand.random() < 0.15:
+      line = line.replace(' = ', '=', 1)
+    if rand.random() < 0.1:
+      line = line.replace(', ', ',', 1)
+    if rand.random() < 0.05:
+      line = line.replace('if (', 'if(', 1)
+    if rand.random() < 0.05:
+      line = _SINGLE_QUOTED_STRING.sub(r'"\1"', line, 1)
+    if (rand.random() < 0.05 and line.endswith(';') and
+        not stripped.startswith('for')):
+      line = line[:-1]
+    if rand.random() < 0.05:
+      line = line.replace('(', '( ', 1)
+    broken_lines.append(line)
+    if rand.random() < 0.03:
+      broken_lines.append('')
+  return broken_lines
+
+
+def _Fix(filename, lines):
+  """Fixes the lines once, returning the fixed lines."""
+  fixed = StringIO.StringIO()
+  style_checker = checker.JavaScriptStyleChecker(
+      error_fixer.ErrorFixer(fixed))
+  # Hide the warnings about long lines.
+  stdout = sys.stdout
+  sys.stdout = StringIO.StringIO()
+  try:
+    style_checker.CheckLines(filename, lines, False)
+  finally:
+    sys.stdout = stdout
+  fixed_lines = fixed.getvalue().splitlines()
+  # Files with nothing to fix are not written out.
+  return fixed_lines or lines
+
+
+def main(args):
+  parser = optparse.OptionParser(usage='%prog [options]')
+  parser.add_option('--src-dir', default=_SRC_DIR,
+                    help='Directory with the .js files to break and fix.')
+  parser.add_option('--scale', type='int', default=1,
+                    help='How many copies of each file to join into one.')
+  parser.add_option('--seed', type='int', default=0,
+                    help='Seed for where the formatting is broken.')
+  options, args = parser.parse_args(args)
+  if args:
+    parser.error('Unexpected arguments.')
+
+  flags.FLAGS(['fixjsstyle', '--strict'])
+  rand = random.Random(options.seed)
+  files = []
+  for filename in _FindFiles(options.src_dir):
+    with open(filename, 'r') as f:
+      lines = f.readlines()
+    files.append((filename,
+                  _BreakFormatting(lines * options.scale, rand)))
+  num_lines = sum(len(lines) for _, lines in files)
+
+  print '%d files, %d lines in %s, %d copies each' % (
+      len(files), num_lines, options.src_dir, options.scale)
+
+  start = time.time()
+  fixed_files = [(filename, _Fix(filename, lines))
+                 for filename, lines in files]
+  elapsed = time.time() - start
+  print 'first run: %.3f seconds, %.0f lines/s' % (elapsed,
+                                                   num_lines / elapsed)
+
+  # Fix each file until it stops changing, timing the runs that changed it.
+  runs_needed = {}
+  for (filename, lines), (_, fixed_lines) in zip(files, fixed_files):
+    runs = 1
+    while fixed_lines != lines and runs < _MAX_RUNS:
+      run_start = time.time()
+      lines, fixed_lines = fixed_lines, _Fix(filename, fixed_lines)
+      if fixed_lines != lines:
+        elapsed += time.time() - run_start
+      runs += 1
+    if fixed_lines != lines:
+      print 'Still changing after %d runs: %s' % (_MAX_RUNS, filename)
+    # The last run changed nothing, so it isn't needed to fix the file.
+    runs_needed[filename] = max(runs - 1, 1)
+  print 'all runs:  %.3f seconds' % elapsed
+
+  for runs in sorted(set(runs_needed.itervalues())):
+    count = len([r for r in runs_needed.itervalues() if r == runs])
+    print '%d files fixed in %d run(s)' % (count, runs)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
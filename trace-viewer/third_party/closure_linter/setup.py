@@ -32,7 +32,11 @@ setup(name='closure_linter',
       entry_points = {
         'console_scripts': [
           'gjslint = closure_linter.gjslint:main',
-          'fixjsstyle = closure_linter.fixjsstyle:main'
+          'fixjsstyle = closure_linter.fixjsstyle:main',
+          'gjslint_server = closure_linter.lintserver:main',
+          'gjslint_client = closure_linter.lintclient:main',
+          'fixjsstyle_client = closure_linter.lintclient:FixStyleMain',
+          'gjslint_daemon = closure_linter.lintdaemon:main'
         ]
       }
 )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+#
+# Copyright 2012 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures JavaScriptTokenizer throughput over a tree of .js files.
+
+Also tokenizes every file trying all of a mode's matchers at each position, as
+the tokenizer used to, and checks that the token streams are identical.
+"""
+
+import copy
+import optparse
+import os
+import sys
+import time
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _THIS_DIR)
+sys.path.insert(0, os.path.join(_THIS_DIR, '..', 'python_gflags'))
+
+from closure_linter import javascripttokenizer
+
+_SRC_DIR = os.path.join(_THIS_DIR, '..', '..', 'src')
+
+
+class _UndispatchedTokenizer(javascripttokenizer.JavaScriptTokenizer):
+  """A tokenizer that tries every matcher at every position."""
+
+  def __init__(self):
+    javascripttokenizer.JavaScriptTokenizer.__init__(self)
+    matchers = {}
+    for mode, mode_matchers in self.matchers.iteritems():
+      matchers[mode] = []
+      for matcher in mode_matchers:
+        matcher = copy.copy(matcher)
+        matcher.first_chars = None
+        matchers[mode].append(matcher)
+    self.matchers = matchers
+
+
+def _FindFiles(src_dir):
+  filenames = []
+  for dirpath, _, files in os.walk(src_dir):
+    filenames.extend(os.path.join(dirpath, f) for f in files
+                     if f.endswith('.js'))
+  return sorted(filenames)
+
+
+def _Tokenize(tokenizer_class, files):
+  tokens = []
+  for lines in files:
+    token = tokenizer_class().TokenizeFile(lines)
+    file_tokens = []
+    while token:
+      file_tokens.append(token)
+      token = token.next
+    tokens.append(file_tokens)
+  return tokens
+
+
+def _Time(tokenizer_class, files, repeat):
+  best = None
+  for _ in xrange(repeat):
+    start = time.time()
+    for lines in files:
+      tokenizer_class().TokenizeFile(lines)
+    elapsed = time.time() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def _TokenKey(token):
+  return (token.type, token.string, token.line, token.line_number,
+          token.start_index, token.values)
+
+
+def main(args):
+  parser = optparse.OptionParser(usage='%prog [options]')
+  parser.add_option('--src-dir', default=_SRC_DIR,
+                    help='Directory to tokenize the .js files in.')
+  parser.add_option('--repeat', type='int', default=3,
+                    help='Report the best of this many runs.')
+  options, args = parser.parse_args(args)
+  if args:
+    parser.error('Unexpected arguments.')
+
+  filenames = _FindFiles(options.src_dir)
+  files = []
+  for filename in filenames:
+    with open(filename, 'r') as f:
+      files.append(f.readlines())
+  num_bytes = sum(len(line) for lines in files for line in lines)
+  num_lines = sum(len(lines) for lines in files)
+
+  tokens = _Tokenize(javascripttokenizer.JavaScriptTokenizer, files)
+  undispatched_tokens = _Tokenize(_UndispatchedTokenizer, files)
+  for filename, file_tokens, expected_tokens in zip(
+      filenames, tokens, undispatched_tokens):
+    if map(_TokenKey, file_tokens) != map(_TokenKey, expected_tokens):
+      print 'Token streams differ for %s' % filename
+      return 1
+  num_tokens = sum(len(file_tokens) for file_tokens in tokens)
+
+  print '%d files, %d lines, %d tokens, %d KB in %s' % (
+      len(files), num_lines, num_tokens, num_bytes / 1024, options.src_dir)
+  print '%-14s %9s %9s %12s' % ('', 'seconds', 'KB/s', 'tokens/s')
+  for name, tokenizer_class in [
+      ('all matchers', _UndispatchedTokenizer),
+      ('dispatched', javascripttokenizer.JavaScriptTokenizer)]:
+    elapsed = _Time(tokenizer_class, files, options.repeat)
+    print '%-14s %9.3f %9.0f %12.0f' % (
+        name, elapsed, num_bytes / 1024. / elapsed, num_tokens / elapsed)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
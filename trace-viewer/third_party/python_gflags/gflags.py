@@ -420,12 +420,14 @@ def _GetCallingModuleObjectAndName():
   DEFINE_foo... function.
   """
   # Walk down the stack to find the first globals dict that's not ours.
-  for depth in range(1, sys.getrecursionlimit()):
-    if not sys._getframe(depth).f_globals is globals():
-      globals_for_frame = sys._getframe(depth).f_globals
+  frame = sys._getframe(1)
+  while frame is not None:
+    globals_for_frame = frame.f_globals
+    if globals_for_frame is not globals():
       module, module_name = _GetModuleObjectAndName(globals_for_frame)
       if module_name is not None:
         return module, module_name
+    frame = frame.f_back
   raise AssertionError("No module was found")
 
 
@@ -526,9 +528,30 @@ class UnrecognizedFlagError(UnrecognizedFlag):
 
 # Global variable used by expvar
 _exported_flags = {}
+
+# Flag files already expanded by ReadFlagsFromFiles, so that processes that
+# parse the same flags over and over (e.g. servers) don't read and parse them
+# again.  Maps the absolute path of a flag file to (file_stats, lines), where
+# file_stats lists the (name, absolute path, mtime, size) of the file and of
+# all the files it includes, and lines is what __GetFlagFileLines returned.
+_flagfile_cache = {}
 _help_width = 80  # width of help output
 
 
+def _FlagFileStatsMatch(file_stats):
+  """Returns: True if none of the files in file_stats changed or moved."""
+  for name, abs_path, mtime, size in file_stats:
+    if os.path.abspath(name) != abs_path:
+      return False
+    try:
+      stat = os.stat(name)
+    except OSError:
+      return False
+    if stat.st_mtime != mtime or stat.st_size != size:
+      return False
+  return True
+
+
 def GetHelpWidth():
   """Returns: an integer, the width of help lines that is used in TextWrap."""
   if (not sys.stdout.isatty()) or (termios is None) or (fcntl is None):
@@ -741,6 +764,16 @@ def _GetModuleObjectAndName(globals_dict):
     string).  Returns (None, None) if the module could not be
     identified.
   """
+  # Modules are normally registered under the name in their globals, so
+  # try that before looking through all the modules.
+  name = globals_dict.get('__name__')
+  module = sys.modules.get(name)
+  if getattr(module, '__dict__', None) is globals_dict:
+    if name == '__main__':
+      # Pick a more informative name for the main module.
+      name = sys.argv[0]
+    return (module, name)
+
   # The use of .items() (instead of .iteritems()) is NOT a mistake: if
   # a parallel thread imports a module while we iterate over
   # .iteritems() (not nice, but possible), we get a RuntimeError ...
@@ -825,6 +858,9 @@ class FlagValues:
     # Dictionary: module name (string) -> list of Flag objects that are
     # key for that module.
     self.__dict__['__key_flags_by_module'] = {}
+    # The tables __call__ uses to parse arguments, built from the registered
+    # flags when first needed.  See _GetArgumentIndex.
+    self.__dict__['__argument_index'] = None
 
     # Set if we should use new style gnu_getopt rather than getopt when parsing
     # the args.  Only possible with Python 2.3+
@@ -1045,6 +1081,7 @@ class FlagValues:
         raise DuplicateFlagError(short_name, self)
       fl[short_name] = flag
     fl[name] = flag
+    self.__dict__['__argument_index'] = None
     global _exported_flags
     _exported_flags[name] = flag
 
@@ -1145,6 +1182,7 @@ class FlagValues:
 
     flag_obj = fl[flag_name]
     del fl[flag_name]
+    self.__dict__['__argument_index'] = None
 
     if not self._FlagIsRegistered(flag_obj):
       # If the Flag object indicated by flag_name is no longer
@@ -1186,6 +1224,68 @@ class FlagValues:
   def __iter__(self):
     return iter(self.FlagDict())
 
+  def _GetArgumentIndex(self):
+    """Returns the tables used to parse arguments, building them if needed.
+
+    Returns:
+      A list [number of flags, boolean_args, shortopts, longopts,
+      abbreviations].  boolean_args maps the name and 'no' name of each
+      boolean flag to the argument it stands for when given without a value,
+      e.g. 'debug' and 'nodebug' to '--debug=true' and '--debug=false'.
+      shortopts and longopts are the options to pass to getopt.
+      abbreviations is None until _GetBooleanAbbreviations builds it.
+    """
+    fl = self.FlagDict()
+    index = self.__dict__['__argument_index']
+    # Registering or deleting a flag drops the index, but FlagDict() can
+    # also be changed directly.
+    if index is not None and index[0] == len(fl):
+      return index
+
+    boolean_args = {}
+    shortopts = ''
+    longopts = ['undefok=']
+    for name, flag in fl.items():
+      longopts.append(name + '=')
+      if len(name) == 1:  # one-letter option: allow short flag type also
+        shortopts += name
+        if not flag.boolean:
+          shortopts += ':'
+      if flag.boolean:
+        # If a flag is named like the 'no' name of another, the one that
+        # comes first gets the argument.
+        boolean_args.setdefault(name, '--%s=true' % name)
+        boolean_args.setdefault('no' + name, '--%s=false' % name)
+
+    index = [len(fl), boolean_args, shortopts, longopts, None]
+    self.__dict__['__argument_index'] = index
+    return index
+
+  def _GetBooleanAbbreviations(self):
+    """Returns the abbreviations of the names of the boolean flags.
+
+    Returns:
+      A dictionary like boolean_args of _GetArgumentIndex that also maps each
+      unique abbreviation of the names and 'no' names, e.g. 'deb' to
+      '--debug=true'.
+    """
+    index = self._GetArgumentIndex()
+    if index[4] is None:
+      fl = self.FlagDict()
+      # Determine the smallest allowable prefix for all flag names
+      shortest_matches = self.ShortestUniquePrefixes(fl)
+      abbreviations = {}
+      for name, flag in fl.items():
+        if not flag.boolean:
+          continue
+        for length in range(len(shortest_matches[name]), len(name) + 1):
+          abbreviations.setdefault(name[:length], '--%s=true' % name)
+        no_name = 'no' + name
+        for length in range(len(shortest_matches[no_name]), len(no_name) + 1):
+          abbreviations.setdefault(no_name[:length], '--%s=false' % name)
+      index[4] = abbreviations
+    return index[4]
+
   def __call__(self, argv):
     """Parses flags from argv; stores parsed flags into this FlagValues object.
 
@@ -1206,9 +1306,6 @@ class FlagValues:
     # Support any sequence type that can be converted to a list
     argv = list(argv)
 
-    shortopts = ""
-    longopts = []
-
     fl = self.FlagDict()
 
     # This pre parses the argv list for --flagfile=<> options.
@@ -1221,39 +1318,34 @@ class FlagValues:
     # instances of the short form --mybool and --nomybool with their
     # full forms: --mybool=(true|false).
     original_argv = list(argv)  # list() makes a copy
-    shortest_matches = None
-    for name, flag in fl.items():
-      if not flag.boolean:
-        continue
-      if shortest_matches is None:
-        # Determine the smallest allowable prefix for all flag names
-        shortest_matches = self.ShortestUniquePrefixes(fl)
-      no_name = 'no' + name
-      prefix = shortest_matches[name]
-      no_prefix = shortest_matches[no_name]
-
-      # Replace all occurrences of this boolean with extended forms
-      for arg_idx in range(1, len(argv)):
-        arg = argv[arg_idx]
-        if arg.find('=') >= 0: continue
-        if arg.startswith('--'+prefix) and ('--'+name).startswith(arg):
-          argv[arg_idx] = ('--%s=true' % name)
-        elif arg.startswith('--'+no_prefix) and ('--'+no_name).startswith(arg):
-          argv[arg_idx] = ('--%s=false' % name)
-
-    # Loop over all of the flags, building up the lists of short options
-    # and long options that will be passed to getopt.  Short options are
-    # specified as a string of letters, each letter followed by a colon
-    # if it takes an argument.  Long options are stored in an array of
-    # strings.  Each string ends with an '=' if it takes an argument.
-    for name, flag in fl.items():
-      longopts.append(name + "=")
-      if len(name) == 1:  # one-letter option: allow short flag type also
-        shortopts += name
-        if not flag.boolean:
-          shortopts += ":"
+    _, boolean_args, shortopts, all_longopts, _ = self._GetArgumentIndex()
+    for arg_idx in range(1, len(argv)):
+      arg = argv[arg_idx]
+      if arg.startswith('--') and arg.find('=') < 0:
+        name = arg[2:]
+        full_arg = boolean_args.get(name)
+        if full_arg is None and name and name not in fl:
+          # Possibly an abbreviation.
+          full_arg = self._GetBooleanAbbreviations().get(name)
+        if full_arg is not None:
+          argv[arg_idx] = full_arg
+
+    # Short options are specified to getopt as a string of letters, each
+    # letter followed by a colon if it takes an argument.  Long options are
+    # stored in an array of strings.  Each string ends with an '=' if it
+    # takes an argument.  getopt looks each option up by going through all
+    # the long options, so only pass the ones the arguments can refer to.
+    longopts = set()
+    for arg in argv[1:]:
+      if arg.startswith('--') and len(arg) > 2:
+        name = arg[2:].split('=', 1)[0]
+        if name in fl or name == 'undefok':
+          longopts.add(name + '=')
+        else:
+          # Possibly an abbreviation.
+          longopts.update(opt for opt in all_longopts if opt.startswith(name))
+    longopts = list(longopts)
 
-    longopts.append('undefok=')
     undefok_flags = []
 
     # In case --undefok is specified, loop to pick up unrecognized
@@ -1549,13 +1641,16 @@ class FlagValues:
     else:
       raise FlagsError('Hit illegal --flagfile type: %s' % flagfile_str)
 
-  def __GetFlagFileLines(self, filename, parsed_file_list):
+  def __GetFlagFileLines(self, filename, parsed_file_list, file_stats=None):
     """Returns the useful (!=comments, etc) lines from a file with flags.
 
     Args:
       filename: A string, the name of the flag file.
       parsed_file_list: A list of the names of the files we have
         already read.  MUTATED BY THIS FUNCTION.
+      file_stats: Optional list.  The (name, absolute path, mtime, size) of
+        each file read is appended to it, or None if a file was skipped
+        because it had already been read.  MUTATED BY THIS FUNCTION.
 
     Returns:
       List of strings. See the note below.
@@ -1569,8 +1664,13 @@ class FlagValues:
     line_list = []  # All line from flagfile.
     flag_line_list = []  # Subset of lines w/o comments, blanks, flagfile= tags.
     try:
+      if file_stats is not None:
+        # Stat before reading, so that a change while reading is seen later.
+        stat = os.stat(filename)
+        file_stats.append((filename, os.path.abspath(filename),
+                           stat.st_mtime, stat.st_size))
       file_obj = open(filename, 'r')
-    except IOError, e_msg:
+    except (IOError, OSError), e_msg:
       raise CantOpenFlagFileError('ERROR:: Unable to open flagfile: %s' % e_msg)
 
     line_list = file_obj.readlines()
@@ -1591,11 +1691,14 @@ class FlagValues:
         # We do a little safety check for reparsing a file we've already done.
         if not sub_filename in parsed_file_list:
           included_flags = self.__GetFlagFileLines(sub_filename,
-                                                   parsed_file_list)
+                                                   parsed_file_list,
+                                                   file_stats)
           flag_line_list.extend(included_flags)
         else:  # Case of hitting a circularly included file.
           sys.stderr.write('Warning: Hit circular flagfile dependency: %s\n' %
                            (sub_filename,))
+          if file_stats is not None:
+            file_stats.append(None)
       else:
         # Any line that's not a comment or a nested flagfile should get
         # copied into 2nd position.  This leaves earlier arguments
@@ -1603,6 +1706,44 @@ class FlagValues:
         flag_line_list.append(line.strip())
     return flag_line_list
 
+  def __GetCachedFlagFileLines(self, filename, parsed_file_list):
+    """Like __GetFlagFileLines, but reuses the lines of unchanged files.
+
+    The lines of a flag file are reused as long as neither it nor any of the
+    files it includes changed, and none of them were already read.
+
+    Args:
+      filename: A string, the name of the flag file.
+      parsed_file_list: A list of the names of the files we have
+        already read.  MUTATED BY THIS FUNCTION.
+
+    Returns:
+      List of strings, as returned by __GetFlagFileLines.
+    """
+    path = os.path.abspath(filename)
+    cached = _flagfile_cache.get(path)
+    if cached is not None:
+      file_stats, lines = cached
+      if _FlagFileStatsMatch(file_stats):
+        # The flag file itself is read again however often it is named, but
+        # the files it includes are skipped once they have been read.
+        for name, _, _, _ in file_stats[1:]:
+          if name in parsed_file_list:
+            # The cached lines are still good for the next command line.
+            return self.__GetFlagFileLines(filename, parsed_file_list)
+        parsed_file_list.extend(name for name, _, _, _ in file_stats)
+        return list(lines)
+
+    file_stats = []
+    lines = self.__GetFlagFileLines(filename, parsed_file_list, file_stats)
+    # Files skipped because they were read before make the lines depend on
+    # more than the files themselves.
+    if None not in file_stats:
+      _flagfile_cache[path] = (file_stats, list(lines))
+    else:
+      _flagfile_cache.pop(path, None)
+    return lines
+
   def ReadFlagsFromFiles(self, argv, force_gnu=True):
     """Processes command line args, but also allow args to be read from file.
 
@@ -1637,6 +1778,8 @@ class FlagValues:
     --> For duplicate flags, first one we hit should "win".
     --> In a flagfile, a line beginning with # or // is a comment.
     --> Entirely blank lines _should_ be ignored.
+    --> The lines of flagfiles are kept in memory, and reused until the file
+        or a file it includes changes.
     """
     parsed_file_list = []
     rest_of_args = argv
@@ -1656,7 +1799,7 @@ class FlagValues:
           # This handles the case of (-)-flagfile=foo.
           flag_filename = self.ExtractFilename(current_arg)
         new_argv.extend(
-            self.__GetFlagFileLines(flag_filename, parsed_file_list))
+            self.__GetCachedFlagFileLines(flag_filename, parsed_file_list))
       else:
         new_argv.append(current_arg)
         # Stop parsing after '--', like getopt and gnu_getopt.
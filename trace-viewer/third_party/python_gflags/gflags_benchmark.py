@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2012, Google Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following disclaimer
+# in the documentation and/or other materials provided with the
+# distribution.
+#     * Neither the name of Google Inc. nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Measures how long it takes to define flags and parse a command line.
+
+Defines --num_flags flags of assorted types in a fresh FlagValues, the way
+modules do when they are imported, then parses a command line that sets a
+quarter of them, including boolean flags given as --name and --noname.
+Reports the best time of --repeat runs for each.
+
+Usage:
+  gflags_benchmark.py [--num_flags=200] [--repeat=20]
+"""
+
+import optparse
+import sys
+import time
+
+import gflags
+
+
+def DefineFlags(flag_values, num_flags):
+  """Defines num_flags flags of assorted types in flag_values."""
+  for i in range(num_flags):
+    kind = i % 5
+    if kind == 0:
+      gflags.DEFINE_string('string_flag_%d' % i, 'default', 'A string flag.',
+                           flag_values=flag_values)
+    elif kind == 1:
+      gflags.DEFINE_boolean('boolean_flag_%d' % i, False, 'A boolean flag.',
+                            flag_values=flag_values)
+    elif kind == 2:
+      gflags.DEFINE_integer('integer_flag_%d' % i, 1, 'An integer flag.',
+                            lower_bound=0, flag_values=flag_values)
+    elif kind == 3:
+      gflags.DEFINE_list('list_flag_%d' % i, 'a,b', 'A list flag.',
+                         flag_values=flag_values)
+    else:
+      gflags.DEFINE_enum('enum_flag_%d' % i, 'one', ['one', 'two'],
+                         'An enum flag.', flag_values=flag_values)
+
+
+def GetArgv(num_flags):
+  """Returns a command line setting a quarter of the flags."""
+  argv = ['program']
+  for i in range(0, num_flags, 4):
+    kind = i % 5
+    if kind == 0:
+      argv.append('--string_flag_%d=value' % i)
+    elif kind == 1:
+      # Alternate between the ways of giving a boolean flag.
+      argv.append(['--boolean_flag_%d', '--noboolean_flag_%d',
+                   '--boolean_flag_%d=true'][i % 3] % i)
+    elif kind == 2:
+      argv.extend(['--integer_flag_%d' % i, '2'])
+    elif kind == 3:
+      argv.append('--list_flag_%d=c,d' % i)
+    else:
+      argv.append('--enum_flag_%d=two' % i)
+  argv.append('file.txt')
+  return argv
+
+
+def main(argv):
+  parser = optparse.OptionParser(usage='%prog [options]')
+  parser.add_option('--num_flags', type='int', default=200,
+                    help='How many flags to define.')
+  parser.add_option('--repeat', type='int', default=20,
+                    help='How many times to define and parse the flags.')
+  options, args = parser.parse_args(argv)
+  if args:
+    parser.error('Unexpected arguments.')
+
+  flag_argv = GetArgv(options.num_flags)
+  define_times = []
+  parse_times = []
+  for _ in range(options.repeat):
+    flag_values = gflags.FlagValues()
+    start = time.time()
+    DefineFlags(flag_values, options.num_flags)
+    define_times.append(time.time() - start)
+
+    start = time.time()
+    remaining_args = flag_values(flag_argv)
+    parse_times.append(time.time() - start)
+    assert remaining_args == ['program', 'file.txt'], remaining_args
+
+  print '%d flags, %d arguments, %d modules loaded' % (
+      options.num_flags, len(flag_argv) - 1, len(sys.modules))
+  print 'define: %.2fms' % (min(define_times) * 1000)
+  print 'parse:  %.2fms' % (min(parse_times) * 1000)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
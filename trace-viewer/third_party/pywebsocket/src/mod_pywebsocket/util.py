@@ -50,6 +50,7 @@ except ImportError:
 
 import StringIO
 import logging
+import operator
 import os
 import re
 import socket
@@ -150,6 +151,14 @@ def get_class_logger(o):
         '%s.%s' % (o.__class__.__module__, o.__class__.__name__))
 
 
+# RepeatedXorMasker masks payloads of at least _MIN_WORD_MASKING_SIZE bytes a
+# machine word at a time. Signed words are used since unsigned ones of the same
+# size may not fit in a Python int.
+_MASKING_WORD_TYPE = 'l'
+_MASKING_WORD_TYPE_SIZE = array.array(_MASKING_WORD_TYPE).itemsize
+_MIN_WORD_MASKING_SIZE = 32
+
+
 class NoopMasker(object):
     """A masking object that has the same interface as RepeatedXorMasker but
     just returns the string passed in without making any change.
@@ -170,11 +179,14 @@ class RepeatedXorMasker(object):
     """
 
     def __init__(self, mask):
+        self._mask_string = mask
         self._mask = map(ord, mask)
         self._mask_size = len(self._mask)
         self._count = 0
 
-    def mask(self, s):
+    def _mask_using_array(self, s):
+        """Masks s one byte at a time."""
+
         result = array.array('B')
         result.fromstring(s)
         # Use temporary local variables to eliminate the cost to access
@@ -189,6 +201,43 @@ class RepeatedXorMasker(object):
 
         return result.tostring()
 
+    def _mask_using_words(self, s):
+        """Masks s one machine word at a time, and the bytes after the last
+        whole word one byte at a time.
+        """
+
+        word_size = _MASKING_WORD_TYPE_SIZE
+        word_count = len(s) // word_size
+        words = array.array(_MASKING_WORD_TYPE)
+        words.fromstring(buffer(s, 0, word_count * word_size))
+
+        # The mask starting at the current position, repeated over a whole
+        # number of words.
+        count = self._count
+        mask = self._mask_string[count:] + self._mask_string[:count]
+        block_size = word_size
+        while block_size % self._mask_size:
+            block_size += word_size
+        mask_words = array.array(_MASKING_WORD_TYPE)
+        mask_words.fromstring(mask * (block_size // self._mask_size))
+
+        # Repeat the mask words as many times as needed, and XOR the words
+        # of s with them in one call.
+        block_word_count = len(mask_words)
+        mask_words *= word_count // block_word_count + 1
+        del mask_words[word_count:]
+        result = array.array(
+            _MASKING_WORD_TYPE, map(operator.xor, words, mask_words))
+
+        self._count = (count + word_count * word_size) % self._mask_size
+        return result.tostring() + self._mask_using_array(
+            s[word_count * word_size:])
+
+    def mask(self, s):
+        if len(s) < _MIN_WORD_MASKING_SIZE:
+            return self._mask_using_array(s)
+        return self._mask_using_words(s)
+
 
 class DeflateRequest(object):
     """A wrapper class for request object to intercept send and recv to perform
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+#
+# Copyright 2012, Google Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following disclaimer
+# in the documentation and/or other materials provided with the
+# distribution.
+#     * Neither the name of Google Inc. nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+"""Benchmark for util.RepeatedXorMasker.
+
+Masks payloads of several sizes with the byte at a time masking and with the
+masking RepeatedXorMasker.mask uses, and prints the throughput of each in
+MB/s.
+
+Usage:
+    python test/benchmark_masking.py [--total-size BYTES]
+"""
+
+
+import optparse
+import os
+import time
+
+import set_sys_path  # Update sys.path to locate mod_pywebsocket module.
+
+from mod_pywebsocket import util
+
+
+_PAYLOAD_SIZES = (8, 32, 125, 1024, 64 * 1024, 1024 * 1024)
+
+
+def _measure(mask_method, payload, total_size):
+    """Returns the best throughput in MB/s of three runs of masking payload
+    repeatedly until total_size bytes are masked.
+    """
+
+    count = max(1, total_size // len(payload))
+    best = None
+    for unused_run in xrange(3):
+        start = time.time()
+        for unused_i in xrange(count):
+            mask_method(payload)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(payload) * count / max(best, 1e-9) / (1024 * 1024)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--total-size', '--total_size', dest='total_size',
+                      type='int', default=4 * 1024 * 1024,
+                      help='Number of bytes to mask for each payload size.')
+    options, unused_args = parser.parse_args()
+
+    print '%10s %12s %12s' % ('size', 'by byte', 'mask')
+    for size in _PAYLOAD_SIZES:
+        payload = os.urandom(size)
+        masker = util.RepeatedXorMasker(os.urandom(4))
+        by_byte = _measure(masker._mask_using_array, payload,
+                           options.total_size)
+        by_mask = _measure(masker.mask, payload, options.total_size)
+        print '%10d %7.1f MB/s %7.1f MB/s' % (size, by_byte, by_mask)
+
+
+if __name__ == '__main__':
+    main()
+
+
+# vi:sts=4 sw=4 et
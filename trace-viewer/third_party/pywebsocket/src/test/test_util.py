@@ -106,6 +106,27 @@ class RepeatedXorMaskerTest(unittest.TestCase):
         result = masker.mask('\x00\x00\x00\x00\x00')
         self.assertEqual('\xff\x00\x7f\xff\x00', result)
 
+    def test_mask_large_data(self):
+        masker = util.RepeatedXorMasker('\x01\x02\x03\x04')
+        result = masker.mask('\x00' * 1027)
+        self.assertEqual('\x01\x02\x03\x04' * 256 + '\x01\x02\x03', result)
+        # The mask continues from mask[3] after an unaligned call.
+        result = masker.mask('\xff' * 64)
+        self.assertEqual('\xfb\xfe\xfd\xfc' * 16, result)
+
+    def test_mask_by_word_same_as_by_byte(self):
+        # Mask sizes that a machine word isn't a multiple of, and data sizes
+        # around whole words.
+        data = ''.join(map(chr, xrange(256))) * 3
+        for mask in ('\x00\x7f\xff', '\x12\x34\x56\x78', '\xa5' * 5):
+            for size in (31, 32, 33, 64, 65, 70, 771):
+                by_word = util.RepeatedXorMasker(mask)
+                by_byte = util.RepeatedXorMasker(mask)
+                for offset in xrange(0, len(data), size):
+                    s = data[offset:offset + size]
+                    self.assertEqual(by_byte._mask_using_array(s),
+                                     by_word.mask(s))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Times CSSChecker on the trace viewer's stylesheets and on synthetic ones of
+increasing size, which should take time in proportion to their size.
+"""
+
+import glob
+import optparse
+import os
+import re
+import sys
+import time
+
+from web_dev_style import css_checker
+
+_SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'src')
+
+# One block of the synthetic stylesheet. Most checks fire on it somewhere, and
+# the long comma-less runs between its selector lists are what made the
+# one-selector-per-line regex backtrack.
+_BLOCK = '''/* Block %(i)d */
+.track-%(i)d,
+.Track_%(i)d > .title, .other {
+  -webkit-box-flex: 1;
+  background-color: #ff0000;
+  color: #333333;
+  margin: 0px; padding: 0 2px;
+  transition: opacity .5s;
+  font-family: "Arial";
+}
+
+@media screen {
+  .media-%(i)d {
+    width: 10px;
+    border: 0;
+  }
+}
+
+.x-%(i)d{ height: 0.0em; }
+
+.sparse-%(i)d > .child {
+  left: 1px;
+  top: 2px;
+}
+'''
+
+
+class _InputApi(object):
+  re = re
+
+
+def _SyntheticStylesheet(num_blocks):
+  return ''.join(_BLOCK % {'i': i} for i in xrange(num_blocks))
+
+
+def _Time(checker, contents, repeat):
+  best = None
+  for _ in xrange(repeat):
+    start = time.time()
+    checker.CheckContents(contents)
+    elapsed = time.time() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def main(args):
+  parser = optparse.OptionParser(usage='%prog [options]')
+  parser.add_option('--src-dir', default=_SRC_DIR,
+                    help='Directory with the .css files to check.')
+  parser.add_option('--sizes', default='250,500,1000,2000',
+                    help='Comma separated numbers of synthetic blocks.')
+  parser.add_option('--repeat', type='int', default=3,
+                    help='Report the best of this many runs.')
+  options, args = parser.parse_args(args)
+  if args:
+    parser.error('Unexpected arguments.')
+
+  checker = css_checker.CSSChecker(_InputApi(), None)
+
+  filenames = sorted(glob.glob(os.path.join(options.src_dir, '*.css')))
+  total_bytes = 0
+  total_time = 0
+  for filename in filenames:
+    with open(filename, 'r') as f:
+      contents = f.read()
+    total_bytes += len(contents)
+    total_time += _Time(checker, contents, options.repeat)
+  print '%d files in %s: %d bytes in %.3fs' % (
+      len(filenames), options.src_dir, total_bytes, total_time)
+
+  print '%8s %10s %9s %11s' % ('blocks', 'bytes', 'seconds', 'us/KB')
+  for num_blocks in [int(s) for s in options.sizes.split(',')]:
+    contents = _SyntheticStylesheet(num_blocks)
+    elapsed = _Time(checker, contents, options.repeat)
+    print '%8d %10d %9.3f %11.1f' % (
+        num_blocks, len(contents), elapsed,
+        elapsed * 1e6 / (len(contents) / 1024.))
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -12,220 +12,431 @@ we're checking against here.
 
 # TODO(dbeam): Real CSS parser? pycss? http://code.google.com/p/pycss/
 
-class CSSChecker(object):
-  def __init__(self, input_api, output_api, file_filter=None):
-    self.input_api = input_api
-    self.output_api = output_api
-    self.file_filter = file_filter
+import bisect
+import re
+
+import lint_runner
+
+
+def _collapseable_hex(s):
+  return (len(s) == 6 and s[0] == s[1] and s[2] == s[3] and s[4] == s[5])
+
+
+def _is_gray(s):
+  return s[0] == s[1] == s[2] if len(s) == 3 else s[0:2] == s[2:4] == s[4:6]
+
+
+def _rgb_from_hex(s):
+  if len(s) == 3:
+    r, g, b = s[0] + s[0], s[1] + s[1], s[2] + s[2]
+  else:
+    r, g, b = s[0:2], s[2:4], s[4:6]
+  return int(r, base=16), int(g, base=16), int(b, base=16)
 
-  def RunChecks(self):
-    # We use this a lot, so make a nick name variable.
-    re = self.input_api.re
 
-    def _collapseable_hex(s):
-      return (len(s) == 6 and s[0] == s[1] and s[2] == s[3] and s[4] == s[5])
+_COMMENTS_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_ATS_RE = re.compile(r'@\w+.*?{(.*{.*?})+.*?}', re.DOTALL)
+_GRIT_RE = re.compile(r'<if[^>]+>.*?<\s*/\s*if[^>]*>|<include[^>]+>',
+                      re.DOTALL)
 
-    def _is_gray(s):
-      return s[0] == s[1] == s[2] if len(s) == 3 else s[0:2] == s[2:4] == s[4:6]
 
-    def _remove_all(s):
-      return _remove_grit(_remove_ats(_remove_comments(s)))
+def _remove_all(s):
+  """Removes all /*comments*/, @at-keywords, and grit <if|include> tags; we're
+     not using a real parser. TODO(dbeam): Check alpha in <if> blocks.
+  """
+  if '/*' in s:
+    s = _COMMENTS_RE.sub('', s)
+  if '@' in s:
+    s = _ATS_RE.sub('\\1', s)
+  if '<' in s:
+    s = _GRIT_RE.sub('', s)
+  return s
 
-    def _remove_ats(s):
-      return re.sub(re.compile(r'@\w+.*?{(.*{.*?})+.*?}', re.DOTALL), '\\1', s)
 
-    def _remove_comments(s):
-      return re.sub(re.compile(r'/\*.*?\*/', re.DOTALL), '', s)
+_STRUCTURE_RE = re.compile(r'[{},\n]')
+_NON_SPACE_RE = re.compile(r'\S')
+_SPACE = ' \t\n\r\x0b\x0c'
 
-    def _remove_grit(s):
-      grit_reg = r'<if[^>]+>.*?<\s*/\s*if[^>]*>|<include[^>]+>'
-      return re.sub(re.compile(grit_reg, re.DOTALL), '', s)
 
-    def _rgb_from_hex(s):
-      if len(s) == 3:
-        r, g, b = s[0] + s[0], s[1] + s[1], s[2] + s[2]
+class _Structure(object):
+  """The positions of the braces, commas and newlines in some CSS, found in a
+     single pass over it. The multiline checks look things up in these instead
+     of each rescanning the text with a regex that can backtrack across lines.
+  """
+
+  def __init__(self, text):
+    self.text = text
+    self.braces = []
+    self.commas = []
+    self.newlines = []
+    for m in _STRUCTURE_RE.finditer(text):
+      c = m.group()
+      if c == '\n':
+        self.newlines.append(m.start())
+      elif c == ',':
+        self.commas.append(m.start())
+      else:
+        self.braces.append(m.start())
+
+  def NextBrace(self, pos):
+    """Returns the position of the first brace at or after |pos|, or -1."""
+    i = bisect.bisect_left(self.braces, pos)
+    return self.braces[i] if i < len(self.braces) else -1
+
+  def LineEnd(self, pos):
+    """Returns the position of the newline ending the line |pos| is on."""
+    i = bisect.bisect_left(self.newlines, pos)
+    return self.newlines[i] if i < len(self.newlines) else len(self.text)
+
+
+def alphabetize_props(structure):
+  text = structure.text
+  braces = structure.braces
+  errors = []
+  # Same as re.finditer(r'{(.*?)}', text, re.DOTALL).
+  i = 0
+  while i < len(braces):
+    if text[braces[i]] != '{':
+      i += 1
+      continue
+    start = braces[i]
+    i += 1
+    while i < len(braces) and text[braces[i]] != '}':
+      i += 1
+    if i == len(braces):
+      break
+    semis = map(lambda t: t.strip(), text[start + 1:braces[i]].split(';'))[:-1]
+    rules = filter(lambda r: ': ' in r, semis)
+    props = map(lambda r: r[0:r.find(':')], rules)
+    if props != sorted(props):
+      errors.append('    %s;\n' % (';\n    '.join(rules)))
+    i += 1
+  return errors
+
+
+_BRACES_RE = re.compile(r'(?:^|\S){|{\s*\S+\s*$')
+def braces_have_space_before_and_nothing_after(line):
+  return _BRACES_RE.search(line)
+
+
+# Intentionally dumbed down version of CSS 2.1 grammar for class without
+# non-ASCII, escape chars, or whitespace.
+_CLASS_RE = re.compile(r'\.(-?[_a-zA-Z0-9-]+).*[,{]\s*$')
+def classes_use_dashes(line):
+  m = _CLASS_RE.search(line)
+  return (m and (m.group(1).lower() != m.group(1) or
+                 m.group(1).find('_') >= 0))
+
+
+# Ignore single frames in a @keyframe, i.e. 0% { margin: 50px; }
+_FRAME_RE = re.compile(
+    r'\s*\d+%\s*{\s*[_a-zA-Z0-9-]+:(\s*[_a-zA-Z0-9-]+)+\s*;\s*}\s*')
+_NOT_SPACE_OR_BRACE_RE = re.compile(r'[^ }]')
+def close_brace_on_new_line(line):
+  return (line.find('}') >= 0 and _NOT_SPACE_OR_BRACE_RE.search(line) and
+          not _FRAME_RE.match(line))
+
+
+_COLON_RE = re.compile(r'(?<!data):(?!//)\S[^;]+;\s*')
+def colons_have_space_after(line):
+  return _COLON_RE.search(line)
+
+
+def favor_single_quotes(line):
+  return line.find('"') >= 0
+
+
+# Shared between hex_could_be_shorter and rgb_if_not_gray.
+_HEX_RE = re.compile(r'#([a-fA-F0-9]{3}|[a-fA-F0-9]{6})(?=[^_a-zA-Z0-9-]|$)'
+                     r'(?!.*(?:{.*|,\s*)$)')
+def hex_could_be_shorter(line):
+  m = _HEX_RE.search(line)
+  return (m and _is_gray(m.group(1)) and _collapseable_hex(m.group(1)))
+
+
+_SMALL_SECONDS_RE = re.compile(
+    r'(?:^|[^_a-zA-Z0-9-])(0?\.[0-9]+)s(?!-?[_a-zA-Z0-9-])')
+def milliseconds_for_small_times(line):
+  return _SMALL_SECONDS_RE.search(line)
+
+
+_DATA_URI_RE = re.compile(r'\(\s*\'?\s*data:')
+def no_data_uris_in_source_files(line):
+  return _DATA_URI_RE.search(line)
+
+
+_ONE_RULE_RE = re.compile(r'[_a-zA-Z0-9-](?<!data):(?!//)[^;]+;\s*[^ }]\s*')
+def one_rule_per_line(line):
+  return _ONE_RULE_RE.search(line)
+
+
+_ANY_RE = re.compile(r':(?:-webkit-)?any\(.*?\)', re.DOTALL)
+def one_selector_per_line(structure):
+  r"""Finds the same selectors as
+       re.finditer(r'(?:}[\n\s]*)?([^,]+,(?=[^{}]+?{).*[,{])\s*$',
+                   _ANY_RE.sub('', text), re.MULTILINE)
+     but without the regex's quadratic backtracking when commas are sparse.
+  """
+  if 'any(' in structure.text:
+    structure = _Structure(_ANY_RE.sub('', structure.text))
+  text = structure.text
+  commas = structure.commas
+  errors = []
+  pos = 0
+  i = 0
+  line_end = -1
+  while True:
+    # A match can't start on a comma, and every start before the next comma
+    # succeeds or fails with it.
+    i = bisect.bisect_left(commas, pos, i)
+    while i < len(commas) and commas[i] == pos:
+      pos += 1
+      i += 1
+    if i == len(commas):
+      break
+    comma = commas[i]
+
+    # (?=[^{}]+?{): the next brace is a { and isn't right after the comma.
+    brace = structure.NextBrace(comma + 1)
+    if brace <= comma + 1 or text[brace] != '{':
+      pos = comma + 1
+      continue
+
+    # .*[,{]\s*$: the line ends in a , or { after the comma.
+    if comma >= line_end:
+      line_end = structure.LineEnd(comma + 1)
+      last = line_end - 1
+      while last > comma and text[last] in _SPACE:
+        last -= 1
+    if last <= comma or text[last] not in ',{':
+      pos = comma + 1
+      continue
+
+    start = pos
+    if text[pos] == '}':
+      # (?:}[\n\s]*)? is greedy, but gives back a space for [^,]+ if needed.
+      start = _NON_SPACE_RE.search(text, pos + 1).start()
+      if start == comma:
+        start = max(pos, start - 1)
+    errors.append('    ' + text[start:last + 1].strip().splitlines()[-1:][0])
+
+    # \s*$ runs on to the last line break before the next non-space.
+    m = _NON_SPACE_RE.search(text, last + 1)
+    pos = text.rindex('\n', last + 1, m.start()) if m else len(text)
+  return errors
+
+
+def rgb_if_not_gray(line):
+  m = _HEX_RE.search(line)
+  return (m and not _is_gray(m.group(1)))
+
+
+def suggest_ms_from_s(line):
+  ms = int(float(_SMALL_SECONDS_RE.search(line).group(1)) * 1000)
+  return ' (replace with %dms)' % ms
+
+
+def suggest_rgb_from_hex(line):
+  suggestions = ['rgb(%d, %d, %d)' % _rgb_from_hex(h.group(1))
+      for h in _HEX_RE.finditer(line)]
+  return ' (replace with %s)' % ', '.join(suggestions)
+
+
+def suggest_short_hex(line):
+  h = _HEX_RE.search(line).group(1)
+  return ' (replace with #%s)' % (h[0] + h[2] + h[4])
+
+
+_HSL_RE = re.compile(r'hsl\([^\)]*(?:[, ]|(?<=\())(?:0?\.?)?0%')
+_ZEROS_RE = re.compile(
+    r'^.*(?:^|\D)'
+    r'(?:\.0|0(?:\.0?|px|em|%|in|cm|mm|pc|pt|ex|deg|g?rad|m?s|k?hz))'
+    r'(?:\D|$)(?=[^{}]+?}).*$', re.MULTILINE)
+def zero_length_values(structure):
+  """Finds the same lines as _ZEROS_RE.finditer(text), but only tries the
+     regex on lines that have a zero on them or at the start of the next line,
+     and only on those lines instead of the rest of the text.
+  """
+  text = structure.text
+  newlines = structure.newlines
+  num_lines = len(newlines) + 1
+  errors = []
+  n = 0
+  while n < num_lines:
+    start = newlines[n - 1] + 1 if n else 0
+    end = newlines[n] if n < len(newlines) else len(text)
+    if (text.find('0', start, end) < 0 and
+        not text.startswith(('0', '.0'), end + 1)):
+      n += 1
+      continue
+
+    # A match spans at most this line and the next two. The lookahead for a
+    # closing brace can run past them, so stand in for the rest of the text
+    # with the next brace, after one other character if there are any.
+    window_end = newlines[n + 2] + 1 if n + 2 < len(newlines) else len(text)
+    brace = structure.NextBrace(window_end)
+    if brace < 0:
+      rest = ''
+    elif brace == window_end:
+      rest = text[brace]
+    else:
+      rest = 'x' + text[brace]
+    z = _ZEROS_RE.match(text[start:window_end] + rest)
+    if not z:
+      n += 1
+      continue
+
+    first_line = z.group(0).strip().splitlines()[0]
+    if not _HSL_RE.search(first_line):
+      errors.append('    ' + first_line)
+    # The next match can start on the line this one ends on only if it ends
+    # at the start of that line.
+    match_end = start + z.end()
+    n = bisect.bisect_left(newlines, match_end)
+    if match_end != (newlines[n - 1] + 1 if n else 0):
+      n += 1
+  return errors
+
+
+# Line checks are only run on lines with all of the 'requires' strings in them,
+# without which they can't match. Multiline checks get the _Structure of the
+# whole file and give back a list of things wrong.
+_CHECKS = [
+    { 'desc': 'Alphabetize properties and list vendor specific (i.e. '
+              '-webkit) above standard.',
+      'test': alphabetize_props,
+      'multiline': True,
+    },
+    { 'desc': 'Start braces ({) end a selector, have a space before them '
+              'and no rules after.',
+      'test': braces_have_space_before_and_nothing_after,
+      'requires': ('{',),
+    },
+    { 'desc': 'Classes use .dash-form.',
+      'test': classes_use_dashes,
+      'requires': ('.',),
+    },
+    { 'desc': 'Always put a rule closing brace (}) on a new line.',
+      'test': close_brace_on_new_line,
+      'requires': ('}',),
+    },
+    { 'desc': 'Colons (:) should have a space after them.',
+      'test': colons_have_space_after,
+      'requires': (':', ';'),
+    },
+    { 'desc': 'Use single quotes (\') instead of double quotes (") in '
+              'strings.',
+      'test': favor_single_quotes,
+      'requires': ('"',),
+    },
+    { 'desc': 'Use abbreviated hex (#rgb) when in form #rrggbb.',
+      'test': hex_could_be_shorter,
+      'after': suggest_short_hex,
+      'requires': ('#',),
+    },
+    { 'desc': 'Use milliseconds for time measurements under 1 second.',
+      'test': milliseconds_for_small_times,
+      'after': suggest_ms_from_s,
+      'requires': ('.', 's'),
+    },
+    { 'desc': 'Don\'t use data URIs in source files. Use grit instead.',
+      'test': no_data_uris_in_source_files,
+      'requires': ('(', 'data:'),
+    },
+    { 'desc': 'One rule per line (what not to do: color: red; margin: 0;).',
+      'test': one_rule_per_line,
+      'requires': (':', ';'),
+    },
+    { 'desc': 'One selector per line (what not to do: a, b {}).',
+      'test': one_selector_per_line,
+      'multiline': True,
+    },
+    { 'desc': 'Use rgb() over #hex when not a shade of gray (like #333).',
+      'test': rgb_if_not_gray,
+      'after': suggest_rgb_from_hex,
+      'requires': ('#',),
+    },
+    { 'desc': 'Make all zero length terms (i.e. 0px) 0 unless inside of '
+              'hsl() or part of @keyframe.',
+      'test': zero_length_values,
+      'multiline': True,
+    },
+]
+
+_LINE_CHECKS = [c for c in _CHECKS if not c.get('multiline')]
+
+
+def _CheckContentsInWorker(contents):
+  checker = CSSChecker(lint_runner.WorkerInputApi(), None)
+  return checker.CheckContents(contents)
+
+
+class CSSChecker(object):
+  def __init__(self, input_api, output_api, file_filter=None, cache=None):
+    self.input_api = input_api
+    self.output_api = output_api
+    self.file_filter = file_filter
+    self.cache = cache
+
+  def CheckContents(self, contents):
+    """Returns a list of the style violations in the CSS |contents|, one
+       message per violated check.
+    """
+    file_contents = _remove_all(contents)
+
+    # Walk the lines once, handing each one to the line checks that could
+    # match it.
+    line_errors = dict((id(check), []) for check in _LINE_CHECKS)
+    for line in file_contents.splitlines():
+      for check in _LINE_CHECKS:
+        for s in check['requires']:
+          if s not in line:
+            break
+        else:
+          if check['test'](line):
+            error = '    ' + line.strip()
+            if 'after' in check:
+              error += check['after'](line)
+            line_errors[id(check)].append(error)
+
+    structure = _Structure(file_contents)
+    file_errors = []
+    for check in _CHECKS:
+      if check.get('multiline'):
+        check_errors = check['test'](structure)
+        if len(check_errors) > 0:
+          # There are currently no multiline checks with ['after'].
+          file_errors.append('- %s\n%s' %
+              (check['desc'], '\n'.join(check_errors).rstrip()))
       else:
-        r, g, b = s[0:2], s[2:4], s[4:6]
-      return int(r, base=16), int(g, base=16), int(b, base=16)
-
-    def alphabetize_props(contents):
-      errors = []
-      for rule in re.finditer(r'{(.*?)}', contents, re.DOTALL):
-        semis = map(lambda t: t.strip(), rule.group(1).split(';'))[:-1]
-        rules = filter(lambda r: ': ' in r, semis)
-        props = map(lambda r: r[0:r.find(':')], rules)
-        if props != sorted(props):
-          errors.append('    %s;\n' % (';\n    '.join(rules)))
-      return errors
-
-    def braces_have_space_before_and_nothing_after(line):
-      return re.search(r'(?:^|\S){|{\s*\S+\s*$', line)
-
-    def classes_use_dashes(line):
-      # Intentionally dumbed down version of CSS 2.1 grammar for class without
-      # non-ASCII, escape chars, or whitespace.
-      m = re.search(r'\.(-?[_a-zA-Z0-9-]+).*[,{]\s*$', line)
-      return (m and (m.group(1).lower() != m.group(1) or
-                     m.group(1).find('_') >= 0))
-
-    # Ignore single frames in a @keyframe, i.e. 0% { margin: 50px; }
-    frame_reg = r'\s*\d+%\s*{\s*[_a-zA-Z0-9-]+:(\s*[_a-zA-Z0-9-]+)+\s*;\s*}\s*'
-    def close_brace_on_new_line(line):
-      return (line.find('}') >= 0 and re.search(r'[^ }]', line) and
-              not re.match(frame_reg, line))
-
-    def colons_have_space_after(line):
-      return re.search(r'(?<!data):(?!//)\S[^;]+;\s*', line)
-
-    def favor_single_quotes(line):
-      return line.find('"') >= 0
-
-    # Shared between hex_could_be_shorter and rgb_if_not_gray.
-    hex_reg = (r'#([a-fA-F0-9]{3}|[a-fA-F0-9]{6})(?=[^_a-zA-Z0-9-]|$)'
-               r'(?!.*(?:{.*|,\s*)$)')
-    def hex_could_be_shorter(line):
-      m = re.search(hex_reg, line)
-      return (m and _is_gray(m.group(1)) and _collapseable_hex(m.group(1)))
-
-    small_seconds = r'(?:^|[^_a-zA-Z0-9-])(0?\.[0-9]+)s(?!-?[_a-zA-Z0-9-])'
-    def milliseconds_for_small_times(line):
-      return re.search(small_seconds, line)
-
-    def no_data_uris_in_source_files(line):
-      return re.search(r'\(\s*\'?\s*data:', line)
-
-    def one_rule_per_line(line):
-      return re.search(r'[_a-zA-Z0-9-](?<!data):(?!//)[^;]+;\s*[^ }]\s*', line)
-
-    any_reg = re.compile(r':(?:-webkit-)?any\(.*?\)', re.DOTALL)
-    multi_sels = re.compile(r'(?:}[\n\s]*)?([^,]+,(?=[^{}]+?{).*[,{])\s*$',
-                            re.MULTILINE)
-    def one_selector_per_line(contents):
-      errors = []
-      for b in re.finditer(multi_sels, re.sub(any_reg, '', contents)):
-        errors.append('    ' + b.group(1).strip().splitlines()[-1:][0])
-      return errors
-
-    def rgb_if_not_gray(line):
-      m = re.search(hex_reg, line)
-      return (m and not _is_gray(m.group(1)))
-
-    def suggest_ms_from_s(line):
-      ms = int(float(re.search(small_seconds, line).group(1)) * 1000)
-      return ' (replace with %dms)' % ms
-
-    def suggest_rgb_from_hex(line):
-      suggestions = ['rgb(%d, %d, %d)' % _rgb_from_hex(h.group(1))
-          for h in re.finditer(hex_reg, line)]
-      return ' (replace with %s)' % ', '.join(suggestions)
-
-    def suggest_short_hex(line):
-      h = re.search(hex_reg, line).group(1)
-      return ' (replace with #%s)' % (h[0] + h[2] + h[4])
-
-    hsl = r'hsl\([^\)]*(?:[, ]|(?<=\())(?:0?\.?)?0%'
-    zeros = (r'^.*(?:^|\D)'
-             r'(?:\.0|0(?:\.0?|px|em|%|in|cm|mm|pc|pt|ex|deg|g?rad|m?s|k?hz))'
-             r'(?:\D|$)(?=[^{}]+?}).*$')
-    def zero_length_values(contents):
-      errors = []
-      for z in re.finditer(re.compile(zeros, re.MULTILINE), contents):
-        first_line = z.group(0).strip().splitlines()[0]
-        if not re.search(hsl, first_line):
-          errors.append('    ' + first_line)
-      return errors
-
-    added_or_modified_files_checks = [
-        { 'desc': 'Alphabetize properties and list vendor specific (i.e. '
-                  '-webkit) above standard.',
-          'test': alphabetize_props,
-          'multiline': True,
-        },
-        { 'desc': 'Start braces ({) end a selector, have a space before them '
-                  'and no rules after.',
-          'test': braces_have_space_before_and_nothing_after,
-        },
-        { 'desc': 'Classes use .dash-form.',
-          'test': classes_use_dashes,
-        },
-        { 'desc': 'Always put a rule closing brace (}) on a new line.',
-          'test': close_brace_on_new_line,
-        },
-        { 'desc': 'Colons (:) should have a space after them.',
-          'test': colons_have_space_after,
-        },
-        { 'desc': 'Use single quotes (\') instead of double quotes (") in '
-                  'strings.',
-          'test': favor_single_quotes,
-        },
-        { 'desc': 'Use abbreviated hex (#rgb) when in form #rrggbb.',
-          'test': hex_could_be_shorter,
-          'after': suggest_short_hex,
-        },
-        { 'desc': 'Use milliseconds for time measurements under 1 second.',
-          'test': milliseconds_for_small_times,
-          'after': suggest_ms_from_s,
-        },
-        { 'desc': 'Don\'t use data URIs in source files. Use grit instead.',
-          'test': no_data_uris_in_source_files,
-        },
-        { 'desc': 'One rule per line (what not to do: color: red; margin: 0;).',
-          'test': one_rule_per_line,
-        },
-        { 'desc': 'One selector per line (what not to do: a, b {}).',
-          'test': one_selector_per_line,
-          'multiline': True,
-        },
-        { 'desc': 'Use rgb() over #hex when not a shade of gray (like #333).',
-          'test': rgb_if_not_gray,
-          'after': suggest_rgb_from_hex,
-        },
-        { 'desc': 'Make all zero length terms (i.e. 0px) 0 unless inside of '
-                  'hsl() or part of @keyframe.',
-          'test': zero_length_values,
-          'multiline': True,
-        },
-    ]
+        check_errors = line_errors[id(check)]
+        if len(check_errors) > 0:
+          file_errors.append('- %s\n%s' %
+              (check['desc'], '\n'.join(check_errors)))
+    return file_errors
 
+  def RunChecks(self):
     results = []
     affected_files = self.input_api.AffectedFiles(include_deletes=False,
                                                   file_filter=self.file_filter)
-    files = []
-    for f in affected_files:
-      # Remove all /*comments*/, @at-keywords, and grit <if|include> tags; we're
-      # not using a real parser. TODO(dbeam): Check alpha in <if> blocks.
-      file_contents = _remove_all('\n'.join(f.NewContents()))
-      files.append((f.LocalPath(), file_contents))
-
     # Only look at CSS files for now.
-    for f in filter(lambda f: f[0].endswith('.css'), files):
-      file_errors = []
-      for check in added_or_modified_files_checks:
-        # If the check is multiline, it receieves the whole file and gives us
-        # back a list of things wrong. If the check isn't multiline, we pass it
-        # each line and the check returns something truthy if there's an issue.
-        if ('multiline' in check and check['multiline']):
-          check_errors = check['test'](f[1])
-          if len(check_errors) > 0:
-            # There are currently no multiline checks with ['after'].
-            file_errors.append('- %s\n%s' %
-                (check['desc'], '\n'.join(check_errors).rstrip()))
-        else:
-          check_errors = []
-          lines = f[1].splitlines()
-          for lnum in range(0, len(lines)):
-            line = lines[lnum]
-            if check['test'](line):
-              error = '    ' + line.strip()
-              if 'after' in check:
-                error += check['after'](line)
-              check_errors.append(error)
-          if len(check_errors) > 0:
-            file_errors.append('- %s\n%s' %
-                (check['desc'], '\n'.join(check_errors)))
+    css_files = filter(lambda f: f.LocalPath().endswith('.css'),
+                       affected_files)
+
+    # Each file is checked in a worker process, unless the cache already has
+    # the result for its contents.
+    jobs = []
+    for f in css_files:
+      contents = '\n'.join(f.NewContents())
+      jobs.append((contents, contents))
+    all_file_errors = lint_runner.RunLint(
+        _CheckContentsInWorker, jobs, cache=self.cache,
+        version=lint_runner.HashFiles([__file__]))
+
+    for f, file_errors in zip(css_files, all_file_errors):
       if file_errors:
         results.append(self.output_api.PresubmitPromptWarning(
-            '%s:\n%s' % (f[0], '\n\n'.join(file_errors))))
+            '%s:\n%s' % (f.LocalPath(), '\n\n'.join(file_errors))))
 
     if results:
       # Add your name if you're here often mucking around in the code.
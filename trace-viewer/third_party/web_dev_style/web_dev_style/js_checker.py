@@ -7,11 +7,29 @@
 See chrome/browser/resources/PRESUBMIT.py
 """
 
+import lint_runner
+
+# closure_linter checkers, by repository root, for JSChecker._GetClosureLinter.
+_closure_linters = {}
+
+
+def _ClosureLinterPath(repository_root):
+  return lint_runner.WorkerInputApi.os_path.join(
+      repository_root, "third_party", "closure_linter")
+
+
+def _LintFileInWorker(args):
+  repository_root, filename, contents = args
+  checker = JSChecker(lint_runner.WorkerInputApi(repository_root), None)
+  return checker.LintFile(filename, contents)
+
+
 class JSChecker(object):
-  def __init__(self, input_api, output_api, file_filter=None):
+  def __init__(self, input_api, output_api, file_filter=None, cache=None):
     self.input_api = input_api
     self.output_api = output_api
     self.file_filter = file_filter
+    self.cache = cache
 
   def RegexCheck(self, line_number, line, regex, message):
     """Searches for |regex| in |line| to check for a particular style
@@ -91,21 +109,15 @@ class JSChecker(object):
     else:
       return self.output_api.PresubmitPromptWarning(error_text)
 
-  def RunChecks(self):
-    """Check for violations of the Chromium JavaScript style guide. See
-       http://chromium.org/developers/web-development-style-guide#TOC-JavaScript
-    """
-
+  def _ImportClosureLinter(self):
     import sys
     import warnings
     old_path = sys.path
     old_filters = warnings.filters
 
     try:
-      closure_linter_path = self.input_api.os_path.join(
-          self.input_api.change.RepositoryRoot(),
-          "third_party",
-          "closure_linter")
+      closure_linter_path = _ClosureLinterPath(
+          self.input_api.change.RepositoryRoot())
       gflags_path = self.input_api.os_path.join(
           self.input_api.change.RepositoryRoot(),
           "third_party",
@@ -123,6 +135,19 @@ class JSChecker(object):
       sys.path = old_path
       warnings.filters = old_filters
 
+    return checker, errors, errorhandler
+
+  def _GetClosureLinter(self):
+    """Returns closure_linter's JavaScriptStyleChecker and the error handler
+       it reports to. They are set up once per process and reused for every
+       file, which is how gjslint itself checks many files.
+    """
+    repository_root = self.input_api.change.RepositoryRoot()
+    if repository_root in _closure_linters:
+      return _closure_linters[repository_root]
+
+    checker, errors, errorhandler = self._ImportClosureLinter()
+
     class ErrorHandlerImpl(errorhandler.ErrorHandler):
       """Filters out errors that don't apply to Chromium JavaScript code."""
 
@@ -132,6 +157,7 @@ class JSChecker(object):
 
       def HandleFile(self, filename, first_token):
         self._filename = filename
+        self._errors = []
 
       def HandleError(self, error):
         if (self._valid(error)):
@@ -160,6 +186,69 @@ class JSChecker(object):
             errors.MISSING_JSDOC_TAG_THIS,
         ]
 
+    error_handler = ErrorHandlerImpl(self.input_api.re)
+    _closure_linters[repository_root] = (
+        checker.JavaScriptStyleChecker(error_handler), error_handler)
+    return _closure_linters[repository_root]
+
+  def LintFile(self, filename, contents):
+    """Returns the style violations in |contents|, the new contents of the
+       file at |filename| relative to the repository root, as a list of
+       messages.
+    """
+    import StringIO
+    js_checker, error_handler = self._GetClosureLinter()
+
+    # The file is tokenized once, and the same token stream is used for our
+    # own line checks and for closure_linter's passes.
+    first_token = js_checker.Tokenize(StringIO.StringIO(contents))
+
+    error_lines = []
+
+    # Check for the following:
+    # * document.getElementById()
+    # * the 'const' keyword
+    # * Passing an empty array to 'chrome.send()'
+    token = first_token
+    line_number = 0
+    while token:
+      if token.line_number != line_number:
+        line_number = token.line_number
+        line = token.line.rstrip('\r\n')
+        if 'chrome.send' in line:
+          error_lines.append(self.ChromeSendCheck(line_number, line))
+        if 'const' in line:
+          error_lines.append(self.ConstCheck(line_number, line))
+        if 'document.getElementById' in line:
+          error_lines.append(self.GetElementByIdCheck(line_number, line))
+      token = token.next
+    error_lines = filter(None, error_lines)
+
+    # Use closure_linter to check for several different errors. The error
+    # handler is shared by all files, and CheckTokens() can return before it
+    # tells the handler about the new file, so start from no errors here.
+    path = self.input_api.os_path.join(
+        self.input_api.change.RepositoryRoot(), filename)
+    error_handler.HandleFile(path, first_token)
+    js_checker.CheckTokens(path, first_token, False)
+
+    for error in error_handler.GetErrors():
+      highlight = self.error_highlight(
+          error.token.start_index, error.token.length)
+      error_msg = '  line %d: E%04d: %s\n%s\n%s' % (
+          error.token.line_number,
+          error.code,
+          error.message,
+          error.token.line.rstrip(),
+          highlight)
+      error_lines.append(error_msg)
+
+    return error_lines
+
+  def RunChecks(self):
+    """Check for violations of the Chromium JavaScript style guide. See
+       http://chromium.org/developers/web-development-style-guide#TOC-JavaScript
+    """
     results = []
 
     affected_files = self.input_api.change.AffectedFiles(
@@ -167,38 +256,21 @@ class JSChecker(object):
         include_deletes=False)
     affected_js_files = filter(lambda f: f.LocalPath().endswith('.js'),
                                affected_files)
-    for f in affected_js_files:
-      error_lines = []
-
-      # Check for the following:
-      # * document.getElementById()
-      # * the 'const' keyword
-      # * Passing an empty array to 'chrome.send()'
-      for i, line in enumerate(f.NewContents(), start=1):
-        error_lines += filter(None, [
-            self.ChromeSendCheck(i, line),
-            self.ConstCheck(i, line),
-            self.GetElementByIdCheck(i, line),
-        ])
-
-      # Use closure_linter to check for several different errors
-      error_handler = ErrorHandlerImpl(self.input_api.re)
-      js_checker = checker.JavaScriptStyleChecker(error_handler)
-      js_checker.Check(self.input_api.os_path.join(
-          self.input_api.change.RepositoryRoot(),
-          f.LocalPath()))
-
-      for error in error_handler.GetErrors():
-        highlight = self.error_highlight(
-            error.token.start_index, error.token.length)
-        error_msg = '  line %d: E%04d: %s\n%s\n%s' % (
-            error.token.line_number,
-            error.code,
-            error.message,
-            error.token.line.rstrip(),
-            highlight)
-        error_lines.append(error_msg)
 
+    # Each file is linted in a worker process, unless the cache already has
+    # the result for its contents. Results depend on closure_linter too.
+    repository_root = self.input_api.change.RepositoryRoot()
+    jobs = []
+    for f in affected_js_files:
+      contents = '\n'.join(f.NewContents()) + '\n'
+      jobs.append((contents, (repository_root, f.LocalPath(), contents)))
+    version = lint_runner.HashFiles(
+        [__file__] +
+        lint_runner.SourceFilesOf(_ClosureLinterPath(repository_root)))
+    all_error_lines = lint_runner.RunLint(
+        _LintFileInWorker, jobs, cache=self.cache, version=version)
+
+    for f, error_lines in zip(affected_js_files, all_error_lines):
       if error_lines:
         error_lines = [
             'Found JavaScript style violations in %s:' %
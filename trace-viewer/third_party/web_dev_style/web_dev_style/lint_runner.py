@@ -0,0 +1,186 @@
+# Copyright (c) 2012 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Runs a per-file lint function over many files at once.
+
+Files whose results are already in the cache are not linted again. The rest
+are farmed out to a pool of worker processes, and the results are returned in
+the order the files were given in, whichever order they finish in.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(),
+                                  'web_dev_style_lint_cache.json')
+
+# Stop the cache from growing forever; older entries are dropped first.
+MAX_CACHE_ENTRIES = 10000
+
+
+def HashFiles(filenames):
+  """Returns a digest of the contents of |filenames|, used to tell apart the
+     results of different versions of a checker.
+  """
+  digest = hashlib.sha1()
+  for filename in sorted(filenames):
+    if filename.endswith(('.pyc', '.pyo')):
+      filename = filename[:-1]
+    with open(filename, 'rb') as f:
+      digest.update(f.read())
+  return digest.hexdigest()
+
+
+def SourceFilesOf(directory):
+  """Returns the python files under |directory|."""
+  filenames = []
+  for dirpath, _, files in os.walk(directory):
+    filenames.extend(os.path.join(dirpath, f) for f in files
+                     if f.endswith('.py'))
+  return filenames
+
+
+class WorkerInputApi(object):
+  """Stands in for the presubmit input_api in worker processes, which only
+     get the parts of it the per-file checks use.
+  """
+
+  class _Change(object):
+    def __init__(self, repository_root):
+      self._repository_root = repository_root
+
+    def RepositoryRoot(self):
+      return self._repository_root
+
+  re = re
+  os_path = os.path
+
+  def __init__(self, repository_root=None):
+    self.change = self._Change(repository_root)
+
+
+class LintCache(object):
+  """Lint results keyed by a hash of the checker version and file contents,
+     persisted as JSON. The results must be JSON serializable.
+  """
+
+  def __init__(self, path=DEFAULT_CACHE_PATH):
+    self._path = path
+    self._entries = {}
+    self._order = []
+    self._dirty = False
+    if path:
+      self._Load()
+
+  def _Load(self):
+    try:
+      with open(self._path, 'r') as f:
+        data = json.load(f)
+    except (IOError, ValueError):
+      return
+    if not isinstance(data, list):
+      return
+    for entry in data:
+      if isinstance(entry, list) and len(entry) == 2:
+        self._entries[entry[0]] = entry[1]
+        self._order.append(entry[0])
+
+  @staticmethod
+  def Key(version, contents):
+    if isinstance(contents, unicode):
+      contents = contents.encode('utf-8')
+    digest = hashlib.sha1(version)
+    digest.update('\0')
+    digest.update(contents)
+    return digest.hexdigest()
+
+  def Get(self, key):
+    return self._entries.get(key)
+
+  def Set(self, key, result):
+    if key not in self._entries:
+      self._order.append(key)
+    self._entries[key] = result
+    self._dirty = True
+
+  def Save(self):
+    if not self._path or not self._dirty:
+      return
+    self._order = self._order[-MAX_CACHE_ENTRIES:]
+    data = [[key, self._entries[key]] for key in self._order]
+    try:
+      _WriteAtomically(self._path, json.dumps(data))
+    except (IOError, OSError):
+      return
+    self._dirty = False
+
+
+def _WriteAtomically(path, contents):
+  """Replaces path with contents via a rename, so that a lint run started
+  in parallel reads either the old file or the new one, never a mix."""
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                  suffix='.tmp')
+  try:
+    with os.fdopen(fd, 'w') as f:
+      f.write(contents)
+    os.rename(tmp_path, path)
+  except:
+    try:
+      os.remove(tmp_path)
+    except OSError:
+      pass
+    raise
+
+
+def _MakePool(num_jobs):
+  try:
+    import multiprocessing
+    return multiprocessing.Pool(min(num_jobs, multiprocessing.cpu_count()))
+  except (ImportError, NotImplementedError, OSError):
+    # No working multiprocessing here (e.g. no /dev/shm); run serially.
+    return None
+
+
+def RunLint(lint_function, jobs, cache=None, version=''):
+  """Returns [lint_function(args) for contents, args in jobs], using |cache|
+     for files with unchanged contents.
+
+     |lint_function| must be a module level function so it can be sent to the
+     worker processes, and both |args| and its results must be picklable.
+  """
+  results = [None] * len(jobs)
+  keys = [None] * len(jobs)
+  pending = []
+  for i, (contents, args) in enumerate(jobs):
+    if cache is not None:
+      keys[i] = LintCache.Key(version, contents)
+      result = cache.Get(keys[i])
+      if result is not None:
+        results[i] = result
+        continue
+    pending.append(i)
+
+  pool = None
+  if len(pending) > 1:
+    pool = _MakePool(len(pending))
+  if pool:
+    try:
+      pending_results = pool.map(lint_function,
+                                 [jobs[i][1] for i in pending])
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    pending_results = [lint_function(jobs[i][1]) for i in pending]
+
+  for i, result in zip(pending, pending_results):
+    results[i] = result
+    if cache is not None:
+      cache.Set(keys[i], result)
+  if cache is not None:
+    cache.Save()
+  return results
@@ -1,6 +1,6 @@
 #!/usr/bin/python2.6
 
-import httplib, json, optparse, os, urllib, shutil, subprocess, sys
+import inspect, optparse, os, shutil, subprocess, sys, time
 
 output_css_file = 'style.css'
 output_js_file = 'script.js'
@@ -15,6 +15,13 @@ parser.add_option('--local', dest='local_dir', metavar='DIR',
                   help='use a local trace-viewer')
 parser.add_option('--no-min', dest='no_min', default=False, action='store_true',
                   help='skip minification')
+parser.add_option('--profile', dest='profile', default=None,
+                  help='bundle only the modules of the given build profile, '
+                  'e.g. systrace (see profiles.py)')
+parser.add_option('--source-map', dest='source_map', default=False,
+                  action='store_true',
+                  help='also write a source map for %s to %s.map' % (
+                      output_js_file, output_js_file))
 options, args = parser.parse_args()
 
 if options.local_dir is None:
@@ -43,60 +50,68 @@ else:
 build_dir = os.path.join(trace_viewer_dir, 'build')
 sys.path.append(build_dir)
 gen = __import__('generate_standalone_timeline_view', {}, {})
-js_code = gen.generate_js()
-css_code = gen.generate_css()
 
-if options.no_min:
-  open(output_js_file, 'wt').write(js_code)
-  print 'Generated %s' % output_js_file
-  open(output_css_file, 'wt').write(css_code)
-  print 'Generated %s' % output_css_file
-else:
-  # Define the parameters for the POST request and encode them in
-  # a URL-safe format.
-  params = urllib.urlencode([
-    ('js_code', js_code),
-    ('language', 'ECMASCRIPT5'),
-    ('compilation_level', 'SIMPLE_OPTIMIZATIONS'),
-    ('output_format', 'json'),
-    ('output_info', 'errors'),
-    ('output_info', 'compiled_code'),
-  ])
-
-  # Always use the following value for the Content-type header.
-  headers = { "Content-type": "application/x-www-form-urlencoded" }
-  conn = httplib.HTTPConnection('closure-compiler.appspot.com')
-  conn.request('POST', '/compile', params, headers)
-  response = conn.getresponse()
-  data = response.read()
-  conn.close
-
-  if response.status != 200:
-    print sys.stderr, "error returned from JS compile service: %d" % response.status
+# The upstream generator does not take the arguments that the options below
+# need, so they are only passed when one of those options is given.
+def check_generator_argument(function, argument, option):
+  if argument not in inspect.getargspec(function).args:
+    print 'The trace-viewer in %s does not support %s.' % (
+        trace_viewer_dir, option)
     sys.exit(1)
 
-  result = json.loads(data)
-  if 'errors' in result:
-    print 'Encountered error minifying Javascript.  Writing intermediate code to flat_script.js'
-    open('flat_script.js', 'wt').write(js_code)
-    for e in result['errors']:
-      filenum = int(e['file'][6:])
-      filename = 'flat_script.js'
-      lineno = e['lineno']
-      charno = e['charno']
-      err = e['error']
-      print '%s:%d:%d: %s' % (filename, lineno, charno, err)
-    print 'Failed to generate %s.' % output_js_file
+js_args = {}
+css_args = {}
+js_source_map = None
+if options.source_map:
+  import source_map
+  check_generator_argument(gen.generate_js, 'source_map', '--source-map')
+  js_source_map = source_map.SourceMap()
+  js_args['source_map'] = js_source_map
+if options.profile:
+  import profiles
+  check_generator_argument(gen.generate_js, 'profile', '--profile')
+  try:
+    profile = profiles.load_profile(options.profile)
+  except ValueError, ex:
+    print 'Bad --profile: %s' % ex
     sys.exit(1)
+  js_args['profile'] = profile
+  css_args['profile'] = profile
+js_code = gen.generate_js(**js_args)
+css_code = gen.generate_css(**css_args)
+
+def write_source_map(js_source_map):
+  """Writes the source map next to the script and returns the comment that
+  points the script at it."""
+  map_file = output_js_file + '.map'
+  open(map_file, 'wt').write(js_source_map.to_json(map_file, output_js_file))
+  print 'Generated %s' % map_file
+  return '//# sourceMappingURL=%s\n' % os.path.basename(map_file)
 
-  open(output_js_file, 'wt').write(result['compiledCode'] + '\n')
+if options.no_min:
+  if js_source_map:
+    js_code += write_source_map(js_source_map)
+  open(output_js_file, 'wt').write(js_code)
   print 'Generated %s' % output_js_file
-
-  yuic_args = ['yui-compressor', '--type', 'css', '-o', output_css_file]
-  p = subprocess.Popen(yuic_args, stdin=subprocess.PIPE)
-  p.communicate(input=css_code)
-  if p.wait() != 0:
-    print 'Failed to generate %s.' % output_css_file
-    sys.exit(1)
-
+  open(output_css_file, 'wt').write(css_code)
   print 'Generated %s' % output_css_file
+else:
+  import minify
+
+  start = time.time()
+  min_js_source_map = None
+  if js_source_map:
+    min_js_source_map = source_map.SourceMap()
+  min_js_code = minify.minify_js(js_code, source_map=min_js_source_map,
+                                 input_source_map=js_source_map)
+  if min_js_source_map:
+    min_js_code += write_source_map(min_js_source_map)
+  open(output_js_file, 'wt').write(min_js_code)
+  print 'Generated %s (%d bytes, %d unminified, %.2fs)' % (
+      output_js_file, len(min_js_code), len(js_code), time.time() - start)
+
+  start = time.time()
+  min_css_code = minify.minify_css(css_code)
+  open(output_css_file, 'wt').write(min_css_code)
+  print 'Generated %s (%d bytes, %d unminified, %.2fs)' % (
+      output_css_file, len(min_css_code), len(css_code), time.time() - start)